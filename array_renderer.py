@@ -0,0 +1,341 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep, time
+
+import numpy as np
+
+from movement_kernel import EMPTY
+
+logger = logging.getLogger("array-renderer-logger")
+
+# the passes of the DrawObjects render stack that the array renderer has, in the order they are run
+DEFAULT_RENDER_STACK = (
+    'background_shader_pass',
+    'object_colour_pass',
+    'removed_object_colour_pass',
+    'fade_entity_pass',
+    'tone_map_pass',
+    'float_to_rgb_pass',
+)
+
+# the stack with per pixel lighting, which is only fast enough on big panels with the frame shaded in parallel tiles
+LIT_RENDER_STACK = (
+    'background_shader_pass',
+    'object_colour_pass',
+    'removed_object_colour_pass',
+    'fade_entity_pass',
+    'lighting_pass',
+    'tone_map_pass',
+    'float_to_rgb_pass',
+)
+
+
+class ArrayRenderer:
+    def __init__(self, width, height, session_info, world_space, render_stack=DEFAULT_RENDER_STACK,
+                 background_colour=(0.0, 0.0, 0.0), fade_colour=(0.0, 0.0, 0.0), fade_alpha=0.9, fade_clip=0.001,
+                 exposure=1.0, light_colour=(10.0, 10.0, 10.0), light_strength=10.0, light_position=(32, 32),
+                 tile_size=32, workers=None, parallel_min_pixels=128 * 128, timing_interval=600, viewport=None):
+        """
+        Renders the board the way DrawObjects does, but every pass works on the whole frame as a height x width x 3
+        array of floats. The render stack is looked up once into a fixed sequence of passes and every buffer the
+        passes use is allocated up front, so rendering a frame allocates no frame sized arrays.
+
+        The entities are drawn from the world space's occupancy and colour grids, which it is asked to keep. The
+        shading passes split frames of at least parallel_min_pixels into square tiles and shade them on a thread pool;
+        numpy releases the GIL while it works on each tile, so the tiles are shaded on all the cores at once. Smaller
+        frames are shaded as a single tile, as handing out the tiles costs more than it saves.
+        :param width:
+        :param height:
+        :param session_info:
+        :param world_space:
+        :param render_stack: names of the passes to run for each frame, in order
+        :param background_colour: colour the frame is cleared to
+        :param fade_colour: colour removed entities fade towards
+        :param fade_alpha: share of a removed entity's colour kept each frame
+        :param fade_clip: removed entities are gone once every channel of their colour is below this
+        :param exposure: scale applied to the frame before it is clipped to the displayable range
+        :param light_colour: colour of the light for the lighting pass
+        :param light_strength:
+        :param light_position: x, y position of the light on the board
+        :param tile_size: width and height in pixels of the tiles shaded in parallel
+        :param workers: threads shading tiles, one per core if not given, with 1 the frame is shaded as a single tile
+        :param parallel_min_pixels: frames with fewer pixels than this are shaded as a single tile whatever the workers
+        :param timing_interval: frames between logging the mean time each pass takes
+        :param viewport: camera the world is drawn through when it is bigger than the frame
+        """
+        self.width = width
+        self.height = height
+        self.session_info = session_info
+        self.world_space_access = world_space
+        self.viewport = viewport
+        world_space.keep_grids()
+
+        self.background_colour = np.array(background_colour, dtype=np.float32)
+        self.fade_alpha = np.float32(fade_alpha)
+        self.fade_term = np.array(fade_colour, dtype=np.float32) * (1 - self.fade_alpha)
+        self.fade_clip = np.float32(fade_clip)
+        self.exposure = np.float32(exposure)
+
+        shape = (height, width, 3)
+        self.render_plane = np.zeros(shape, dtype=np.float32)
+        self.removed_entity_plane = np.zeros(shape, dtype=np.float32)
+        self.removed_entity_mask = np.zeros((height, width), dtype=bool)
+        self.scratch_plane = np.zeros(shape, dtype=np.float32)
+        self.scratch_channel = np.zeros((height, width), dtype=np.float32)
+        self.scratch_mask = np.zeros((height, width), dtype=bool)
+        self.occupied_cells = np.zeros((width, height), dtype=bool)
+        self.rgb_frame = np.zeros(shape, dtype=np.uint8)
+
+        # the light doesn't move, so how much it brightens each pixel only needs working out once
+        light_x, light_y = light_position
+        y_distances, x_distances = np.mgrid[0:height, 0:width]
+        falloff = light_strength / (1.0 + (x_distances - light_x) ** 2 + (y_distances - light_y) ** 2)
+        self.light_plane = (falloff[..., np.newaxis] * np.array(light_colour)).astype(np.float32)
+
+        workers = workers or os.cpu_count() or 1
+        if width * height < parallel_min_pixels:
+            workers = 1
+        if workers > 1:
+            self.tiles = tuple((slice(y, min(y + tile_size, height)), slice(x, min(x + tile_size, width)))
+                               for y in range(0, height, tile_size) for x in range(0, width, tile_size))
+            self.tile_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render-tile")
+        else:
+            self.tiles = ((slice(0, height), slice(0, width)),)
+            self.tile_pool = None
+
+        self.passes = tuple((pass_name, getattr(self, pass_name)) for pass_name in render_stack)
+
+        self.timing_interval = timing_interval
+        self.pass_times = dict.fromkeys(render_stack, 0.0)
+        self.mean_pass_times = dict.fromkeys(render_stack, 0.0)
+        self.frames_timed = 0
+
+        self.world_ended = False
+
+        logger.info(f"Array renderer shading {len(self.tiles)} tile(s) of {tile_size}x{tile_size} on {workers} "
+                    f"thread(s): {', '.join(render_stack)}")
+
+    def render(self):
+        """
+        Run every pass of the render stack, timing each one.
+        :return: the frame as a height x width x 3 array of RGB24 pixels, reused for every frame
+        """
+        pass_times = self.pass_times
+        pass_start = perf_counter()
+        for pass_name, render_pass in self.passes:
+            render_pass()
+            pass_end = perf_counter()
+            pass_times[pass_name] += pass_end - pass_start
+            pass_start = pass_end
+
+        self.frames_timed += 1
+        if self.frames_timed >= self.timing_interval:
+            self.report_pass_times()
+
+        return self.rgb_frame
+
+    def report_pass_times(self):
+        """
+        Log the mean time each pass took over the frames since the last report.
+        :return:
+        """
+        for pass_name, pass_time in self.pass_times.items():
+            self.mean_pass_times[pass_name] = pass_time / self.frames_timed
+            self.pass_times[pass_name] = 0.0
+        self.frames_timed = 0
+
+        logger.info("Render passes: " + ", ".join(f"{pass_name}: {pass_time * 1000:.2f}ms"
+                                                  for pass_name, pass_time in self.mean_pass_times.items()))
+
+    def get_pass_times(self):
+        """
+        Get the mean milliseconds each pass has taken since the last report, or as of the last report if no frames
+        have been rendered since.
+        :return:
+        """
+        frames_timed = self.frames_timed
+        if frames_timed == 0:
+            return {pass_name: round(pass_time * 1000, 3) for pass_name, pass_time in self.mean_pass_times.items()}
+        return {pass_name: round(pass_time / frames_timed * 1000, 3) for pass_name, pass_time in self.pass_times.items()}
+
+    def shade_tiles(self, shade_tile):
+        """
+        Shade every tile of the frame, on the thread pool if there is one.
+        :param shade_tile: function called with the y and x slices of a tile
+        :return:
+        """
+        if self.tile_pool is None:
+            for tile_rows, tile_columns in self.tiles:
+                shade_tile(tile_rows, tile_columns)
+        else:
+            # the tiles don't overlap, so each thread only ever writes to its own part of the buffers
+            for _ in self.tile_pool.map(lambda tile: shade_tile(*tile), self.tiles):
+                pass
+
+    def background_shader_pass(self):
+        """
+        Clear the frame to the background colour, unless trails are being drawn.
+        :return:
+        """
+        if not self.session_info.draw_trails:
+            self.render_plane[...] = self.background_colour
+
+    def object_colour_pass(self):
+        """
+        Draw every entity in the world space, or only the ones in view when there is a camera.
+        :return:
+        """
+        if self.viewport is not None:
+            if "end" in self.world_space_access.world_space:
+                self.world_ended = True
+            else:
+                self.viewport.draw_world(self.world_space_access.occupancy, self.world_space_access.colours,
+                                         self.render_plane)
+            return
+
+        if "end" in self.world_space_access.world_space:
+            self.world_ended = True
+            return
+
+        # the grids are indexed x, y, so they are drawn transposed onto the frame
+        np.not_equal(self.world_space_access.occupancy, EMPTY, out=self.occupied_cells)
+        np.copyto(self.render_plane, self.world_space_access.colours.transpose(1, 0, 2),
+                  where=self.occupied_cells.T[..., np.newaxis])
+
+    def removed_object_colour_pass(self):
+        """
+        Add the entities removed since the last frame to the removed entity plane, so they can fade out.
+        :return:
+        """
+        for coord, pixel_rgb in self.world_space_access.return_world_space(2).items():
+            if isinstance(coord, tuple) and self.viewport is not None:
+                coord = self.viewport.to_display(coord)
+            if isinstance(coord, tuple):
+                self.removed_entity_plane[coord[1], coord[0]] = pixel_rgb
+                self.removed_entity_mask[coord[1], coord[0]] = True
+
+    def fade_entity_pass(self):
+        """
+        Fade the removed entities towards the fade colour and draw the ones still visible, like the motion blur shader.
+        :return:
+        """
+        self.shade_tiles(self.fade_entity_tile)
+
+    def fade_entity_tile(self, rows, columns):
+        """
+        Run the fade entity pass on one tile.
+        :param rows:
+        :param columns:
+        :return:
+        """
+        removed_entity_mask = self.removed_entity_mask[rows, columns]
+        if not removed_entity_mask.any():
+            return
+
+        removed_entity_plane = self.removed_entity_plane[rows, columns]
+        scratch_channel = self.scratch_channel[rows, columns]
+        scratch_mask = self.scratch_mask[rows, columns]
+
+        np.multiply(removed_entity_plane, self.fade_alpha, out=removed_entity_plane)
+        np.add(removed_entity_plane, self.fade_term, out=removed_entity_plane)
+
+        # a removed entity stays while its brightest channel is above the clip
+        np.maximum(removed_entity_plane[..., 0], removed_entity_plane[..., 1], out=scratch_channel)
+        np.maximum(scratch_channel, removed_entity_plane[..., 2], out=scratch_channel)
+        np.greater_equal(scratch_channel, self.fade_clip, out=scratch_mask)
+        np.logical_and(removed_entity_mask, scratch_mask, out=removed_entity_mask)
+
+        np.copyto(self.render_plane[rows, columns], removed_entity_plane, where=removed_entity_mask[..., np.newaxis])
+
+    def lighting_pass(self):
+        """
+        Brighten the frame by the light, strongest nearest to it, like the per pixel lighting shader.
+        :return:
+        """
+        self.shade_tiles(self.lighting_tile)
+
+    def lighting_tile(self, rows, columns):
+        """
+        Run the lighting pass on one tile.
+        :param rows:
+        :param columns:
+        :return:
+        """
+        render_plane = self.render_plane[rows, columns]
+        scratch_plane = self.scratch_plane[rows, columns]
+
+        np.multiply(render_plane, self.light_plane[rows, columns], out=scratch_plane)
+        np.add(render_plane, scratch_plane, out=render_plane)
+
+    def tone_map_pass(self):
+        """
+        Apply the exposure and clip the frame to the displayable range.
+        :return:
+        """
+        self.shade_tiles(self.tone_map_tile)
+
+    def tone_map_tile(self, rows, columns):
+        """
+        Run the tone map pass on one tile.
+        :param rows:
+        :param columns:
+        :return:
+        """
+        render_plane = self.render_plane[rows, columns]
+
+        if self.exposure != 1:
+            np.multiply(render_plane, self.exposure, out=render_plane)
+        np.clip(render_plane, 0.0, 1.0, out=render_plane)
+
+    def float_to_rgb_pass(self):
+        """
+        Convert the frame from floats to RGB24.
+        :return:
+        """
+        self.shade_tiles(self.float_to_rgb_tile)
+
+    def float_to_rgb_tile(self, rows, columns):
+        """
+        Run the float to RGB pass on one tile.
+        :param rows:
+        :param columns:
+        :return:
+        """
+        scratch_plane = self.scratch_plane[rows, columns]
+
+        np.multiply(self.render_plane[rows, columns], 255.0, out=scratch_plane)
+        np.rint(scratch_plane, out=scratch_plane)
+        np.copyto(self.rgb_frame[rows, columns], scratch_plane, casting='unsafe')
+
+    def run(self, screen_controller, buffer_refresh, load_governor=None, stats_store=None):
+        """
+        Render and show frames at the refresh rate until the world space is ended.
+        :param screen_controller:
+        :param buffer_refresh: frames per second
+        :param load_governor: given the time each frame takes, and skips frames when it says to
+        :param stats_store: given the time each frame takes
+        :return:
+        """
+        frame_period = 1 / buffer_refresh
+        while True:
+            frame_start = time()
+            pause = frame_period
+
+            if self.session_info.rendering_on:
+                frame = self.render()
+                if self.world_ended:
+                    logger.info("Render loop purposely ended")
+                    return
+                screen_controller.draw_frame(frame)
+                screen_controller.show()
+
+                frame_time = time() - frame_start
+                pause = max(0.0, frame_period - frame_time)
+                if stats_store is not None:
+                    stats_store.record_render(frame_time)
+                if load_governor is not None:
+                    load_governor.record_render(frame_time)
+                    pause += load_governor.render_pause(frame_time)
+
+            sleep(pause)
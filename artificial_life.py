@@ -1,3 +1,8 @@
+from time import perf_counter
+
+# taken before anything else is imported, so the startup timings include the time the imports take
+startup_start = perf_counter()
+
 import argparse
 import itertools
 import logging
@@ -8,18 +13,21 @@ from dataclasses import asdict
 from math import floor, sqrt
 import sys
 from dataclasses import dataclass
-from time import time
+from time import sleep, time
 import datetime
 
 from screen_output import ScreenController
 
-from collections import deque
+from genome_decoder import decode_genomes
 
-from pixel_composer.rasterizer import ScreenDrawer, FrameBuffer, FullScreenPatternShader, PerPixelLightingShader, \
-    MotionBlurShader, FullScreenGradientShader, FloatToRGBShader, ShaderStack, ToneMapShader, SpriteShader
+from movement_kernel import MovementKernel, EMPTY, OFF_BOARD, OCCUPIED
+
+from collections import Counter, deque
 
 from threading import Thread
 
+from command_queue import CommandQueue
+
 from config.parameters import *
 
 logger = logging.getLogger("alife-logger")
@@ -39,6 +47,24 @@ def diagonal_distance(x1, y1, x2, y2):
     return sqrt(x_distance ** 2 + y_distance ** 2)
 
 
+class RandomStreams:
+    """
+    This class holds an independent random number generator for each part of the simulation, all derived from the one
+    run seed so that a run can be reproduced tick by tick
+    """
+    stream_names = ('genome', 'movement', 'breeding', 'radiation', 'placement')
+
+    def __init__(self, seed=None):
+        # without a seed one is drawn from the OS, it is still logged so the run can be repeated
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+
+        self.seed = seed
+
+        for stream_name in self.stream_names:
+            setattr(self, stream_name, random.Random(f"{seed}-{stream_name}"))
+
+
 @dataclass
 class Session:
     """
@@ -66,25 +92,55 @@ class Session:
     current_life_form_amount: int = 0
     life_form_total_count: int = 0
     process_loop_on: bool = True
+    tick_rate: float = hat_buffer_refresh_rate
+    random_seed: int = None
+    region: tuple = None
+    population_cap: int = None
+    breed_chance: float = 1.0
+    render_every: int = 1
 
     directions = ('move_up', 'move_down', 'move_left', 'move_right', 'move_up_and_right',
                   'move_down_and_left', 'move_up_and_left', 'move_down_and_right', 'still')
 
+    direction_offsets = {'move_up': (0, -1), 'move_down': (0, 1), 'move_left': (-1, 0), 'move_right': (1, 0),
+                         'move_up_and_right': (1, -1), 'move_down_and_left': (-1, 1), 'move_up_and_left': (-1, -1),
+                         'move_down_and_right': (1, 1), 'still': (0, 0)}
+
     surrounding_point_choices = ('get_position_up', 'get_position_down', 'get_position_left',
                                  'get_position_right', 'get_position_up_and_right',
                                  'get_position_up_and_left', 'get_position_down_and_left',
                                  'get_position_down_and_right')
 
     def __post_init__(self):
-        self.coord_map = tuple(
-            (x, y) for x in range(screen_controller.u_width) for y in range(screen_controller.u_height))
+        self.rng = RandomStreams(self.random_seed)
+        logger.info(f"Random seed: {self.rng.seed}")
 
-        self.get_coord_map()
+        # the movement kernel works with directions as codes, surrounding points use the code of the matching move
+        self.direction_codes = {direction: code for code, direction in enumerate(self.directions)}
+        self.surrounding_point_codes = {
+            point: self.direction_codes[point.replace('get_position_', 'move_')]
+            for point in self.surrounding_point_choices}
+
+        self.set_region(self.region)
 
         self.free_board_positions.extend(self.shuffled_coord_map)
 
         self.base_radiation = self.radiation
 
+    def set_region(self, region=None):
+        """
+        This method sets the region of the board (x0, y0, x1, y1, end coordinates exclusive) the session simulates,
+        the whole board unless the board is split into tiles
+        :param region:
+        :return:
+        """
+        self.region = region or (0, 0, world_space_access.width, world_space_access.height)
+        x0, y0, x1, y1 = self.region
+
+        self.coord_map = tuple((x, y) for x in range(x0, x1) for y in range(y0, y1))
+
+        self.get_coord_map()
+
     def get_coord_map(self):
         """
         This method creates a shuffled list of coordinates
@@ -92,12 +148,39 @@ class Session:
         """
         self.shuffled_coord_map = list(self.coord_map)
 
-        random.shuffle(self.shuffled_coord_map)
+        self.rng.placement.shuffle(self.shuffled_coord_map)
 
         self.free_board_positions = deque()
 
         self.free_board_positions.extend(self.shuffled_coord_map)
 
+    def claim_board_positions(self, count):
+        """
+        This method claims a number of free board positions at once, fewer are returned if the board runs out
+        :param count:
+        :return:
+        """
+        count = min(count, len(self.free_board_positions))
+        return [self.free_board_positions.popleft() for _ in range(count)]
+
+    def get_population_limit(self, pop_limit):
+        """
+        This method gets the population limit in effect, the configured limit unless the load governor has capped it
+        :param pop_limit:
+        :return:
+        """
+        if self.population_cap is None:
+            return pop_limit
+        return min(pop_limit, self.population_cap)
+
+    def breeding_allowed(self):
+        """
+        This method decides whether a collision that could breed does, always unless the load governor has lowered
+        the breed chance
+        :return:
+        """
+        return self.breed_chance >= 1.0 or self.rng.breeding.random() < self.breed_chance
+
     def get_dna_chaos_chance(self):
         """
         This method calculates the chance of a lifeforms DNA being mutated
@@ -110,23 +193,34 @@ class Session:
         This method adjusts the radiation level according to the radiation curve
         :return:
         """
-        if random.random() > self.radiation_base_change_chance:
+        if self.rng.radiation.random() > self.radiation_base_change_chance:
             pass
         else:
-            self.base_radiation = floor(self.radiation_max * random.random())
+            self.base_radiation = floor(self.radiation_max * self.rng.radiation.random())
 
         self.radiation = max(
-            min(self.radiation_max, int(self.base_radiation * random.uniform(min([y for x, y in self.radiation_curve]),
-                                                                             max([y for x, y in
-                                                                                  self.radiation_curve])))), 0)
+            min(self.radiation_max, int(self.base_radiation * self.rng.radiation.uniform(
+                min([y for x, y in self.radiation_curve]), max([y for x, y in self.radiation_curve])))), 0)
 
 
 class WorldSpaceControl:
-    def __init__(self):
+    def __init__(self, width, height):
         self.template_world_space = {}
 
         self.world_space = {}
 
+        self.width = width
+        self.height = height
+
+        # grids of the entity id and colour in each cell of the main world space, for the parts of the simulation
+        # that read the board as arrays; they are only kept in step with the world space once one of them calls
+        # keep_grids, until then writing to the world space is only a dictionary write. The colour of an empty cell is
+        # left as it was, so colours are only read where the occupancy grid has an entity
+        self.occupancy = None
+        self.occupancy_cells = None
+        self.colours = None
+        self.colour_cells = None
+
         self.world_space_2 = {}
 
         self.world_time = 0
@@ -146,9 +240,49 @@ class WorldSpaceControl:
         """
         if world_space_selector == 1:
             self.world_space[pixel_coord] = pixel_rgb, entity_id
+            if self.occupancy is not None:
+                self.set_cell(pixel_coord, pixel_rgb, entity_id)
         elif world_space_selector == 2:
             self.world_space_2[pixel_coord] = pixel_rgb, entity_id
 
+    def keep_grids(self):
+        """
+        This method starts keeping the occupancy and colour grids in step with the main world space, building them
+        from what is in the world space now
+        :return:
+        """
+        if self.occupancy is None:
+            import numpy as np
+            self.occupancy = np.full((self.width, self.height), EMPTY, dtype=np.int64)
+            self.colours = np.zeros((self.width, self.height, 3), dtype=np.float32)
+            # single cells are written through memoryviews, which is quicker than indexing the arrays from Python
+            self.occupancy_cells = memoryview(self.occupancy)
+            self.colour_cells = memoryview(self.colours)
+            self.rebuild_grids()
+
+    def set_cell(self, pixel_coord, pixel_rgb, entity_id):
+        """
+        This method sets the entity id and colour of a cell in the grids, coordinates off the board are ignored
+        :param pixel_coord:
+        :param pixel_rgb:
+        :param entity_id:
+        :return:
+        """
+        x, y = pixel_coord
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.occupancy_cells[x, y] = entity_id
+            colour_cells = self.colour_cells
+            colour_cells[x, y, 0], colour_cells[x, y, 1], colour_cells[x, y, 2] = pixel_rgb
+
+    def clear_cell(self, pixel_coord):
+        """
+        This method empties a cell of the occupancy grid, coordinates off the board are ignored
+        :param pixel_coord:
+        :return:
+        """
+        if 0 <= pixel_coord[0] < self.width and 0 <= pixel_coord[1] < self.height:
+            self.occupancy_cells[pixel_coord] = EMPTY
+
     def return_world_space(self, world_space_selector=1):
         """
         This method returns the world space
@@ -162,6 +296,23 @@ class WorldSpaceControl:
             self.world_space_2 = {}
             return world_space_2_return
 
+    def write_many_to_world_space(self, pixels, world_space_selector=1):
+        """
+        This method writes a batch of pixels to the world space at once
+        :param pixels: iterable of (pixel_coord, pixel_rgb, entity_id)
+        :param world_space_selector:
+        :return:
+        """
+        if world_space_selector == 1:
+            pixels = list(pixels)
+            self.world_space.update(
+                (pixel_coord, (pixel_rgb, entity_id)) for pixel_coord, pixel_rgb, entity_id in pixels)
+            if self.occupancy is not None:
+                [self.set_cell(pixel_coord, pixel_rgb, entity_id) for pixel_coord, pixel_rgb, entity_id in pixels]
+        elif world_space_selector == 2:
+            self.world_space_2.update(
+                (pixel_coord, (pixel_rgb, entity_id)) for pixel_coord, pixel_rgb, entity_id in pixels)
+
     def get_from_world_space(self, pixel_coord, world_space_selector=1):
         """
         This method returns the value of a pixel in the world space
@@ -192,12 +343,63 @@ class WorldSpaceControl:
                 del self.world_space[coord]
             except KeyError:
                 pass
+            else:
+                if self.occupancy is not None:
+                    self.clear_cell(coord)
         elif world_space_selector == 2:
             try:
                 del self.world_space_2[coord]
             except KeyError:
                 pass
 
+    def move_world_space_items(self, moves, world_space_selector=1):
+        """
+        This method moves a batch of items in the world space, all the old coordinates are cleared before any of the
+        new ones are written so that items moving into each other's places are not lost
+        :param moves: pairs of old and new coordinates
+        :param world_space_selector:
+        :return:
+        """
+        if world_space_selector == 1:
+            world_space = self.world_space
+        elif world_space_selector == 2:
+            world_space = self.world_space_2
+
+        moved_items = [(new_coord, world_space.pop(old_coord)) for old_coord, new_coord in moves]
+        world_space.update(moved_items)
+
+        if world_space_selector == 1 and self.occupancy is not None:
+            [self.clear_cell(old_coord) for old_coord, new_coord in moves]
+            [self.set_cell(new_coord, pixel[0], pixel[1]) for new_coord, pixel in moved_items]
+
+    def replace_world_space(self, world_space):
+        """
+        This method replaces the whole of the main world space, rebuilding the grids from it if they are kept
+        :param world_space: dictionary of coordinates to colour and entity id
+        :return:
+        """
+        self.world_space = world_space
+        if self.occupancy is not None:
+            self.rebuild_grids()
+
+    def rebuild_grids(self):
+        """
+        This method rebuilds the grids from the main world space in one go
+        :return:
+        """
+        import numpy as np
+
+        self.occupancy.fill(EMPTY)
+        cells = [(coord, pixel) for coord, pixel in self.world_space.copy().items() if isinstance(coord, tuple)]
+        if cells:
+            coords = np.array([coord for coord, _ in cells], dtype=np.int64)
+            entity_ids = np.array([pixel[1] for _, pixel in cells], dtype=np.int64)
+            colours = np.array([pixel[0] for _, pixel in cells], dtype=np.float32)
+            on_board = (coords[:, 0] >= 0) & (coords[:, 0] < self.width) & (coords[:, 1] >= 0) & \
+                       (coords[:, 1] < self.height)
+            self.occupancy[coords[on_board, 0], coords[on_board, 1]] = entity_ids[on_board]
+            self.colours[coords[on_board, 0], coords[on_board, 1]] = colours[on_board]
+
     def erase_world_space(self, world_space_selector=1):
         """
         This method erases the world space
@@ -206,6 +408,8 @@ class WorldSpaceControl:
         """
         if world_space_selector == 1:
             self.world_space = {}
+            if self.occupancy is not None:
+                self.occupancy.fill(EMPTY)
         elif world_space_selector == 2:
             self.world_space_2 = {}
 
@@ -217,10 +421,173 @@ class WorldSpaceControl:
         """
         if world_space_selector == 1:
             self.world_space = {"end": "ended"}
+            if self.occupancy is not None:
+                self.occupancy.fill(EMPTY)
         elif world_space_selector == 2:
             self.world_space_2 = {"end": "ended"}
 
 
+class EntityGroups:
+    """
+    Union-find structure that tracks combined entities as groups, each group is moved by its root entity as a single
+    rigid body and is split back up into its still touching pieces when a member is removed
+    """
+
+    neighbour_offsets = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+    def __init__(self):
+        # entities that are not combined with anything are not tracked at all
+        self.parent = {}
+
+        self.members = {}
+
+    def clear(self):
+        """
+        This method removes all groups
+        :return:
+        """
+        self.parent = {}
+        self.members = {}
+
+    def find(self, entity_id):
+        """
+        This method returns the root entity id of the group the entity is in, compressing the path as it goes
+        :param entity_id:
+        :return:
+        """
+        parent = self.parent
+        if entity_id not in parent:
+            return entity_id
+
+        while parent[entity_id] != entity_id:
+            parent[entity_id] = parent[parent[entity_id]]
+            entity_id = parent[entity_id]
+
+        return entity_id
+
+    def union(self, first_id, second_id):
+        """
+        This method combines the groups of the two entities, the larger group's root becomes the root of the combined
+        group, on a tie the first entity's root is kept
+        :param first_id:
+        :param second_id:
+        :return:
+        """
+        first_root = self.find(first_id)
+        second_root = self.find(second_id)
+
+        if first_root == second_root:
+            return first_root
+
+        for root in (first_root, second_root):
+            if root not in self.members:
+                self.parent[root] = root
+                self.members[root] = {root}
+
+        if len(self.members[first_root]) < len(self.members[second_root]):
+            first_root, second_root = second_root, first_root
+
+        self.parent[second_root] = first_root
+        self.members[first_root] |= self.members.pop(second_root)
+
+        return first_root
+
+    def is_follower(self, entity_id):
+        """
+        This method returns whether the entity is a non-root member of a group, followers are moved by their root
+        :param entity_id:
+        :return:
+        """
+        return entity_id in self.parent and entity_id not in self.members
+
+    def remove(self, entity_id):
+        """
+        This method removes an entity from its group, the remaining members are regrouped by adjacency so that a group
+        cut in two by the removal splits cleanly into two groups
+        :param entity_id:
+        :return:
+        """
+        if entity_id not in self.parent:
+            return
+
+        root = self.find(entity_id)
+        remaining = self.members.pop(root)
+        remaining.discard(entity_id)
+
+        del self.parent[entity_id]
+        for member_id in remaining:
+            del self.parent[member_id]
+
+        member_positions = {}
+        for member_id in remaining:
+            try:
+                member = BaseEntity.lifeforms[member_id]
+            except KeyError:
+                continue
+            member_positions[(member.matrix_position_x, member.matrix_position_y)] = member_id
+
+        for (x, y), member_id in member_positions.items():
+            for offset_x, offset_y in self.neighbour_offsets:
+                neighbour_id = member_positions.get((x + offset_x, y + offset_y))
+                if neighbour_id is not None:
+                    self.union(member_id, neighbour_id)
+
+    def footprint_collision(self, root, direction):
+        """
+        This method tests the whole footprint of a group against the board for a move in the given direction, the
+        bounding box is checked against the edges of the session's region once, then each target cell is checked for
+        entities that are not part of the group
+        :param root:
+        :param direction:
+        :return: whether a collision was found and the id of the entity collided with (None for the board edge)
+        """
+        if direction == 'still':
+            return False, None
+
+        offset_x, offset_y = current_session.direction_offsets[direction]
+        members = self.members[root]
+        lifeforms = BaseEntity.lifeforms
+
+        member_xs = [lifeforms[member_id].matrix_position_x for member_id in members]
+        member_ys = [lifeforms[member_id].matrix_position_y for member_id in members]
+
+        # groups stay within the session's region, so they never have to be split across tiles
+        region_x0, region_y0, region_x1, region_y1 = current_session.region
+        if min(member_xs) + offset_x < region_x0 or max(member_xs) + offset_x >= region_x1 \
+                or min(member_ys) + offset_y < region_y0 or max(member_ys) + offset_y >= region_y1:
+            return True, None
+
+        for member_x, member_y in zip(member_xs, member_ys):
+            occupant = world_space_access.get_from_world_space((member_x + offset_x, member_y + offset_y))
+            if occupant and occupant[1] not in members:
+                return True, occupant[1]
+
+        return False, None
+
+    def translate(self, root, direction):
+        """
+        This method moves every member of a group one step in the given direction, clearing all the old positions from
+        the world space before writing the new ones so members never overwrite each other
+        :param root:
+        :param direction:
+        :return:
+        """
+        offset_x, offset_y = current_session.direction_offsets[direction]
+        members = [BaseEntity.lifeforms[member_id] for member_id in self.members[root]]
+
+        for member in members:
+            world_space_access.del_world_space_item((member.matrix_position_x, member.matrix_position_y))
+
+        for member in members:
+            member.matrix_position_x += offset_x
+            member.matrix_position_y += offset_y
+            member.direction = direction
+            world_space_access.write_to_world_space(
+                (member.matrix_position_x, member.matrix_position_y),
+                (member.red_color, member.green_color,
+                 member.blue_color), member.life_form_id)
+
+
 class BaseEntity:
     """
     The main class that handles each life forms initialisation, movement, colour, expiry and statistics.
@@ -229,12 +596,18 @@ class BaseEntity:
     # dictionary to hold all instances of this class
     lifeforms = {}
 
-    def __init__(self, life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand=0):
+    # when combining is enabled, entities that have combined are tracked as groups that move as one bigger entity
+    groups = EntityGroups()
+
+    def __init__(self, life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand=0, traits=None,
+                 register=True):
         """
         When class initialised it gives the life form its properties from the random numbers inserted into it,
-        the life seeds are used to seed random number generators that then are used to generate the life form
-        properties, this is so that the same results will come from the same life seeds and that the properties
-        generated from them are non-linear i.e. higher life seed does not equal higher life span etc.
+        the life seeds are hashed into independent draws that are then used to generate the life form properties,
+        this is so that the same results will come from the same life seeds and that the properties generated from
+        them are non-linear i.e. higher life seed does not equal higher life span etc.
+        Traits that have already been decoded can be passed in, and registering the entity on the board can be left
+        to the caller so that a batch of entities can be registered at once.
         """
         self.life_form_id = life_form_id
 
@@ -261,11 +634,7 @@ class BaseEntity:
         self.waiting_seed2 = None
         self.waiting_seed3 = None
         self.waiting_max_attrib_expand = None
-
-        # set linked status to False; when linked an entity will continue to move in the same direction as the entity
-        # it is linked with essentially combining into one bigger entity
-        self.linked_up = False
-        self.linked_to = 0
+        self.waiting_partner_id = None
 
         self.previous_direction = None
 
@@ -275,69 +644,23 @@ class BaseEntity:
 
         self.max_attribute = current_session.max_attribute
 
-        # life seed 1 controls the random number generation for the red colour, maximum aggression factor starting
-        # direction and maximum possible lifespan
-        random.seed(self.life_seed1)
-        if not args.fixed_function:
-            self.red_color = random.uniform(0, 1)
-        else:
-            self.red_color = floor(256 * random.random())
-        self.aggression_factor = floor(self.max_attribute * random.random())
-        self.friend_factor = floor(current_session.max_enemy_factor * random.random())
-        self.weight = floor(self.max_attribute * random.random())
-        self.preferred_breed_direction = random.choice(current_session.surrounding_point_choices)
-        self.momentum = floor(current_session.max_movement * random.random())
-        self.rebel = random.choice([True, False])
-        self.forgetfulness = floor(128 * random.random())
-
-        # life seed 2 controls the random number generation for the green colour, aggression factor between 0 and the
-        # maximum from above as well as the time the entity takes to change direction
-        random.seed(self.life_seed2)
-        if not args.fixed_function:
-            self.green_color = random.uniform(0, 1)
-        else:
-            self.green_color = floor(256 * random.random())
-        if not self.friend_factor == 0:
-            self.breed_threshold = floor(self.max_attribute * random.random()) / self.friend_factor
-        else:
-            self.breed_threshold = floor(self.max_attribute * random.random())
-        self.time_to_move = floor(current_session.max_movement * random.random())
+        # life seed 1 controls the red colour, aggression factor, friend factor, weight, preferred breed direction,
+        # momentum and memory, life seed 2 the green colour, breed threshold, time to move and building, life seed 3
+        # the blue colour, time to live, strength, compatibility and starting direction; entities spawned in bulk have
+        # their traits decoded all at once beforehand
+        if traits is None:
+            traits = decode_traits([(seed, seed2, seed3)])[0]
+        self.__dict__.update(traits)
+
         self.time_to_move_count = self.time_to_move
-        self.combine_threshold = floor(self.max_attribute * random.random())
-        self.bouncy = random.choice([True, False])
-        self.builder = random.choice([True, False])
-        self.wall_factor = floor(current_session.wall_chance_multiplier * random.random())
-        if not self.forgetfulness == 0:
-            self.memory_max = floor(self.max_attribute * random.random()) / self.forgetfulness
-        else:
-            self.memory_max = floor(self.max_attribute * random.random())
         self.memory_max_count = self.memory_max
-
-        # life seed 3 controls the random number generation for the green colour, and time to live between 0 and the
-        # maximum from above
-        random.seed(self.life_seed3)
-        if not args.fixed_function:
-            self.blue_color = random.uniform(0, 1)
-        else:
-            self.blue_color = floor(256 * random.random())
-        self.time_to_live = floor(self.max_attribute * random.random())
         self.time_to_live_count = self.time_to_live
-        self.strength = floor(self.max_attribute * random.random())
-        self.compatibility_factor = floor(self.max_attribute * random.random())
-        self.direction = random.choice(current_session.directions)
         self.preferred_direction = self.direction
-        if not self.wall_factor == 0:
-            self.time_to_build = floor(self.max_attribute * random.random()) / self.wall_factor
-        else:
-            self.time_to_build = floor(self.max_attribute * random.random())
 
         # todo: add in wall strength based on entities own strength
 
         self.time_to_build_count = self.time_to_build
 
-        # reset the global random seed
-        random.seed()
-
         self.mining_strength = percentage(self.strength, 1)
 
         if self.rebel:
@@ -350,11 +673,14 @@ class BaseEntity:
 
         self.prev_matrix_position = (self.matrix_position_x, self.matrix_position_y)
 
-        self.lifeforms.update({self.life_form_id: self})
+        self.birth_tick = world_space_access.world_time
+
+        if register:
+            self.lifeforms.update({self.life_form_id: self})
 
-        world_space_access.write_to_world_space((self.matrix_position_x, self.matrix_position_y),
-                                                (self.red_color, self.green_color, self.blue_color),
-                                                self.life_form_id)
+            world_space_access.write_to_world_space((self.matrix_position_x, self.matrix_position_y),
+                                                    (self.red_color, self.green_color, self.blue_color),
+                                                    self.life_form_id)
 
     def get_dna(self, dna_key, collided_life_form_id):
         """
@@ -365,22 +691,22 @@ class BaseEntity:
         :param collided_life_form_id:
         :return:
         """
-        dna_chaos = floor(100 * random.random())
+        dna_chaos = floor(100 * current_session.rng.breeding.random())
         if dna_chaos <= current_session.get_dna_chaos_chance():
             return get_random()
         else:
             if dna_key == 1:
-                if random.random() < .5:
+                if current_session.rng.breeding.random() < .5:
                     return self.life_seed1
                 else:
                     return BaseEntity.lifeforms[collided_life_form_id].life_seed1
             elif dna_key == 2:
-                if random.random() < .5:
+                if current_session.rng.breeding.random() < .5:
                     return self.life_seed2
                 else:
                     return BaseEntity.lifeforms[collided_life_form_id].life_seed2
             elif dna_key == 3:
-                if random.random() < .5:
+                if current_session.rng.breeding.random() < .5:
                     return self.life_seed3
                 else:
                     return BaseEntity.lifeforms[collided_life_form_id].life_seed3
@@ -416,27 +742,42 @@ class BaseEntity:
                 highest_count = count
         return highest_coord
 
+    def world_space_cells(self):
+        """
+        This method returns the board coordinates the entity takes up
+        :return:
+        """
+        return [(self.matrix_position_x, self.matrix_position_y)]
+
+    def affected_by_gravity(self):
+        """
+        This method returns whether gravity should pull the entity down, which is when it is still, has run out of
+        momentum or is too heavy to move
+        :return:
+        """
+        return self.strength < self.weight or self.direction == 'still' or self.momentum <= 0
+
     def get_stats(self):
         """
         This method is used to get the stats of the life form
         :return:
         """
-        logger.debug(f'ID: {self.life_form_id}')
-        logger.debug(f'Seed 1: {self.life_seed1}')
-        logger.debug(f'Seed 2: {self.life_seed2}')
-        logger.debug(f'Seed 3: {self.life_seed3}')
-        logger.debug(f'Preferred Spawn Direction: {self.preferred_breed_direction}')
-        logger.debug(f'Preferred Direction: {self.preferred_direction}')
-        logger.debug(f'Direction: {self.direction}')
-        logger.debug(f'Time to move total: {self.time_to_move}')
-        logger.debug(f'Time to next move: {self.time_to_move_count}')
-        logger.debug(f'Total lifetime: {self.time_to_live}')
-        logger.debug(f'Time left to live: {self.time_to_live_count}')
-        logger.debug(f'Aggression Factor: {self.aggression_factor}')
-        logger.debug(f'Position X: {self.matrix_position_x}')
-        logger.debug(f'Position Y: {self.matrix_position_y}')
-        logger.debug(f'Surrounding positions: {self.positions_around_life_form}')
-        logger.debug(f'Color: R: {self.red_color} G: {self.green_color} B: {self.blue_color} \n')
+        logger.debug('ID: %s', self.life_form_id)
+        logger.debug('Seed 1: %s', self.life_seed1)
+        logger.debug('Seed 2: %s', self.life_seed2)
+        logger.debug('Seed 3: %s', self.life_seed3)
+        logger.debug('Preferred Spawn Direction: %s', self.preferred_breed_direction)
+        logger.debug('Preferred Direction: %s', self.preferred_direction)
+        logger.debug('Direction: %s', self.direction)
+        logger.debug('Time to move total: %s', self.time_to_move)
+        logger.debug('Time to next move: %s', self.time_to_move_count)
+        logger.debug('Total lifetime: %s', self.time_to_live)
+        logger.debug('Time left to live: %s', self.time_to_live_count)
+        logger.debug('Aggression Factor: %s', self.aggression_factor)
+        logger.debug('Position X: %s', self.matrix_position_x)
+        logger.debug('Position Y: %s', self.matrix_position_y)
+        logger.debug('Surrounding positions: %s', self.positions_around_life_form)
+        logger.debug('Color: R: %s G: %s B: %s \n', self.red_color, self.green_color, self.blue_color)
 
     def process(self):
         """
@@ -462,6 +803,7 @@ class BaseEntity:
                 self.bad_memories = {}
 
             if expired:
+                record_event("EVENT_EXPIRED", None, self.life_form_id, self.matrix_position_x, self.matrix_position_y)
                 self.entity_remove()
                 return
 
@@ -482,61 +824,46 @@ class BaseEntity:
             if not self.alive:
                 return "Dead"
 
-            if self.direction == 'move_right':
-                self.adj_position = self.matrix_position_x + 1, self.matrix_position_y
-                if self.adj_position not in current_session.coord_map:
-                    self.adj_position = None
-            elif self.direction == 'move_left':
-                self.adj_position = self.matrix_position_x - 1, self.matrix_position_y
-                if self.adj_position not in current_session.coord_map:
-                    self.adj_position = None
-            elif self.direction == 'move_down':
-                self.adj_position = self.matrix_position_x, self.matrix_position_y + 1
-                if self.adj_position not in current_session.coord_map:
-                    self.adj_position = None
-            elif self.direction == 'move_up':
-                self.adj_position = self.matrix_position_x, self.matrix_position_y - 1
-                if self.adj_position not in current_session.coord_map:
-                    self.adj_position = None
-            elif self.direction == 'move_down_and_right':
-                self.adj_position = self.matrix_position_x + 1, self.matrix_position_y + 1
-                if self.adj_position not in current_session.coord_map:
-                    self.adj_position = None
-            elif self.direction == 'move_up_and_left':
-                self.adj_position = self.matrix_position_x - 1, self.matrix_position_y - 1
-                if self.adj_position not in current_session.coord_map:
-                    self.adj_position = None
-            elif self.direction == 'move_down_and_left':
-                self.adj_position = self.matrix_position_x - 1, self.matrix_position_y + 1
-                if self.adj_position not in current_session.coord_map:
-                    self.adj_position = None
-            elif self.direction == 'move_up_and_right':
-                self.adj_position = self.matrix_position_x + 1, self.matrix_position_y - 1
-                if self.adj_position not in current_session.coord_map:
+            # members of a combined group don't move or collide on their own, the group is moved as one by its root
+            # entity, but they still breed and build from where they are
+            follower = BaseEntity.groups.is_follower(self.life_form_id)
+            grouped = self.life_form_id in BaseEntity.groups.members
+
+            if not follower:
+                adj_x, adj_y, probe_result, occupant_id = movement.probe_direction(
+                    self.matrix_position_x, self.matrix_position_y, current_session.direction_codes[self.direction],
+                    world_space_access.occupancy if movement.jit else world_space_access.world_space,
+                    world_space_access.width, world_space_access.height)
+
+                if probe_result == OFF_BOARD:
                     self.adj_position = None
+                else:
+                    self.adj_position = adj_x, adj_y
 
-            if not self.direction == 'still':
-                if not self.adj_position:
+            if follower:
+                collision_detected = False
+                collided_life_form_id = None
+            elif grouped:
+                collision_detected, collided_life_form_id = BaseEntity.groups.footprint_collision(
+                    self.life_form_id, self.direction)
+            elif not self.direction == 'still':
+                if probe_result == OFF_BOARD:
                     collision_detected = True
                     collided_life_form_id = None
+                elif probe_result == OCCUPIED:
+                    collision_detected = True
+                    # cells held by entities of a neighbouring tile are only obstacles, like the edge of the board
+                    collided_life_form_id = occupant_id if occupant_id in BaseEntity.lifeforms else None
                 else:
-
-                    try:
-                        s_item_life_form_id = \
-                            world_space_access.get_from_world_space(self.adj_position)[1]
-                        collision_detected = True
-                        collided_life_form_id = s_item_life_form_id
-                    except TypeError:
-
-                        collision_detected = False
-                        collided_life_form_id = None
+                    collision_detected = False
+                    collided_life_form_id = None
             else:
 
                 collision_detected = False
                 collided_life_form_id = None
 
             if self.waiting_to_spawn or self.waiting_to_build:
-                preferred_direction = random.choice(current_session.surrounding_point_choices)
+                preferred_direction = current_session.rng.breeding.choice(current_session.surrounding_point_choices)
 
             # get the count of total life forms currently active
             # if there has been a collision with another entity it will attempt to interact with the other entity
@@ -550,7 +877,9 @@ class BaseEntity:
                     momentum_reduction = percentage(60, self.momentum)
                     self.momentum -= momentum_reduction
 
-                logger.debug(f'Collision detected: {self.life_form_id} collided with {collided_life_form_id}')
+                logger.debug('Collision detected: %s collided with %s', self.life_form_id, collided_life_form_id)
+                record_event("EVENT_COLLISION", None, self.life_form_id, self.matrix_position_x, self.matrix_position_y,
+                             collided_life_form_id)
 
                 # store the current direction for later use, like if the life form kills another, it will continue
                 # moving in that direction rather than bounce
@@ -559,7 +888,7 @@ class BaseEntity:
                 if not self.direction == self.preferred_direction:
                     self.direction = self.preferred_direction
                 else:
-                    self.direction = random.choice(current_session.directions)
+                    self.direction = current_session.rng.movement.choice(current_session.directions)
 
                 if collided_life_form_id:
                     if not BaseEntity.lifeforms[collided_life_form_id].wall:
@@ -578,17 +907,19 @@ class BaseEntity:
                                 self.add_coord_good_memory(self.matrix_position_x, self.matrix_position_y)
 
                                 if args.combine_mode:
-                                    logger.debug(f'Entity: {self.life_form_id} combined with: {collided_life_form_id}')
+                                    logger.debug('Entity: %s combined with: %s', self.life_form_id,
+                                                 collided_life_form_id)
+                                    record_event("EVENT_COMBINE", "STAT_COMBINES", self.life_form_id,
+                                                 self.matrix_position_x, self.matrix_position_y, collided_life_form_id)
 
                                     self.add_coord_good_memory(self.matrix_position_x, self.matrix_position_y)
 
-                                    BaseEntity.lifeforms[collided_life_form_id].linked_up = True
-                                    BaseEntity.lifeforms[collided_life_form_id].linked_to = self.life_form_id
+                                    group_root = BaseEntity.groups.union(self.life_form_id, collided_life_form_id)
 
-                                    BaseEntity.lifeforms[collided_life_form_id].direction = self.direction
+                                    BaseEntity.lifeforms[group_root].direction = self.direction
 
-                            if not self.waiting_to_spawn:
-                                if random.random() < .5:
+                            if not self.waiting_to_spawn and current_session.breeding_allowed():
+                                if current_session.rng.breeding.random() < .5:
                                     attrib_boost = self.max_attribute
                                 else:
                                     attrib_boost = BaseEntity.lifeforms[collided_life_form_id].max_attribute
@@ -598,7 +929,10 @@ class BaseEntity:
                                 self.waiting_seed2 = self.get_dna(2, collided_life_form_id)
                                 self.waiting_seed3 = self.get_dna(3, collided_life_form_id)
                                 self.waiting_max_attrib_expand = attrib_boost
+                                self.waiting_partner_id = collided_life_form_id
                                 self.waiting_to_spawn = True
+                                record_event("EVENT_BREED", None, self.life_form_id, self.matrix_position_x,
+                                             self.matrix_position_y, collided_life_form_id)
 
                         else:
                             if not BaseEntity.lifeforms[collided_life_form_id].aggression_factor < \
@@ -609,6 +943,8 @@ class BaseEntity:
 
                                 if BaseEntity.lifeforms[collided_life_form_id].strength < self.strength:
                                     logger.debug('Other entity killed')
+                                    record_event("EVENT_KILL", "STAT_KILLS", self.life_form_id, self.matrix_position_x,
+                                                 self.matrix_position_y, collided_life_form_id)
 
                                     self.time_to_live_count += BaseEntity.lifeforms[
                                         collided_life_form_id].time_to_live_count
@@ -629,6 +965,8 @@ class BaseEntity:
                                 # entity it will be removed from the main loops list of entities
                                 elif BaseEntity.lifeforms[collided_life_form_id].strength > self.strength:
                                     logger.debug('Current entity killed')
+                                    record_event("EVENT_KILLED", "STAT_KILLS", self.life_form_id,
+                                                 self.matrix_position_x, self.matrix_position_y, collided_life_form_id)
 
                                     BaseEntity.lifeforms[
                                         collided_life_form_id].time_to_live_count += self.time_to_live_count
@@ -642,8 +980,11 @@ class BaseEntity:
                                 elif BaseEntity.lifeforms[collided_life_form_id].strength == self.strength:
                                     logger.debug('Entities matched, flipping coin')
 
-                                    if random.random() < .5:
+                                    if current_session.rng.breeding.random() < .5:
                                         logger.debug('Current entity killed')
+                                        record_event("EVENT_KILLED", "STAT_KILLS", self.life_form_id,
+                                                     self.matrix_position_x, self.matrix_position_y,
+                                                     collided_life_form_id)
                                         BaseEntity.lifeforms[
                                             collided_life_form_id].time_to_live_count += self.time_to_live_count
                                         BaseEntity.lifeforms[collided_life_form_id].material += self.material
@@ -655,6 +996,9 @@ class BaseEntity:
 
                                     else:
                                         logger.debug('Other entity killed')
+                                        record_event("EVENT_KILL", "STAT_KILLS", self.life_form_id,
+                                                     self.matrix_position_x, self.matrix_position_y,
+                                                     collided_life_form_id)
                                         self.time_to_live_count += BaseEntity.lifeforms[
                                             collided_life_form_id].time_to_live_count
 
@@ -672,6 +1016,8 @@ class BaseEntity:
 
                             else:
                                 logger.debug('Other entity killed')
+                                record_event("EVENT_KILL", "STAT_KILLS", self.life_form_id, self.matrix_position_x,
+                                             self.matrix_position_y, collided_life_form_id)
                                 self.time_to_live_count += BaseEntity.lifeforms[
                                     collided_life_form_id].time_to_live_count
 
@@ -692,6 +1038,8 @@ class BaseEntity:
                         if self.strength > BaseEntity.lifeforms[collided_life_form_id].strength \
                                 and self.aggression_factor < self.breed_threshold:
                             logger.debug('Entity broke down wall')
+                            record_event("EVENT_WALL_BROKEN", None, self.life_form_id, self.matrix_position_x,
+                                         self.matrix_position_y, collided_life_form_id)
                             self.add_coord_good_memory(self.matrix_position_x, self.matrix_position_y)
                             if BaseEntity.lifeforms[collided_life_form_id].material > 10 \
                                     and BaseEntity.lifeforms[collided_life_form_id].material >= self.mining_strength:
@@ -708,68 +1056,33 @@ class BaseEntity:
                                 BaseEntity.lifeforms[collided_life_form_id].entity_remove()
                         else:
                             logger.debug('Entity hit wall')
+                            record_event("EVENT_WALL_HIT", None, self.life_form_id, self.matrix_position_x,
+                                         self.matrix_position_y, collided_life_form_id)
                             collision_check = True
             else:
                 collision_check = False
 
             if collision_check == "Died":
                 return collision_check
-            elif not collision_check:
-                world_space_access.del_world_space_item(
-                    (self.matrix_position_x, self.matrix_position_y))
+            elif not collision_check and grouped:
+                # a kill only clears one cell of the footprint, so the group only moves if the whole of it is now clear
+                if not collision_detected or \
+                        not BaseEntity.groups.footprint_collision(self.life_form_id, self.direction)[0]:
+                    BaseEntity.groups.translate(self.life_form_id, self.direction)
 
-                if self.direction == 'move_up':
-                    self.matrix_position_y -= 1
-                    self.momentum -= 2
-
-                if self.direction == 'move_down':
-                    self.matrix_position_y += 1
-                    if current_session.gravity_on:
-                        self.momentum += 1
-                    else:
-                        self.momentum -= 2
-
-                if self.direction == 'move_left':
-                    self.matrix_position_x -= 1
-                    self.momentum -= 2
-
-                if self.direction == 'move_right':
-                    self.matrix_position_x += 1
-                    self.momentum -= 2
-
-                if self.direction == 'move_up_and_right':
-                    self.matrix_position_y -= 1
-                    self.matrix_position_x += 1
-                    self.momentum -= 2
-
-                if self.direction == 'move_up_and_left':
-                    self.matrix_position_y -= 1
-                    self.matrix_position_x -= 1
-                    self.momentum -= 2
-
-                if self.direction == 'move_down_and_right':
-                    self.matrix_position_y += 1
-                    self.matrix_position_x += 1
-                    if current_session.gravity_on:
-                        self.momentum += 1
-                    else:
-                        self.momentum -= 2
-
-                if self.direction == 'move_down_and_left':
-                    self.matrix_position_y += 1
-                    self.matrix_position_x -= 1
-                    if current_session.gravity_on:
+                    if self.direction.startswith('move_down') and current_session.gravity_on:
                         self.momentum += 1
-                    else:
+                    elif not self.direction == 'still':
                         self.momentum -= 2
 
-                if self.direction == 'still':
-                    pass
+                    self.momentum = max(0, min(self.momentum, 100))
+            elif not collision_check and not follower:
+                world_space_access.del_world_space_item(
+                    (self.matrix_position_x, self.matrix_position_y))
 
-                if self.momentum <= 0:
-                    self.momentum = 0
-                elif self.momentum >= 100:
-                    self.momentum = 100
+                self.matrix_position_x, self.matrix_position_y, self.momentum = movement.apply_direction(
+                    self.matrix_position_x, self.matrix_position_y, current_session.direction_codes[self.direction],
+                    self.momentum, current_session.gravity_on)
 
                 # write new position in the buffer
                 world_space_access.write_to_world_space(
@@ -780,52 +1093,26 @@ class BaseEntity:
             # the breeding will attempt only if the current life form count is not above the
             # population limit
             if self.waiting_to_spawn or self.waiting_to_build:
-                if current_session.current_life_form_amount < args.pop_limit:
+                if current_session.current_life_form_amount < current_session.get_population_limit(args.pop_limit):
                     # find a place for the new entity to spawn around the current parent life form
 
-                    if preferred_direction == 'get_position_right':
-                        self.adj_position = self.matrix_position_x + 1, self.matrix_position_y
-                        if self.adj_position not in current_session.coord_map:
-                            self.adj_position = None
-                    elif preferred_direction == 'get_position_left':
-                        self.adj_position = self.matrix_position_x - 1, self.matrix_position_y
-                        if self.adj_position not in current_session.coord_map:
-                            self.adj_position = None
-                    elif preferred_direction == 'get_position_down':
-                        self.adj_position = self.matrix_position_x, self.matrix_position_y + 1
-                        if self.adj_position not in current_session.coord_map:
-                            self.adj_position = None
-                    elif preferred_direction == 'get_position_up':
-                        self.adj_position = self.matrix_position_x, self.matrix_position_y - 1
-                        if self.adj_position not in current_session.coord_map:
-                            self.adj_position = None
-                    elif preferred_direction == 'get_position_down_and_right':
-                        self.adj_position = self.matrix_position_x + 1, self.matrix_position_y + 1
-                        if self.adj_position not in current_session.coord_map:
-                            self.adj_position = None
-                    elif preferred_direction == 'get_position_up_and_left':
-                        self.adj_position = self.matrix_position_x - 1, self.matrix_position_y - 1
-                        if self.adj_position not in current_session.coord_map:
-                            self.adj_position = None
-                    elif preferred_direction == 'get_position_down_and_left':
-                        self.adj_position = self.matrix_position_x - 1, self.matrix_position_y + 1
-                        if self.adj_position not in current_session.coord_map:
-                            self.adj_position = None
-                    elif preferred_direction == 'get_position_up_and_right':
-                        self.adj_position = self.matrix_position_x + 1, self.matrix_position_y - 1
-                        if self.adj_position not in current_session.coord_map:
-                            self.adj_position = None
+                    adj_x, adj_y, probe_result, occupant_id = movement.probe_direction(
+                        self.matrix_position_x, self.matrix_position_y,
+                        current_session.surrounding_point_codes[preferred_direction],
+                        world_space_access.occupancy if movement.jit else world_space_access.world_space,
+                        world_space_access.width, world_space_access.height)
 
-                    if self.adj_position:
-                        try:
-                            world_space_access.get_from_world_space(self.adj_position)[1]
-                        except TypeError:
-                            post_x_gen, post_y_gen = self.adj_position
-
-                        else:
+                    if probe_result == OFF_BOARD:
+                        self.adj_position = None
+                    else:
+                        self.adj_position = adj_x, adj_y
 
+                    if self.adj_position:
+                        if probe_result == OCCUPIED:
                             post_x_gen, post_y_gen = None, None
                             self.waiting_to_spawn = True
+                        else:
+                            post_x_gen, post_y_gen = self.adj_position
                     else:
                         post_x_gen, post_y_gen = None, None
                         self.waiting_to_spawn = True
@@ -841,13 +1128,16 @@ class BaseEntity:
                                 start_y=post_y_gen,
                                 max_attrib_expand=self.waiting_max_attrib_expand)
 
+                            record_event("EVENT_BUILD", "STAT_WALLS_BUILT", current_session.life_form_total_count,
+                                         post_x_gen, post_y_gen, self.life_form_id)
+
                             # increase the life form total by 1
                             current_session.life_form_total_count += 1
 
                             self.material -= 10
                             self.weight -= 10
 
-                            logger.debug(f"Generated X, Y positions for new life form: {post_x_gen}, {post_y_gen}")
+                            logger.debug("Generated X, Y positions for new life form: %s, %s", post_x_gen, post_y_gen)
 
                             self.waiting_to_build = False
 
@@ -869,17 +1159,24 @@ class BaseEntity:
                             BaseEntity.lifeforms[
                                 current_session.life_form_total_count].bad_memories = self.bad_memories
 
+                            if lineage is not None:
+                                lineage.record_birth(current_session.life_form_total_count, self.life_form_id,
+                                                     self.waiting_partner_id)
+                            record_event("EVENT_BIRTH", "STAT_BIRTHS", current_session.life_form_total_count,
+                                         post_x_gen, post_y_gen, self.life_form_id)
+
                             # increase the life form total by 1
                             current_session.life_form_total_count += 1
 
-                            logger.debug(f"Generated X, Y positions for new life form: {post_x_gen}, {post_y_gen}")
+                            logger.debug("Generated X, Y positions for new life form: %s, %s", post_x_gen, post_y_gen)
 
                             self.waiting_to_spawn = False
 
                 # if the current amount of life forms on the board is at the population limit or above
                 # then do nothing
-                elif current_session.current_life_form_amount >= args.pop_limit:
-                    logger.debug(f"Max life form limit: {args.pop_limit} reached")
+                else:
+                    logger.debug("Max life form limit: %s reached",
+                                 current_session.get_population_limit(args.pop_limit))
                     self.waiting_to_spawn = True
                     self.waiting_to_build = True
 
@@ -887,65 +1184,52 @@ class BaseEntity:
 
                 # minus 1 from the time to move count until it hits 0, at which point the entity will change
                 # direction from the "randomise direction" function being called
-                if not self.linked_up:
-                    self.best_coord_memory = self.get_highest_coord_good_memory()
-
-                    if self.best_coord_memory:
-                        if self.matrix_position_x < self.best_coord_memory[0] and self.matrix_position_y > \
-                                self.best_coord_memory[1]:
-                            self.direction = 'move_up_and_right'
-                        elif self.matrix_position_x < self.best_coord_memory[0] and self.matrix_position_y < \
-                                self.best_coord_memory[1]:
-                            self.direction = 'move_down_and_right'
-                        elif self.matrix_position_x > self.best_coord_memory[0] and self.matrix_position_y > \
-                                self.best_coord_memory[1]:
-                            self.direction = 'move_up_and_left'
-                        elif self.matrix_position_x > self.best_coord_memory[0] and self.matrix_position_y < \
-                                self.best_coord_memory[1]:
-                            self.direction = 'move_down_and_left'
-                        elif self.matrix_position_x < self.best_coord_memory[0]:
-                            self.direction = 'move_right'
-                        elif self.matrix_position_x > self.best_coord_memory[0]:
-                            self.direction = 'move_left'
-                        elif self.matrix_position_y > self.best_coord_memory[1]:
-                            self.direction = 'move_up'
-                        elif self.matrix_position_y < self.best_coord_memory[1]:
-                            self.direction = 'move_down'
-                        else:
-                            self.remove_coord_good_memory(self.matrix_position_x, self.matrix_position_y)
-                            self.direction = self.preferred_direction
+                self.best_coord_memory = self.get_highest_coord_good_memory()
+
+                if self.best_coord_memory:
+                    if self.matrix_position_x < self.best_coord_memory[0] and self.matrix_position_y > \
+                            self.best_coord_memory[1]:
+                        self.direction = 'move_up_and_right'
+                    elif self.matrix_position_x < self.best_coord_memory[0] and self.matrix_position_y < \
+                            self.best_coord_memory[1]:
+                        self.direction = 'move_down_and_right'
+                    elif self.matrix_position_x > self.best_coord_memory[0] and self.matrix_position_y > \
+                            self.best_coord_memory[1]:
+                        self.direction = 'move_up_and_left'
+                    elif self.matrix_position_x > self.best_coord_memory[0] and self.matrix_position_y < \
+                            self.best_coord_memory[1]:
+                        self.direction = 'move_down_and_left'
+                    elif self.matrix_position_x < self.best_coord_memory[0]:
+                        self.direction = 'move_right'
+                    elif self.matrix_position_x > self.best_coord_memory[0]:
+                        self.direction = 'move_left'
+                    elif self.matrix_position_y > self.best_coord_memory[1]:
+                        self.direction = 'move_up'
+                    elif self.matrix_position_y < self.best_coord_memory[1]:
+                        self.direction = 'move_down'
                     else:
-                        if self.time_to_move_count > 0:
-                            self.time_to_move_count -= 1
-                        elif self.time_to_move_count <= 0:
-                            self.time_to_move_count = self.time_to_move
-                            if not self.direction == self.preferred_direction:
-                                self.direction = self.preferred_direction
-                            else:
-                                self.direction = random.choice(current_session.directions)
+                        self.remove_coord_good_memory(self.matrix_position_x, self.matrix_position_y)
+                        self.direction = self.preferred_direction
                 else:
-                    # if combining is enabled set to the direction of the linked entity, however the other entity may
-                    # have expired and weird things happen, and it may not be accessible from within the class holder
-                    # so just randomise direction and de-link
-                    try:
-                        self.direction = BaseEntity.lifeforms[self.linked_to].direction
-                    except KeyError:
-                        self.linked_up = False
+                    if self.time_to_move_count > 0:
+                        self.time_to_move_count -= 1
+                    elif self.time_to_move_count <= 0:
+                        self.time_to_move_count = self.time_to_move
                         if not self.direction == self.preferred_direction:
                             self.direction = self.preferred_direction
                         else:
-                            self.direction = random.choice(current_session.directions)
+                            self.direction = current_session.rng.movement.choice(current_session.directions)
 
             if self.strength < self.weight:
                 self.direction = 'still'
 
-            if current_session.gravity_on and (self.strength < self.weight or self.direction == 'still'
-                                               or self.momentum <= 0):
+            # single entities are dropped to where they land by the batched gravity pass, groups fall as one body
+            if current_session.gravity_on and grouped and self.affected_by_gravity():
                 self.direction = 'move_down'
-                logger.debug(f"Moved from gravity")
+                logger.debug("Moved from gravity")
 
         except KeyError:
-            logger.debug(f"Missing entity: {self.life_form_id}")
+            logger.debug("Missing entity: %s", self.life_form_id)
             try:
                 BaseEntity.lifeforms[collided_life_form_id].entity_remove()
             except KeyError:
@@ -963,7 +1247,13 @@ class BaseEntity:
         self.alive = False
         current_session.last_removal = self.life_form_id
         del BaseEntity.lifeforms[self.life_form_id]
-        logger.debug(f"Entity {self.life_form_id} removed")
+        BaseEntity.groups.remove(self.life_form_id)
+        if lineage is not None:
+            lineage.record_death(self.life_form_id)
+        # walls being removed aren't deaths
+        record_event("EVENT_REMOVED", None if self.wall else "STAT_DEATHS", self.life_form_id, self.matrix_position_x,
+                     self.matrix_position_y)
+        logger.debug("Entity %s removed", self.life_form_id)
 
     def fade_entity(self):
         """
@@ -978,8 +1268,9 @@ class BaseEntity:
 
 
 class Wall(BaseEntity):
-    def __init__(self, life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand=0):
-        super().__init__(life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand)
+    def __init__(self, life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand=0, traits=None,
+                 register=True):
+        super().__init__(life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand, traits, register)
 
         # todo: it seems this is calling the superclass in a way that allows for lifeforms to be spawned when a wall
         #  is meant ot be spawned, need to figure out the mechanics of this (more of a feature than a bug)
@@ -1007,10 +1298,11 @@ class Wall(BaseEntity):
             self.blue_color = self.wall_color_int
 
         # write new position in the buffer
-        world_space_access.write_to_world_space(
-            (self.matrix_position_x, self.matrix_position_y),
-            (self.red_color, self.green_color,
-             self.blue_color), self.life_form_id)
+        if register:
+            world_space_access.write_to_world_space(
+                (self.matrix_position_x, self.matrix_position_y),
+                (self.red_color, self.green_color,
+                 self.blue_color), self.life_form_id)
 
     def process(self):
         # todo: add in the possibility for radiation to cause a wall to turn into a life form
@@ -1018,12 +1310,13 @@ class Wall(BaseEntity):
 
 
 class Resource(BaseEntity):
-    def __init__(self, life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand=0):
-        super().__init__(life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand)
+    def __init__(self, life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand=0, traits=None,
+                 register=True):
+        super().__init__(life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand, traits, register)
 
         self.wall = True
 
-        self.material = floor(self.max_attribute * random.random())
+        self.material = floor(self.max_attribute * current_session.rng.placement.random())
 
         if not args.fixed_function:
             self.red_color = 0.95
@@ -1041,25 +1334,19 @@ class Resource(BaseEntity):
             self.blue_color = 0
 
         # write new position in the buffer
-        world_space_access.write_to_world_space(
-            (self.matrix_position_x, self.matrix_position_y),
-            (self.red_color, self.green_color,
-             self.blue_color), self.life_form_id)
-
-        world_space_access.write_to_world_space(
-            (self.matrix_position_x + 1, self.matrix_position_y),
-            (self.red_color, self.green_color,
-             self.blue_color), self.life_form_id)
-
-        world_space_access.write_to_world_space(
-            (self.matrix_position_x, self.matrix_position_y + 1),
-            (self.red_color, self.green_color,
-             self.blue_color), self.life_form_id)
+        if register:
+            [world_space_access.write_to_world_space(coord, (self.red_color, self.green_color, self.blue_color),
+                                                     self.life_form_id) for coord in self.world_space_cells()]
 
-        world_space_access.write_to_world_space(
-            (self.matrix_position_x + 1, self.matrix_position_y + 1),
-            (self.red_color, self.green_color,
-             self.blue_color), self.life_form_id)
+    def world_space_cells(self):
+        """
+        Resources take up a 2x2 block of the board.
+        :return:
+        """
+        return [(self.matrix_position_x, self.matrix_position_y),
+                (self.matrix_position_x + 1, self.matrix_position_y),
+                (self.matrix_position_x, self.matrix_position_y + 1),
+                (self.matrix_position_x + 1, self.matrix_position_y + 1)]
 
     def process(self):
         # todo: add in the possibility for radiation to cause a wall to turn into a life form
@@ -1067,126 +1354,9 @@ class Resource(BaseEntity):
 
 
 class LifeForm(BaseEntity):
-    def __init__(self, life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand=0):
-        super().__init__(life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand)
-
-
-class DrawObjects(ScreenDrawer):
-
-    def __init__(self, output_controller, buffer_refresh, session_info, world_space, exit_text):
-        super().__init__(output_controller=output_controller,
-                         buffer_refresh=buffer_refresh,
-                         session_info=session_info,
-                         world_space=world_space,
-                         exit_text=exit_text)
-
-        self.frame_buffer_access = FrameBufferInit(self.session_info)
-
-        self.render_stack = [
-            'background_shader_pass',
-            'object_colour_pass',
-            'removed_object_colour_pass',
-            'fade_entity_pass',
-            'tone_map_pass',
-            'render_frame_buffer',
-            'float_to_rgb_pass',
-            'buffer_scan',
-            'flush_buffer'
-        ]
-
-        # cool effect, ensure a background shader is active and configured
-        # self.render_stack = [
-        #     'background_shader_pass',
-        #     'lighting_pass',
-        #     'lensing_pass',
-        #     'object_colour_pass',
-        #     'removed_object_colour_pass',
-        #     'fade_entity_pass',
-        #     'log_current_frame',
-        #     'tone_map_pass',
-        #     'render_frame_buffer',
-        #     'float_to_rgb_pass',
-        #     'buffer_scan',
-        #     'flush_buffer'
-        # ]
-
-        # with lens flares and lighting
-        # self.render_stack = [
-        #     'background_shader_pass',
-        #     'object_colour_pass',
-        #     'removed_object_colour_pass',
-        #     'fade_entity_pass',
-        #     'log_current_frame',
-        #     'lighting_pass',
-        #     'tone_map_pass',
-        #     'render_frame_buffer',
-        #     'float_to_rgb_pass',
-        #     'sprite_pass',
-        #     'write_texture',
-        #     'buffer_scan',
-        #     'flush_buffer'
-        # ]
-
-        self.draw()
-
-    def fade_entity_pass(self):
-        """
-        Uses the motion blur shader to fade entities from the board.
-        :return:
-        """
-        # todo: convert this to list comprehension? and tidy it up
-        for coord, pixel in self.frame_buffer_access.removed_entity_buffer.items():
-            new_pixel = self.frame_buffer_access.motion_blur.run_shader(pixel)
-            if new_pixel:
-                self.frame_buffer_access.write_to_render_plane(coord, new_pixel)
-                self.frame_buffer_access.write_to_removed_entity_buffer(coord, new_pixel)
-
-    def removed_object_colour_pass(self):
-        """
-        Adds the removed entity buffer to the render plane.
-        :return:
-        """
-        [self.frame_buffer_access.write_to_removed_entity_buffer(coord, pixel) for coord, pixel in
-         self.world_space_access.return_world_space(2).items()]
-
-
-class FrameBufferInit(FrameBuffer):
-
-    def __init__(self, session_info):
-        super().__init__(session_info=session_info)
-
-        self.blank_pixel = (0.0, 0.0, 0.0)
-
-        self.removed_entity_buffer = {}
-
-        # WARNING: be careful with these, it can cause flashing images
-        # self.shader_stack.multi_shader_creator(input_shader=FullScreenPatternShader, number_of_shaders=4, base_number=3,
-        #                                        base_addition=16, base_rgb=(1.25, 0.0, 0.0))
-        # self.shader_stack.add_to_shader_stack(
-        #     FullScreenPatternShader(count_number_max=445, shader_colour=(0.0, 1.25, 0.0)))
-        # self.shader_stack.add_to_shader_stack(
-        #     FullScreenPatternShader(count_number_max=31, shader_colour=(0.0, 0.0, 1.25)))
-
-        # self.shader_stack.add_to_shader_stack(
-        #     FullScreenPatternShader(count_number_max=7, shader_colour=(0.7, 0.05, 0.001)))
-
-        self.motion_blur.shader_colour = (0.0, 0.0, 0.0)
-        self.motion_blur.static_shader_alpha = 0.9
-        self.motion_blur.float_clip_min = 0.001
-
-        self.lighting.shader_colour = (10.0, 10.0, 10.0)
-        self.lighting.light_strength = 10.0
-        self.lighting.moving_light = False
-        self.lighting.light_position = (32, 32)
-
-    def write_to_removed_entity_buffer(self, pixel_coord, pixel_rgb):
-        """
-        Writes to the removed entity buffer.
-        :param pixel_coord:
-        :param pixel_rgb:
-        :return:
-        """
-        self.removed_entity_buffer[pixel_coord] = pixel_rgb
+    def __init__(self, life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand=0, traits=None,
+                 register=True):
+        super().__init__(life_form_id, seed, seed2, seed3, start_x, start_y, max_attrib_expand, traits, register)
 
 
 def on_press(key):
@@ -1196,22 +1366,40 @@ def on_press(key):
     :return:
     """
     from pynput.keyboard import KeyCode
+    # commands are queued up and applied by the logic loop between ticks, rather than on the keyboard listener thread
     if key == KeyCode(char='T'):
-        thanos_snap()
+        command_queue.submit('thanos_snap')
     if key == KeyCode(char='G'):
-        gravity_switch()
+        command_queue.submit('gravity_switch')
     if key == KeyCode(char='F'):
-        render_switch()
+        command_queue.submit('render_switch')
     if key == KeyCode(char='R'):
-        increase_max_radiation()
+        command_queue.submit('increase_max_radiation')
     if key == KeyCode(char='r'):
-        decrease_max_radiation()
+        command_queue.submit('decrease_max_radiation')
     if key == KeyCode(char='S'):
-        show_current_session_stats()
-    # if key == KeyCode(char='Q'):
-    #     save_space_time()
-    # if key == KeyCode(char='A'):
-    #     load_space_time()
+        command_queue.submit('show_current_session_stats')
+    if viewport is not None:
+        from pynput.keyboard import Key
+        camera_pans = {Key.left: {'dx': -1, 'dy': 0}, Key.right: {'dx': 1, 'dy': 0}, Key.up: {'dx': 0, 'dy': -1},
+                       Key.down: {'dx': 0, 'dy': 1}}
+        if key in camera_pans:
+            command_queue.submit('pan', camera_pans[key])
+        if key == KeyCode(char='+'):
+            command_queue.submit('zoom', {'scale': viewport.scale - 1})
+        if key == KeyCode(char='-'):
+            command_queue.submit('zoom', {'scale': viewport.scale + 1})
+        if key == KeyCode(char='O'):
+            command_queue.submit('overview')
+    if key == KeyCode(char='Q'):
+        command_queue.submit('checkpoint')
+    if key == KeyCode(char='A'):
+        command_queue.submit('restore_checkpoint')
+    if history is not None:
+        if key == KeyCode(char='B'):
+            command_queue.submit('step_back')
+        if key == KeyCode(char='P'):
+            command_queue.submit('resume')
 
 
 def global_board_generator():
@@ -1226,28 +1414,83 @@ def global_board_generator():
         # if no free space is found return None
         return None
 
-    logger.debug(f"Free space around the entity found: {random_free_coord}")
+    logger.debug("Free space around the entity found: %s", random_free_coord)
     # if no other entity is in this location return the co-ords
     return random_free_coord[0], random_free_coord[1]
 
 
-def percentage(percent, whole):
+def gravity_pass():
     """
-    Calculate a percentage of a whole number.
-    :param percent:
-    :param whole:
+    Drops every single entity that gravity is acting on straight down to where it lands, column by column in one
+    sweep of the board; walls, resources, combined groups and entities that are not falling all act as supports.
+    Entities gain momentum for every cell they fall, as they would moving down with gravity on.
     :return:
     """
-    return int(round(percent * whole) / 100.0)
+    falling_entities = {}
+    for entity in BaseEntity.lifeforms.values():
+        if entity.wall or entity.life_form_id in BaseEntity.groups.parent:
+            continue
+        if entity.affected_by_gravity():
+            falling_entities[entity.life_form_id] = entity
+
+    if not falling_entities:
+        return
 
+    falling_columns = {entity.matrix_position_x for entity in falling_entities.values()}
+
+    columns = {}
+    for coord, pixel in world_space_access.world_space.copy().items():
+        if coord[0] in falling_columns:
+            columns.setdefault(coord[0], []).append((coord[1], pixel[1]))
+
+    moves = []
+    landed_entities = []
+    for x, column in columns.items():
+        # work up from the bottom of the column, each falling entity lands on top of whatever is below it; within a
+        # tile entities can fall into the row below it, to be handed on to the tile underneath
+        support_y = min(current_session.region[3] + 1, world_space_access.height)
+        for y, entity_id in sorted(column, reverse=True):
+            if entity_id in falling_entities:
+                support_y -= 1
+                if support_y != y:
+                    moves.append(((x, y), (x, support_y)))
+                landed_entities.append((falling_entities[entity_id], support_y - y))
+            else:
+                support_y = y
 
-def get_random():
-    """
-    Get a pseudo random number.
-    :return:
-    """
+    world_space_access.move_world_space_items(moves)
+
+    for entity, fall_distance in landed_entities:
+        entity.matrix_position_y += fall_distance
+        entity.momentum = min(entity.momentum + fall_distance, 100)
+
+        # hitting the ground bounces the entity off in another direction, unless it is too heavy to move at all
+        if not entity.strength < entity.weight:
+            if not entity.direction == entity.preferred_direction:
+                entity.direction = entity.preferred_direction
+            else:
+                entity.direction = current_session.rng.movement.choice(current_session.directions)
+
+    logger.debug("Gravity moved %d entities", len(moves))
+
+
+def percentage(percent, whole):
+    """
+    Calculate a percentage of a whole number.
+    :param percent:
+    :param whole:
+    :return:
+    """
+    return int(round(percent * whole) / 100.0)
+
+
+def get_random():
+    """
+    Get a pseudo random number.
+    :return:
+    """
     # todo: add in some sort of fibonacci sequence stuff in here?
-    return random.getrandbits(500)
+    return current_session.rng.genome.getrandbits(500)
 
 
 def thanos_snap():
@@ -1258,7 +1501,7 @@ def thanos_snap():
     life_form_instances = [i for i in BaseEntity.lifeforms.values() if isinstance(i, LifeForm)]
 
     for x in range(int(len(life_form_instances) / 2)):
-        vanished = random.choice(life_form_instances)
+        vanished = current_session.rng.breeding.choice(life_form_instances)
         try:
             LifeForm.lifeforms[vanished.life_form_id].fade_entity()
         except KeyError:
@@ -1273,6 +1516,7 @@ def gravity_switch():
     """
     current_session.gravity_on = not current_session.gravity_on
     logger.info(f"Gravity is now {current_session.gravity_on}")
+    return current_session.gravity_on
 
 
 def render_switch():
@@ -1282,6 +1526,7 @@ def render_switch():
     """
     current_session.rendering_on = not current_session.rendering_on
     logger.info(f"Rendering is now {current_session.rendering_on}")
+    return current_session.rendering_on
 
 
 def increase_max_radiation():
@@ -1310,6 +1555,142 @@ def decrease_max_radiation():
         logger.info(f"Radiation level decreased to {current_session.radiation}")
 
 
+def get_current_session_stats():
+    """
+    Get the current stats of the session
+    :return:
+    """
+    stats = {
+        "current_session_start_time": current_session.current_session_start_time,
+        "highest_concurrent_lifeforms": current_session.highest_concurrent_lifeforms,
+        "building_entities": current_session.building_entities,
+        "max_enemy_factor": current_session.max_enemy_factor,
+        "wall_chance_multiplier": current_session.wall_chance_multiplier,
+        "draw_trails": current_session.draw_trails,
+        "retries": current_session.retries,
+        "radiation_change": current_session.radiation_change,
+        "radiation": current_session.radiation,
+        "radiation_curve": current_session.radiation_curve,
+        "radiation_base_change_chance": current_session.radiation_base_change_chance,
+        "dna_chaos_chance": current_session.dna_chaos_chance,
+        "max_attribute": current_session.max_attribute,
+        "radiation_max": current_session.radiation_max,
+        "gravity_on": current_session.gravity_on,
+        "rendering_on": current_session.rendering_on,
+        "max_movement": current_session.max_movement,
+        "last_removal": current_session.last_removal,
+        "current_life_form_amount": current_session.current_life_form_amount,
+        "life_form_total_count": current_session.life_form_total_count,
+        "process_loop_on": current_session.process_loop_on,
+        "tick_rate": current_session.tick_rate,
+        "population_limit": args.pop_limit,
+        "world_time": world_space_access.world_time,
+        "random_seed": current_session.rng.seed,
+    }
+
+    if island is not None:
+        stats["islands"] = island.island_reports
+
+    if lineage is not None:
+        stats.update(lineage.get_stats())
+
+    if tracer is not None:
+        stats.update(tracer.get_stats())
+
+    if history is not None:
+        stats.update(history.get_stats())
+
+    if soak_monitor is not None:
+        stats.update(soak_monitor.get_stats())
+
+    if stats_store is not None:
+        stats.update(stats_store.get_stats())
+
+    if population_exporter is not None:
+        stats.update(population_exporter.get_stats())
+
+    if governor is not None:
+        stats.update(governor.get_stats())
+
+    if renderer is not None:
+        stats["render_pass_ms"] = renderer.get_pass_times()
+
+    if viewport is not None:
+        stats["camera"] = viewport.get_state()
+
+    if args.hat_edition == "MULTI":
+        stats["screens"] = screen_controller.screen.get_stats()
+
+    if screen_controller.frame_recorder is not None:
+        stats["frames_recorded"] = screen_controller.frame_recorder.frames_recorded
+        stats["frames_dropped"] = screen_controller.frame_recorder.frames_dropped
+
+    return stats
+
+
+# parameters that can be changed while the simulation is running, held in the session or in the arguments
+SESSION_PARAMETERS = ('radiation', 'radiation_max', 'radiation_change', 'radiation_base_change_chance',
+                      'dna_chaos_chance', 'gravity_on', 'rendering_on', 'building_entities', 'max_enemy_factor',
+                      'wall_chance_multiplier', 'draw_trails', 'retries', 'tick_rate')
+ARGUMENT_PARAMETERS = ('pop_limit', 'radiation_dmg_multi', 'combine_mode')
+
+
+def set_parameter(name, value):
+    """
+    Change a session parameter, or one of the parameters held in the arguments, while the simulation is running
+    :param name:
+    :param value:
+    :return:
+    """
+    if name in SESSION_PARAMETERS:
+        target = current_session
+    elif name in ARGUMENT_PARAMETERS:
+        target = args
+    else:
+        raise ValueError(f"Unknown parameter: {name}")
+
+    # keep the parameter's type, so JSON numbers can set floats and ints alike, but only take true or false for
+    # switches and only numbers for numbers, rather than coercing strings
+    current_value = getattr(target, name)
+    if isinstance(current_value, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"Parameter {name} must be true or false, not {value!r}")
+    elif isinstance(current_value, (int, float)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Parameter {name} must be a number, not {value!r}")
+        if isinstance(current_value, int) and value != int(value):
+            raise ValueError(f"Parameter {name} must be a whole number, not {value!r}")
+        value = type(current_value)(value)
+
+    if name == 'tick_rate' and value <= 0:
+        raise ValueError("Tick rate must be above 0")
+
+    setattr(target, name, value)
+    logger.info(f"Parameter {name} set to {value}")
+    return value
+
+
+def set_tick_rate(tick_rate):
+    """
+    Change the number of ticks per second the logic loop runs at when it is synced
+    :param tick_rate:
+    :return:
+    """
+    return set_parameter('tick_rate', tick_rate)
+
+
+def advance_world_time():
+    """
+    Move the world on by a tick at the end of each tick of the logic loop, changing the radiation along its curve if
+    radiation change is on; it is read from the session each tick so it can be switched while running
+    :return:
+    """
+    if current_session.radiation_change:
+        current_session.adjust_radiation_along_curve()
+
+    world_space_access.world_time += 1
+
+
 def show_current_session_stats():
     """
     Show the current stats of the session
@@ -1339,85 +1720,683 @@ def show_current_session_stats():
     logging.info(f"Process loop on: {current_session.process_loop_on}\n")
 
 
+def get_space_time():
+    """
+    Get the space time that captures and restores the whole state of the simulation, it is only set up the first time
+    it is needed, so time_travel is only imported for checkpoints or when time travel is on
+    :return:
+    """
+    global space_time
+    if space_time is None:
+        from time_travel import SpaceTime
+        space_time = SpaceTime(world_space_access, current_session, BaseEntity,
+                               {"LifeForm": LifeForm, "Wall": Wall, "Resource": Resource})
+    return space_time
+
+
 def save_space_time():
-    world_space_access.world_space_time['save'] = current_session, BaseEntity.lifeforms.copy()
+    """
+    Save a checkpoint of the whole state of the simulation in memory, which load_space_time puts back
+    :return:
+    """
+    from time_travel import pack
+
+    keyframe = get_space_time().capture()
+    world_space_access.world_space_time['save'] = pack(keyframe)[0]
     logger.info("Saved space time")
+    return {"tick": keyframe["tick"]}
 
 
 def load_space_time():
-    # todo: WIP, needs fixing and finishing
-    # world_space_access.world_space_time[
-    #     world_space_access.world_time] = LifeForm.lifeforms.copy().values(), current_session
-
-    # current_session = world_space_access.world_space_time['save'][0]
-    # LifeForm.lifeforms = world_space_access.world_space_time['save'][1]
-    # print(current_session)
-    # print(world_space_access.world_space_time['save'][0])
-
-    # print(world_space_access.world_space_time['save'][0])
-
-    # current_session = world_space_access.world_space_time['save'][0]
-    # world_space_access.erase_world_space()
-
-    current_session.process_loop_on = False
-
-    current_session.highest_concurrent_lifeforms = world_space_access.world_space_time['save'][
-        0].highest_concurrent_lifeforms
-    current_session.max_enemy_factor = world_space_access.world_space_time['save'][0].max_enemy_factor
-    current_session.draw_trails = world_space_access.world_space_time['save'][0].draw_trails
-    current_session.radiation_change = world_space_access.world_space_time['save'][0].radiation_change
-    current_session.radiation = world_space_access.world_space_time['save'][0].radiation
-    current_session.radiation_base_change_chance = world_space_access.world_space_time['save'][
-        0].radiation_base_change_chance
-    current_session.dna_chaos_chance = world_space_access.world_space_time['save'][0].dna_chaos_chance
-    current_session.max_attribute = world_space_access.world_space_time['save'][0].max_attribute
-    current_session.radiation_max = world_space_access.world_space_time['save'][0].radiation_max
-    current_session.gravity_on = world_space_access.world_space_time['save'][0].gravity_on
-    current_session.rendering_on = world_space_access.world_space_time['save'][0].rendering_on
-    current_session.last_removal = world_space_access.world_space_time['save'][0].last_removal
-    current_session.current_life_form_amount = world_space_access.world_space_time['save'][0].current_life_form_amount
-    current_session.life_form_total_count = world_space_access.world_space_time['save'][0].life_form_total_count
-
-    print(len(BaseEntity.lifeforms))
-    print(len(world_space_access.world_space_time['save'][1]))
-    BaseEntity.lifeforms = {}
-    world_space_access.erase_world_space()
-    print(len(BaseEntity.lifeforms))
-    BaseEntity.lifeforms = world_space_access.world_space_time['save'][1]
+    """
+    Put the simulation back to the checkpoint saved by save_space_time, the history after the checkpoint is forgotten
+    if it is being kept
+    :return:
+    """
+    if 'save' not in world_space_access.world_space_time:
+        raise ValueError("No space time saved")
+
+    from time_travel import unpack
+
+    get_space_time().restore(unpack(world_space_access.world_space_time['save']))
+    if history is not None:
+        history.branch()
     logger.info("Loaded space time")
-    print(len(BaseEntity.lifeforms))
+    return {"tick": world_space_access.world_time}
+
+
+def get_world_frame():
+    """
+    Get the current world space as a frame of RGB24 bytes, row by row from the top left, for the frame streamer. The
+    frame is drawn from the world space's grids, which are indexed x, y, so they are transposed onto it.
+    :return: width, height and the frame
+    """
+    import numpy as np
+
+    width, height = world_space_access.width, world_space_access.height
+    colour_scale = 1 if args.fixed_function else 255
+
+    frame = np.zeros((height, width, 3), dtype=np.float32)
+    np.copyto(frame, world_space_access.colours.transpose(1, 0, 2),
+              where=(world_space_access.occupancy != EMPTY).T[..., np.newaxis])
+    np.multiply(frame, colour_scale, out=frame)
+    np.clip(frame, 0, 255, out=frame)
+
+    return width, height, frame.astype(np.uint8).tobytes()
+
+
+def locate_entity(life_form_id):
+    """
+    Get where an entity is on the board, for the camera to follow it.
+    :param life_form_id:
+    :return: x, y or None if there is no such entity
+    """
+    entity = BaseEntity.lifeforms.get(life_form_id)
+    if entity is None:
+        return None
+    return entity.matrix_position_x, entity.matrix_position_y
+
+
+def count_good_memories():
+    """
+    Count the good memories held by every life form, for the soak monitor. Children share their parent's memories, so
+    each set of memories is only counted once.
+    :return:
+    """
+    memories = {id(entity.good_memories): entity.good_memories for entity in BaseEntity.lifeforms.copy().values()
+                if hasattr(entity, "good_memories")}
+    return sum(len(good_memories) for good_memories in memories.values())
+
+
+def record_event(event, stat, entity_id, x, y, other_id=None):
+    """
+    Records an event with the tick tracer and counts it in the stats store, whichever of them are on. The codes are
+    looked up by name from the tick_tracer and stats_store modules, which are only imported once there is a tracer or
+    a stats store, so the codes are there however they were set.
+    :param event: name of one of tick_tracer's EVENT_ constants
+    :param stat: name of one of stats_store's STAT_ constants, None if the event isn't counted
+    :param entity_id:
+    :param x:
+    :param y:
+    :param other_id: the other entity involved in the event
+    :return:
+    """
+    if tracer is not None:
+        tracer.record(getattr(sys.modules["tick_tracer"], event), entity_id, x, y, other_id)
+    if stat is not None and stats_store is not None:
+        stats_store.count(getattr(sys.modules["stats_store"], stat))
+
+
+def count_population():
+    """
+    Count the life forms, walls and resources on the board, for the stats store.
+    :return:
+    """
+    entity_types = Counter(map(type, BaseEntity.lifeforms.copy().values()))
+    return entity_types[LifeForm], entity_types[Wall], entity_types[Resource]
+
+
+def decode_traits(genomes):
+    """
+    Decodes the traits for a batch of genomes with the current session's settings.
+    :param genomes:
+    :return:
+    """
+    return decode_genomes(genomes,
+                          max_attribute=current_session.max_attribute,
+                          max_enemy_factor=current_session.max_enemy_factor,
+                          max_movement=current_session.max_movement,
+                          wall_chance_multiplier=current_session.wall_chance_multiplier,
+                          float_colours=not args.fixed_function,
+                          directions=current_session.directions,
+                          surrounding_point_choices=current_session.surrounding_point_choices)
+
+
+def bulk_spawn(count, entity="lifeform", genomes=None, start_positions=None):
+    """
+    Spawns a number of entities of one kind at once; all the genomes are drawn and decoded as a batch, the board
+    positions are claimed together and all the new entities are registered in one go.
+    :param count:
+    :param entity: lifeform, wall or resource
+    :param genomes: life seeds to spawn the entities with, random ones are drawn if not given
+    :param start_positions: where to spawn the entities, positions are claimed from the board if not given
+    :return: the spawned entities
+    """
+    entity_classes = {"lifeform": LifeForm, "wall": Wall, "resource": Resource}
+
+    if start_positions is None:
+        start_positions = current_session.claim_board_positions(count)
+    if genomes is None:
+        genomes = [(get_random(), get_random(), get_random()) for _ in start_positions]
+    genomes = genomes[:len(start_positions)]
+    start_positions = start_positions[:len(genomes)]
+    first_life_form_id = current_session.life_form_total_count
+
+    spawned_entities = [
+        entity_classes[entity](life_form_id=first_life_form_id + index, seed=seed, seed2=seed2, seed3=seed3,
+                               start_x=start_x, start_y=start_y, traits=traits, register=False)
+        for index, ((seed, seed2, seed3), (start_x, start_y), traits) in
+        enumerate(zip(genomes, start_positions, decode_traits(genomes)))]
+
+    current_session.life_form_total_count += len(spawned_entities)
 
-    current_session.process_loop_on = True
+    BaseEntity.lifeforms.update((spawned.life_form_id, spawned) for spawned in spawned_entities)
+
+    # spawned life forms have no parents, each one founds its own clade
+    if lineage is not None and entity == "lifeform":
+        for spawned in spawned_entities:
+            lineage.record_birth(spawned.life_form_id)
+
+    world_space_access.write_many_to_world_space(
+        (coord, (spawned.red_color, spawned.green_color, spawned.blue_color), spawned.life_form_id)
+        for spawned in spawned_entities for coord in spawned.world_space_cells())
+
+    return spawned_entities
 
 
 def class_generator(life_form_id, entity="lifeform"):
     """
-    Generates a life form class based on the life form id.
+    Generates a single entity, see bulk_spawn.
     :param entity:
-    :param wall:
     :param life_form_id:
     :return:
     """
-    try:
-        starting_x, starting_y = global_board_generator()
-    except TypeError:
-        return
+    bulk_spawn(1, entity)
+
+
+class TileSimulation:
+    def __init__(self, tile_index, region, area_share):
+        """
+        Simulates one tile of a board split across worker processes. The worker is forked from the coordinator after
+        the board is populated, so it starts with every entity and removes the ones outside its tile. Entities that
+        leave the tile are handed back to the coordinator with their full state, and the cells just outside the tile
+        (its halo) hold ghosts of the neighbouring tiles' entities, which are obstacles but can't be interacted with.
+        :param tile_index:
+        :param region: the tile's region of the board, (x0, y0, x1, y1) with the end coordinates exclusive
+        :param area_share: share of the board's area the tile covers, for splitting the population between tiles
+        """
+        from tiled_world import TILE_ID_STRIDE
+
+        self.region = region
+        self.area_share = area_share
+        self.first_life_form_id = (tile_index + 1) * TILE_ID_STRIDE
 
-    if entity == "wall":
-        Wall(life_form_id=current_session.life_form_total_count, seed=get_random(), seed2=get_random(),
-             seed3=get_random(),
-             start_x=starting_x, start_y=starting_y)
-        current_session.life_form_total_count += 1
-    elif entity == "lifeform":
-        LifeForm(life_form_id=current_session.life_form_total_count, seed=get_random(), seed2=get_random(),
-                 seed3=get_random(),
-                 start_x=starting_x, start_y=starting_y)
-        current_session.life_form_total_count += 1
-    elif entity == "resource":
-        Resource(life_form_id=current_session.life_form_total_count, seed=get_random(), seed2=get_random(),
-                 seed3=get_random(),
-                 start_x=starting_x, start_y=starting_y)
-        current_session.life_form_total_count += 1
+        self.ghost_cells = []
+        self.waiting_immigrants = []
+
+        current_session.set_region(region)
+        current_session.rng = RandomStreams(f"{current_session.rng.seed}-tile-{tile_index}")
+        current_session.life_form_total_count = self.first_life_form_id
+        current_session.max_movement = diagonal_distance(0, 0, world_space_access.width, world_space_access.height)
+
+        [self.remove_from_tile(entity) for entity in list(BaseEntity.lifeforms.values())
+         if not self.in_tile(entity.matrix_position_x, entity.matrix_position_y)]
+
+    def in_tile(self, x, y):
+        """
+        Whether a board coordinate is in the tile.
+        :param x:
+        :param y:
+        :return:
+        """
+        return self.region[0] <= x < self.region[2] and self.region[1] <= y < self.region[3]
+
+    def remove_from_tile(self, entity):
+        """
+        Take an entity out of the tile without it dying.
+        :param entity:
+        :return:
+        """
+        [world_space_access.del_world_space_item(coord) for coord in entity.world_space_cells()]
+        del BaseEntity.lifeforms[entity.life_form_id]
+        BaseEntity.groups.remove(entity.life_form_id)
+
+    def place_ghosts(self, halo):
+        """
+        Replace last tick's ghosts in the halo with the neighbouring tiles' entities as they are now.
+        :param halo: list of (coord, (rgb, entity id))
+        :return:
+        """
+        for coord in self.ghost_cells:
+            pixel = world_space_access.get_from_world_space(coord)
+            if pixel and pixel[1] not in BaseEntity.lifeforms:
+                world_space_access.del_world_space_item(coord)
+
+        self.ghost_cells = [coord for coord, pixel in halo if not world_space_access.get_from_world_space(coord)]
+        world_space_access.write_many_to_world_space(
+            (coord, pixel_rgb, entity_id) for coord, (pixel_rgb, entity_id) in halo if coord in self.ghost_cells)
+
+    def free_cell_near(self, x, y):
+        """
+        Find a free cell in the tile at or next to a coordinate.
+        :param x:
+        :param y:
+        :return: the free cell, or None if there isn't one
+        """
+        for offset_x, offset_y in ((0, 0),) + tuple(current_session.direction_offsets.values()):
+            cell_x, cell_y = x + offset_x, y + offset_y
+            if self.in_tile(cell_x, cell_y) and (cell_x, cell_y) not in world_space_access.world_space:
+                return cell_x, cell_y
+        return None
+
+    def admit_immigrants(self):
+        """
+        Bring entities that moved into the tile into its world, an entity whose cell was taken in the meantime goes in
+        a free cell next to it, or waits for the next tick if there isn't one.
+        :return:
+        """
+        still_waiting = []
+
+        for entity_class, state in self.waiting_immigrants:
+            free_cell = self.free_cell_near(state['matrix_position_x'], state['matrix_position_y'])
+            if free_cell is None:
+                still_waiting.append((entity_class, state))
+                continue
+
+            entity = entity_class.__new__(entity_class)
+            entity.__dict__.update(state)
+            entity.matrix_position_x, entity.matrix_position_y = free_cell
+
+            BaseEntity.lifeforms[entity.life_form_id] = entity
+            world_space_access.write_to_world_space(free_cell, (entity.red_color, entity.green_color,
+                                                                entity.blue_color), entity.life_form_id)
+
+        self.waiting_immigrants = still_waiting
+
+    def collect_emigrants(self):
+        """
+        Take out every entity that has left the tile, to be handed on to the tile it is now in.
+        :return: list of (entity class, entity state)
+        """
+        emigrants = [entity for entity in BaseEntity.lifeforms.values()
+                     if not self.in_tile(entity.matrix_position_x, entity.matrix_position_y)]
+        [self.remove_from_tile(entity) for entity in emigrants]
+        return [(type(entity), entity.__dict__) for entity in emigrants]
+
+    def respawn(self):
+        """
+        Start the tile again with its share of the starting walls and life forms.
+        :return:
+        """
+        world_space_access.erase_world_space()
+        BaseEntity.groups.clear()
+        self.ghost_cells = []
+        self.waiting_immigrants = []
+        current_session.get_coord_map()
+        bulk_spawn(round(args.wall_number * self.area_share), "wall")
+        bulk_spawn(max(1, round(args.life_form_total * self.area_share)))
+
+    def tick(self, message):
+        """
+        Run one tick of the tile.
+        :param message: the coordinator's message for this tick
+        :return: the tile's entities for the frame, the entities that left it and its population counts
+        """
+        for name, value in message['session'].items():
+            setattr(current_session, name, value)
+        for name, value in message['arguments'].items():
+            setattr(args, name, value)
+
+        if message['respawn']:
+            self.respawn()
+
+        self.place_ghosts(message['halo'])
+        self.waiting_immigrants.extend(message['immigrants'])
+        self.admit_immigrants()
+
+        if message['snap']:
+            thanos_snap()
+
+        [life_form.process() for life_form in BaseEntity.lifeforms.copy().values()]
+
+        if current_session.gravity_on:
+            gravity_pass()
+
+        emigrants = self.collect_emigrants()
+
+        removed_cells = list(world_space_access.world_space_2.items())
+        world_space_access.world_space_2 = {}
+
+        return {
+            'cells': [(coord, pixel) for coord, pixel in world_space_access.world_space.items()
+                      if pixel[1] in BaseEntity.lifeforms],
+            'removed_cells': removed_cells,
+            'emigrants': emigrants,
+            'population': len(BaseEntity.lifeforms) + len(self.waiting_immigrants),
+            'born': current_session.life_form_total_count - self.first_life_form_id,
+        }
+
+
+def run_tile_worker(tile_index, connection):
+    """
+    Entry point of a tile worker process.
+    :param tile_index:
+    :param connection:
+    :return:
+    """
+    from tiled_world import serve_tile
+
+    tile_grid = tile_workers.tile_grid
+    tile = TileSimulation(tile_index, tile_grid.regions[tile_index], tile_grid.area_share(tile_index))
+    serve_tile(connection, tile.tick)
+
+
+class TileCoordinator:
+    def __init__(self, workers):
+        """
+        Runs a board split into tiles across worker processes; each tick it sends every tile the settings, its halo
+        and the entities moving into it, then merges the tiles' entities into the world space for the screen.
+        :param workers:
+        """
+        self.workers = workers
+        self.tile_grid = workers.tile_grid
+
+        self.immigrants = [[] for _ in self.tile_grid.regions]
+        self.snap_pending = False
+        self.respawn_pending = False
+
+        # the coordinator keeps the world space for the screen but none of the entities, they live in the workers
+        self.starting_life_form_total = current_session.life_form_total_count
+        self.born_before_respawn = 0
+        BaseEntity.lifeforms = {}
+
+    def queue_thanos_snap(self):
+        """
+        Have every tile remove half its life forms on the next tick.
+        :return:
+        """
+        self.snap_pending = True
+
+    def tile_messages(self):
+        """
+        Build each tile's message for the next tick.
+        :return:
+        """
+        session_settings = {name: getattr(current_session, name) for name in SESSION_PARAMETERS}
+        world_space = world_space_access.world_space
+
+        messages = []
+        for tile_index, halo in enumerate(self.tile_grid.halos):
+            argument_settings = {name: getattr(args, name) for name in ARGUMENT_PARAMETERS}
+            argument_settings['pop_limit'] = max(1, round(args.pop_limit * self.tile_grid.area_share(tile_index)))
+
+            messages.append({
+                'session': session_settings,
+                'arguments': argument_settings,
+                'halo': [(coord, world_space[coord]) for coord in halo if coord in world_space],
+                'immigrants': self.immigrants[tile_index],
+                'snap': self.snap_pending,
+                'respawn': self.respawn_pending,
+            })
+
+        self.snap_pending = False
+        self.respawn_pending = False
+        return messages
+
+    def run(self):
+        """
+        Coordinator loop, takes the place of main when the board is split into tiles.
+        :return:
+        """
+        current_session.max_movement = diagonal_distance(0, 0, world_space_access.width, world_space_access.height)
+        next_frame = time() + 1 / current_session.tick_rate
+        while True:
+            if time() > next_frame or not args.logic_sync:
+                command_queue.apply_pending()
+
+                results = self.workers.tick(self.tile_messages())
+
+                world_space = {}
+                self.immigrants = [[] for _ in self.tile_grid.regions]
+                for result in results:
+                    world_space.update(result['cells'])
+                    world_space_access.write_many_to_world_space(
+                        ((coord, pixel_rgb, entity_id) for coord, (pixel_rgb, entity_id) in result['removed_cells']),
+                        2)
+                    for entity_class, state in result['emigrants']:
+                        self.immigrants[self.tile_grid.tile_at(
+                            (state['matrix_position_x'], state['matrix_position_y']))].append((entity_class, state))
+
+                # the merged cells replace the world space, and the occupancy grid with them so viewports and
+                # respawns see where the entities are now
+                world_space_access.replace_world_space(world_space)
+
+                logger.debug(f"{sum(len(tile_immigrants) for tile_immigrants in self.immigrants)} entities moving "
+                             f"between tiles")
+
+                # entities on their way between tiles are still alive
+                current_session.current_life_form_amount = sum(result['population'] for result in results) + sum(
+                    len(tile_immigrants) for tile_immigrants in self.immigrants)
+                born = sum(result['born'] for result in results)
+                current_session.life_form_total_count = self.starting_life_form_total + born - self.born_before_respawn
+                if current_session.current_life_form_amount > current_session.highest_concurrent_lifeforms:
+                    current_session.highest_concurrent_lifeforms = current_session.current_life_form_amount
+
+                if not current_session.current_life_form_amount:
+                    if current_session.retries:
+                        current_session.highest_concurrent_lifeforms = 0
+                        current_session.current_session_start_time = datetime.datetime.now()
+                        self.starting_life_form_total = 0
+                        self.born_before_respawn = born
+                        self.respawn_pending = True
+                    else:
+                        logger.info(
+                            f'\n All Lifeforms have expired.\n Total life forms produced: '
+                            f'{current_session.life_form_total_count}\n '
+                            f'Max concurrent Lifeforms was: {current_session.highest_concurrent_lifeforms}\n')
+                        self.workers.stop()
+                        world_space_access.end_world_space()
+                        quit()
+
+                advance_world_time()
+
+                next_frame = time() + 1 / current_session.tick_rate
+
+
+class Island:
+    def __init__(self, island_index, links, migration_interval, migration_size):
+        """
+        One world of the island model, every island is its own process with its own board, radiation and DNA chaos
+        chance. Every migration interval a sample of the island's life forms' genomes migrates to the next island,
+        where they are spawned onto free cells of its board, replacing random life forms if the island is full.
+        :param island_index:
+        :param links:
+        :param migration_interval: ticks between migrations
+        :param migration_size: number of genomes sent each migration
+        """
+        from island_model import island_setting
+
+        self.island_index = island_index
+        self.links = links
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+
+        self.migrants_sent = 0
+        self.migrants_received = 0
+        self.migrants_dropped = 0
+        self.island_reports = {}
+
+        self.report_start = time()
+        self.report_start_tick = world_space_access.world_time
+        self.parent_process_id = os.getppid()
+
+        current_session.radiation = island_setting(args.island_radiation, island_index, current_session.radiation)
+        current_session.base_radiation = current_session.radiation
+        current_session.dna_chaos_chance = island_setting(args.island_chaos, island_index,
+                                                          current_session.dna_chaos_chance)
+
+        logger.info(f"Island {island_index}: radiation {current_session.radiation}, DNA chaos chance "
+                    f"{current_session.dna_chaos_chance}")
+
+    def repopulate(self):
+        """
+        Start a forked island's board again with its own random streams, so it doesn't begin as a copy of the first
+        island's board.
+        :return:
+        """
+        current_session.rng = RandomStreams(f"{current_session.rng.seed}-island-{self.island_index}")
+        BaseEntity.lifeforms = {}
+        BaseEntity.groups.clear()
+        if lineage is not None:
+            lineage.clear()
+        world_space_access.erase_world_space()
+        current_session.life_form_total_count = 0
+        current_session.get_coord_map()
+
+        bulk_spawn(args.resources_number, "resource")
+        bulk_spawn(args.wall_number, "wall")
+        bulk_spawn(args.life_form_total)
+
+    def admit_migrants(self):
+        """
+        Spawn the genomes that have arrived from the previous island onto free cells.
+        :return:
+        """
+        genomes = self.links.receive_migrants(self.island_index)
+        if not genomes:
+            return
+
+        # when the island is full migrants take the place of random life forms, as in the usual island model
+        room = max(0, current_session.get_population_limit(args.pop_limit) - len(BaseEntity.lifeforms))
+        if room < len(genomes):
+            residents = [entity for entity in BaseEntity.lifeforms.values() if isinstance(entity, LifeForm)]
+            for resident in current_session.rng.breeding.sample(residents, min(len(genomes) - room, len(residents))):
+                resident.entity_remove()
+
+        free_cells = [coord for coord in current_session.coord_map if coord not in world_space_access.world_space]
+        start_positions = current_session.rng.placement.sample(free_cells, min(len(genomes), len(free_cells)))
+
+        migrants = bulk_spawn(len(start_positions), genomes=genomes, start_positions=start_positions)
+        if tracer is not None:
+            for migrant in migrants:
+                record_event("EVENT_MIGRANT", None, migrant.life_form_id, migrant.matrix_position_x,
+                             migrant.matrix_position_y)
+
+        admitted = len(migrants)
+        self.migrants_received += admitted
+        self.migrants_dropped += len(genomes) - admitted
+
+    def send_migrants(self):
+        """
+        Send a sample of the island's life forms' genomes to the next island.
+        :return:
+        """
+        life_forms = [entity for entity in BaseEntity.lifeforms.values() if isinstance(entity, LifeForm)]
+        migrants = current_session.rng.breeding.sample(life_forms, min(self.migration_size, len(life_forms)))
+        if not migrants:
+            return
+
+        if self.links.send_migrants(self.island_index, [(migrant.life_seed1, migrant.life_seed2, migrant.life_seed3)
+                                                        for migrant in migrants]):
+            self.migrants_sent += len(migrants)
+        else:
+            self.migrants_dropped += len(migrants)
+
+    def report(self):
+        """
+        Send the island's population and throughput since the last report to the first island.
+        :return:
+        """
+        now = time()
+        self.links.send_report({
+            "island": self.island_index,
+            "population": len(BaseEntity.lifeforms),
+            "world_time": world_space_access.world_time,
+            "ticks_per_second": round((world_space_access.world_time - self.report_start_tick) /
+                                      max(now - self.report_start, 1e-9), 1),
+            "radiation": current_session.radiation,
+            "dna_chaos_chance": current_session.dna_chaos_chance,
+            "migrants_sent": self.migrants_sent,
+            "migrants_received": self.migrants_received,
+            "migrants_dropped": self.migrants_dropped,
+        })
+        self.report_start = now
+        self.report_start_tick = world_space_access.world_time
+
+    def log_reports(self):
+        """
+        Log the reports that have come in from every island, only the first island does this.
+        :return:
+        """
+        for island_report in self.links.receive_reports():
+            self.island_reports[island_report["island"]] = island_report
+            logger.info(f"Island {island_report['island']}: population {island_report['population']}, "
+                        f"{island_report['ticks_per_second']} ticks/s, radiation {island_report['radiation']}, "
+                        f"migrants sent {island_report['migrants_sent']}, "
+                        f"received {island_report['migrants_received']}, dropped {island_report['migrants_dropped']}")
+
+    def tick(self):
+        """
+        Called by the logic loop at the start of every tick.
+        :return:
+        """
+        # forked islands end with the first island, however it ended
+        if self.island_index and os.getppid() != self.parent_process_id:
+            quit()
+
+        self.admit_migrants()
+
+        if world_space_access.world_time % self.migration_interval == 0 and world_space_access.world_time:
+            self.send_migrants()
+            self.report()
+
+        if self.island_index == 0:
+            self.log_reports()
+
+
+def run_island(island_index):
+    """
+    Entry point of a forked island process, the island runs headless with its own logic loop.
+    :param island_index:
+    :return:
+    """
+    global island, command_queue, history, stats_store, population_exporter
+
+    island = Island(island_index, island.links, args.migration_interval, args.migration_size)
+    island.repopulate()
+    command_queue = CommandQueue({})
+
+    # islands have no control server to wind them back with or query their stats
+    history = None
+    stats_store = None
+
+    # the exporter's writer thread isn't forked with the island, only the first island exports its population
+    population_exporter = None
+
+    # each island traces its own events to its own file
+    if tracer is not None:
+        trace_name, trace_extension = os.path.splitext(tracer.dump_path)
+        tracer.clear(f"{trace_name}-island-{island_index}{trace_extension}")
+
+    main()
+
+
+class StartupTimer:
+    def __init__(self, start):
+        """
+        Times each phase of startup, so slow imports and setup on small boards show up in the logs.
+        :param start: perf_counter time startup began at
+        """
+        self.phase_start = start
+        self.phase_times = []
+
+    def phase_done(self, phase_name):
+        """
+        Record how long the phase that just finished took and start timing the next one.
+        :param phase_name:
+        :return:
+        """
+        phase_end = perf_counter()
+        self.phase_times.append((phase_name, phase_end - self.phase_start))
+        self.phase_start = phase_end
+
+    def report(self):
+        """
+        Log the time taken by each phase of startup.
+        :return:
+        """
+        logger.info(f"Startup took {sum(phase_time for _, phase_time in self.phase_times):.3f}s - " +
+                    ", ".join(f"{phase_name}: {phase_time:.3f}s" for phase_name, phase_time in self.phase_times))
 
 
 def main():
@@ -1426,25 +2405,47 @@ def main():
     then when all entities are gone it will respawn them and start again.
     :return:
     """
-    frame_refresh_delay_ms = 1 / hat_buffer_refresh_rate
     """
     Main loop where all life form movement and interaction takes place
     """
     # wrap main loop into a try/catch to allow keyboard exit and cleanup
-    current_session.max_movement = diagonal_distance(0, 0, screen_controller.u_width, screen_controller.u_height)
-    next_frame = time() + frame_refresh_delay_ms
+    current_session.max_movement = diagonal_distance(0, 0, world_space_access.width, world_space_access.height)
+    next_frame = time() + 1 / current_session.tick_rate
     while True:
         # while current_session.process_loop_on:
         # if time() > next_frame or not refresh_logic_link and current_session.world_space_access.buffer_ready:
         # for now this just checks whether the next frame time is ready or whether refresh logic is disabled
         # this allows the internal logic to operate faster than the refresh rate of the display, so it will run faster
         # but the display will always be behind resulting in entities looking like they are teleporting around
-        life_form_container = BaseEntity.lifeforms.copy().values()
         if time() > next_frame or not args.logic_sync:
+            tick_start = time()
+
+            # runtime commands from the keyboard and control server are only applied between ticks
+            command_queue.apply_pending()
+
+            # the loop is paused while the simulation is wound back
+            if not current_session.process_loop_on:
+                next_frame = time() + 1 / current_session.tick_rate
+                continue
+
+            if history is not None:
+                history.record()
+
+            if tracer is not None:
+                tracer.tick = world_space_access.world_time
+
+            if island is not None:
+                island.tick()
+
+            life_form_container = BaseEntity.lifeforms.copy().values()
+
             # check the list of entities has items within
             if life_form_container:
                 [life_form.process() for life_form in life_form_container]
 
+                if current_session.gravity_on:
+                    gravity_pass()
+
             # if the main list of entities is empty then all have expired; the program displays final information
             # about the programs run and exits; unless retry mode is active, then a new set of entities are created
             # and the simulation starts fresh with the same initial configuration
@@ -1457,9 +2458,12 @@ def main():
                     current_session.life_form_total_count = 0
                     current_session.last_removal = -1
                     current_session.get_coord_map()
+                    BaseEntity.groups.clear()
+                    if lineage is not None:
+                        lineage.clear()
                     current_session.current_session_start_time = datetime.datetime.now()
-                    [class_generator(i, "wall") for i in range(args.wall_number)]
-                    [class_generator(i) for i in range(args.life_form_total)]
+                    bulk_spawn(args.wall_number, "wall")
+                    bulk_spawn(args.life_form_total)
 
                     current_session.rendering_on = True
 
@@ -1472,17 +2476,33 @@ def main():
                     world_space_access.end_world_space()
                     quit()
 
-            logger.debug(f"Lifeforms: {current_session.life_form_total_count}")
+            logger.debug("Lifeforms: %s", current_session.life_form_total_count)
+
+            advance_world_time()
+
+            if population_exporter is not None and \
+                    world_space_access.world_time % args.population_export_interval == 0:
+                population_exporter.snapshot(world_space_access.world_time,
+                                             (entity for entity in BaseEntity.lifeforms.copy().values()
+                                              if not entity.wall))
+
+            if governor is not None:
+                governor.record_tick(time() - tick_start, current_session.current_life_form_amount, args.pop_limit)
 
-            if args.radiation_change:
-                current_session.adjust_radiation_along_curve()
+            if stats_store is not None:
+                stats_store.record_tick(world_space_access.world_time, time() - tick_start, *count_population(),
+                                        current_session.radiation)
 
-            world_space_access.world_time += 1
+            if soak_monitor is not None and soak_monitor.record_tick(world_space_access.world_time):
+                os._exit(soak_monitor.finish())
 
-            next_frame = time() + frame_refresh_delay_ms
+            next_frame = time() + 1 / current_session.tick_rate
 
 
 if __name__ == '__main__':
+    startup_timer = StartupTimer(startup_start)
+    startup_timer.phase_done("imports")
+
     parser = argparse.ArgumentParser(description='Artificial Life')
 
     parser.add_argument('-m', '--max-num', action="store", type=int, dest="max_num", default=max_trait_number,
@@ -1567,12 +2587,20 @@ if __name__ == '__main__':
                         help='Whether the loop will automatically restart upon the expiry of all entities')
 
     parser.add_argument('-sim', '--unicorn-hat-sim', action="store_true", dest="simulator", default=unicorn_simulator,
-                        help='Whether to use the Unicorn HAT simulator or not')
+                        help='Whether to simulate the Unicorn HAT in a window instead of using a real one')
 
     parser.add_argument('-hm', '--hat-model', action="store", dest="hat_edition", type=str, default=hat_model,
-                        choices=['SD', 'HD', 'MINI', 'PANEL', 'CUSTOM'],
-                        help='What type of HAT the program is using. CUSTOM '
-                             'only works with Unicorn HAT Simulator')
+                        choices=['SD', 'HD', 'MINI', 'PANEL', 'CUSTOM', 'TERMINAL', 'MULTI'],
+                        help='What type of HAT the program is using. CUSTOM only works with the pygame '
+                             'simulator (-sim), TERMINAL draws in the terminal at the '
+                             'size set by -shs, MULTI drives the screens set by -scr as one board')
+
+    parser.add_argument('-scr', '--screens', action="store", dest="screens", nargs='+', type=str,
+                        default=multi_screens,
+                        help="Screens for MULTI, each as TYPE:WIDTHxHEIGHT@X,Y or TYPE@X,Y for HATs, where X,Y is "
+                             "the screen's top left corner on the board; to use pass in "
+                             "'-scr PANEL:64x32@0,0 PANEL:64x32@64,0 HD@0,0' for two panels side by side and a "
+                             "HAT HD mirroring the corner of the first")
 
     parser.add_argument('-l', '--log-level', action="store", dest="log_level", type=str, default=logging_level,
                         choices=['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET'], help='Logging level')
@@ -1584,20 +2612,237 @@ if __name__ == '__main__':
                         help='Whether to bypass pixel composer and use fixed function '
                              'for drawing (faster, less pretty)')
 
+    parser.add_argument('-ar', '--array-renderer', action="store_true", dest="array_renderer", default=array_renderer,
+                        help='Render with whole frame numpy passes instead of pixel composer, faster on big panels '
+                             '(not used with fixed function)')
+
+    parser.add_argument('-rl', '--render-lighting', action="store_true", dest="render_lighting",
+                        default=render_lighting,
+                        help='Add per pixel lighting to the array renderer')
+
+    parser.add_argument('-rts', '--render-tile-size', action="store", dest="render_tile_size", type=int,
+                        default=render_tile_size,
+                        help='Width and height in pixels of the tiles the array renderer shades in parallel')
+
+    parser.add_argument('-rw', '--render-workers', action="store", dest="render_workers", type=int,
+                        default=render_workers,
+                        help='Threads the array renderer shades tiles on, defaults to one per core, 1 shades the '
+                             'whole frame at once, as are frames too small to gain from threads')
+
+    parser.add_argument('-ws', '--world-size', action="store", dest="world_size", nargs=2, type=int,
+                        default=world_size, metavar=('WIDTH', 'HEIGHT'),
+                        help="Size of the world if it should be bigger than the screen, the screen shows it through "
+                             "a camera that can pan, zoom and follow life forms; to use pass in '-ws 512 512'")
+
+    parser.add_argument('-ov', '--overview-mode', action="store", dest="overview_mode", type=str,
+                        default=overview_mode, choices=['average', 'density'],
+                        help='How the camera shows a zoomed out world, average shows the average colour of the life '
+                             'forms in each block of cells shown by a pixel, density dims it where they are sparse')
+
+    parser.add_argument('-cp', '--control-port', action="store", dest="control_port", type=int, default=control_port,
+                        help='Localhost TCP port for the JSON control server, which can do anything the keyboard '
+                             'can as well as query stats and change parameters')
+
+    parser.add_argument('-cs', '--control-socket', action="store", dest="control_socket", type=str,
+                        default=control_socket,
+                        help='Unix socket path for the JSON control server, used instead of a TCP port')
+
+    parser.add_argument('-sp', '--stream-port', action="store", dest="stream_port", type=int, default=stream_port,
+                        help='Port for the live frame stream, open http://HOST:PORT/ in a browser to watch')
+
+    parser.add_argument('-sh', '--stream-host', action="store", dest="stream_host", type=str, default=stream_host,
+                        help='Address the live frame stream listens on, use 0.0.0.0 to watch from other machines')
+
+    parser.add_argument('-rec', '--record', action="store", dest="record_path", type=str, default=record_path,
+                        help='Record the frames shown, to a file or pipe as raw RGB24 or to a directory as PNGs')
+
+    parser.add_argument('-rf', '--record-format', action="store", dest="record_format", type=str,
+                        default=record_format, choices=['raw', 'png'],
+                        help='Format to record frames in, raw RGB24 or a PNG sequence')
+
+    parser.add_argument('-re', '--record-every', action="store", dest="record_every", type=int,
+                        default=record_every,
+                        help='Record every nth frame shown, for time-lapses')
+
+    parser.add_argument('-tl', '--tiles', action="store", dest="tiles", nargs=2, type=int, default=tiles,
+                        metavar=('COLUMNS', 'ROWS'),
+                        help="Split the board into a grid of tiles, each simulated by its own worker process; to use "
+                             "pass in '-tl 2 2' for 4 tiles")
+
+    parser.add_argument('-is', '--islands', action="store", dest="islands", type=int, default=islands,
+                        help='Number of island worlds to evolve side by side, each in its own process, with life forms '
+                             'migrating between them; only the first island is shown on the screen')
+
+    parser.add_argument('-ir', '--island-radiation', action="store", dest="island_radiation", nargs='+', type=int,
+                        default=island_radiation,
+                        help="Starting radiation of each island; to use pass in '-ir 0 100 1000', islands past the "
+                             "end of the list start again from the beginning of it")
+
+    parser.add_argument('-ic', '--island-chaos', action="store", dest="island_chaos", nargs='+', type=int,
+                        default=island_chaos,
+                        help='DNA chaos chance of each island, used like the island radiation')
+
+    parser.add_argument('-mi', '--migration-interval', action="store", dest="migration_interval", type=int,
+                        default=migration_interval,
+                        help='Number of ticks between migrations from each island to the next')
+
+    parser.add_argument('-ms', '--migration-size', action="store", dest="migration_size", type=int,
+                        default=migration_size,
+                        help='Number of life forms that migrate from each island each migration')
+
+    parser.add_argument('-lin', '--lineage', action="store_true", dest="lineage", default=lineage_tracking,
+                        help='Record the ancestry of every life form, so the largest surviving clades and the '
+                             'ancestors of a life form can be queried from the control server')
+
+    parser.add_argument('-tc', '--trace-capacity', action="store", dest="trace_capacity", type=int,
+                        default=trace_capacity,
+                        help='Trace the latest events of the simulation (collisions, kills, births and so on) in a '
+                             'ring buffer holding this many, which is written out on a crash or by the trace_dump '
+                             'control command')
+
+    parser.add_argument('-tp', '--trace-path', action="store", dest="trace_path", type=str, default=trace_path,
+                        help='File the event trace is written to, read it with python tick_tracer.py TRACE_PATH')
+
+    parser.add_argument('-lg', '--load-governor', action="store_true", dest="load_governor", default=load_governor,
+                        help='Hold ticks and frames within their time budgets by lowering the population limit and '
+                             'breeding chance and rendering fewer frames when they run over, relaxing again once '
+                             'there is headroom')
+
+    parser.add_argument('-tb', '--tick-budget', action="store", dest="tick_budget", type=float,
+                        default=tick_budget,
+                        help='Seconds a tick of the logic loop should take at most, for the load governor')
+
+    parser.add_argument('-fb', '--frame-budget', action="store", dest="frame_budget", type=float,
+                        default=frame_budget,
+                        help='Seconds a frame should take to render at most, for the load governor')
+
+    parser.add_argument('-tt', '--time-travel', action="store", dest="time_travel", type=int, default=time_travel_ticks,
+                        help='Keep this many of the latest ticks in memory, so the simulation can be wound back with '
+                             'the rewind and step_back control commands')
+
+    parser.add_argument('-ttm', '--time-travel-memory', action="store", dest="time_travel_memory", type=int,
+                        default=time_travel_memory,
+                        help='Megabytes the time travel history can take up, the oldest ticks are dropped to stay '
+                             'under it')
+
+    parser.add_argument('-jit', '--jit-kernel', action="store_true", dest="jit_kernel", default=jit_kernel,
+                        help='Whether to use the Numba compiled movement kernel, falls back to pure Python if Numba '
+                             'is not installed')
+
+    parser.add_argument('-sd', '--seed', action="store", dest="random_seed", type=int, default=random_seed,
+                        help='Seed for all the random number generators, the same seed and settings will reproduce a '
+                             'run exactly')
+
     parser.add_argument('-hl', '--headless', action="store_true", dest="headless",
                         default=headless,
                         help='Whether to run in headless mode (without a keyboard listener)')
 
+    parser.add_argument('-st', '--stats-store', action="store_true", dest="stats_store", default=stats_store_on,
+                        help='Record the session\'s statistics every tick into a fixed size store, downsampled to '
+                             'seconds, minutes and hours, for the stats_series control command')
+
+    parser.add_argument('-pe', '--population-export', action="store", dest="population_export",
+                        default=population_export_path,
+                        help='Directory to export snapshots of every living life form\'s seeds, traits, position and '
+                             'age to, as compressed numpy chunks')
+
+    parser.add_argument('-pei', '--population-export-interval', action="store", dest="population_export_interval",
+                        type=int, default=population_export_interval,
+                        help='Ticks between population snapshots')
+
+    parser.add_argument('-soak', '--soak', action="store", dest="soak_ticks", type=int, default=soak_ticks,
+                        help='Run unattended for this many ticks with retries on, sampling memory and the size of the '
+                             'simulation\'s containers, then write a report and exit with an error if memory kept '
+                             'growing')
+
+    parser.add_argument('-sgt', '--soak-growth-threshold', action="store", dest="soak_growth_threshold", type=int,
+                        default=soak_growth_threshold,
+                        help='Kilobytes of memory growth per million ticks above which the soak run fails')
+
+    parser.add_argument('-srp', '--soak-report-path', action="store", dest="soak_report_path",
+                        default=soak_report_path,
+                        help='File to write the soak report to')
+
     args = parser.parse_args()
 
+    if args.tiles and args.islands > 1:
+        parser.error("tiles and islands can't be used together")
+
+    if args.tiles and args.lineage:
+        parser.error("lineage can't be recorded across tiles")
+
+    if args.tiles and args.trace_capacity:
+        parser.error("events can't be traced across tiles")
+
+    if args.tiles and args.load_governor:
+        parser.error("the load governor can't be used with tiles")
+
+    if args.tiles and args.stats_store:
+        parser.error("statistics can't be recorded across tiles")
+
+    if args.tiles and args.population_export:
+        parser.error("the population can't be exported across tiles")
+
+    if args.tiles and args.time_travel:
+        parser.error("time can't be wound back across tiles")
+
+    if args.lineage and args.time_travel:
+        parser.error("lineage can't be recorded while time is wound back")
+
+    if args.world_size and not (args.fixed_function or args.array_renderer):
+        parser.error("a world size needs fixed function or the array renderer, pixel composer draws the whole board")
+
+    if args.soak_ticks and (args.tiles or args.islands > 1):
+        parser.error("a soak run samples one process, it can't be used with tiles or islands")
+
+    # a soak run is left to run unattended as fast as it can, starting again whenever all the life forms expire
+    if args.soak_ticks:
+        args.headless = True
+        args.retry_on = True
+        args.logic_sync = False
+
     logging.basicConfig(level=args.log_level)
 
-    world_space_access = WorldSpaceControl()
+    startup_timer.phase_done("arguments")
 
     screen_controller = ScreenController(screen_type=args.hat_edition,
                                          simulator=args.simulator,
                                          custom_size_simulator=args.custom_size_simulator,
-                                         led_brightness=led_brightness)
+                                         led_brightness=led_brightness,
+                                         screen_specs=args.screens)
+
+    startup_timer.phase_done(f"{args.hat_edition} screen backend")
+
+    if args.record_path:
+        from frame_recorder import FrameRecorder
+        screen_controller.attach_frame_recorder(FrameRecorder(args.record_path,
+                                                              screen_controller.u_width,
+                                                              screen_controller.u_height,
+                                                              frame_format=args.record_format,
+                                                              every=args.record_every,
+                                                              queue_size=record_queue_size,
+                                                              workers=record_workers))
+
+    world_width, world_height = args.world_size or (screen_controller.u_width, screen_controller.u_height)
+    world_space_access = WorldSpaceControl(world_width, world_height)
+
+    viewport = None
+    if (world_width, world_height) != (screen_controller.u_width, screen_controller.u_height):
+        from viewport import Viewport
+        viewport = Viewport(screen_controller.u_width, screen_controller.u_height, world_width, world_height,
+                            empty_cell=EMPTY, locate_entity=locate_entity, overview_mode=args.overview_mode)
+        startup_timer.phase_done("camera")
+
+    movement = MovementKernel(use_jit=args.jit_kernel)
+
+    startup_timer.phase_done("world space")
+
+    # the camera, the compiled movement kernel, the array renderer and the frame streamer work from the occupancy and
+    # colour grids, numpy is only imported to keep them when one of them is used; they are kept from before the logic
+    # loop starts writing to the world
+    if viewport is not None or movement.jit or args.stream_port or (args.array_renderer and not args.fixed_function):
+        world_space_access.keep_grids()
+        startup_timer.phase_done("world space grids")
 
     current_session = Session(life_form_total_count=args.life_form_total,
                               building_entities=args.building_entities,
@@ -1613,26 +2858,206 @@ if __name__ == '__main__':
                               radiation_base_change_chance=args.radiation_base_change_chance,
                               max_attribute=args.max_num,
                               gravity_on=args.gravity,
-                              current_session_start_time=datetime.datetime.now())
-
-    [class_generator(i, "resource") for i in range(args.resources_number)]
-    [class_generator(i, "wall") for i in range(args.wall_number)]
-    [class_generator(i) for i in range(args.life_form_total)]
+                              current_session_start_time=datetime.datetime.now(),
+                              tick_rate=args.loop_speed,
+                              random_seed=args.random_seed)
+
+    renderer = None
+
+    tracer = None
+    if args.trace_capacity:
+        from tick_tracer import TickTracer
+        tracer = TickTracer(args.trace_capacity, args.trace_path)
+        tracer.dump_on_crash()
+
+    governor = None
+    if args.load_governor:
+        from load_governor import LoadGovernor
+        governor = LoadGovernor(current_session, args.tick_budget, args.frame_budget,
+                                pop_limit_floor=governor_pop_limit_floor,
+                                breed_chance_floor=governor_breed_chance_floor,
+                                render_every_ceiling=governor_render_every_ceiling,
+                                check_interval=governor_check_interval,
+                                headroom=governor_headroom,
+                                settle_checks=governor_settle_checks)
+
+    space_time = None
+
+    history = None
+    if args.time_travel:
+        from time_travel import SpaceTimeHistory
+        history = SpaceTimeHistory(get_space_time(), args.time_travel, args.time_travel_memory * 1024 * 1024,
+                                   keyframe_interval=time_travel_keyframe_interval)
+
+    lineage = None
+    if args.lineage:
+        from lineage_store import LineageStore
+        lineage = LineageStore()
+
+    stats_store = None
+    if args.stats_store:
+        from stats_store import StatsStore
+        stats_store = StatsStore(stats_tick_capacity, stats_tiers)
+
+    population_exporter = None
+    if args.population_export:
+        from population_export import PopulationExporter
+        max_attribute = current_session.max_attribute
+        max_movement = diagonal_distance(0, 0, world_space_access.width, world_space_access.height)
+        population_exporter = PopulationExporter(
+            args.population_export,
+            trait_ranges={"aggression_factor": max_attribute, "friend_factor": args.max_enemy_factor,
+                          "weight": max_attribute, "momentum": max_movement, "forgetfulness": 128,
+                          "breed_threshold": max_attribute, "time_to_move": max_movement,
+                          "combine_threshold": max_attribute, "wall_factor": args.wall_chance_multiplier,
+                          "memory_max": max_attribute, "time_to_live": max_attribute, "strength": max_attribute,
+                          "compatibility_factor": max_attribute, "time_to_build": max_attribute},
+            chunk_rows=population_export_chunk_rows,
+            histogram_bins=population_export_histogram_bins,
+            queue_size=population_export_queue_size)
+
+    soak_monitor = None
+    if args.soak_ticks:
+        from soak_monitor import SoakMonitor
+        soak_monitor = SoakMonitor(args.soak_ticks,
+                                   sample_interval=soak_sample_interval,
+                                   window=soak_window,
+                                   warmup_samples=soak_warmup_samples,
+                                   growth_threshold=args.soak_growth_threshold * 1024,
+                                   container_growth_threshold=soak_container_growth_threshold,
+                                   fail_after=soak_fail_after,
+                                   report_path=args.soak_report_path,
+                                   top_allocations=soak_top_allocations)
+        soak_monitor.watch("lifeforms", lambda: len(BaseEntity.lifeforms))
+        soak_monitor.watch("groups", lambda: len(BaseEntity.groups.parent))
+        soak_monitor.watch("world_space", lambda: len(world_space_access.world_space))
+        soak_monitor.watch("world_space_2", lambda: len(world_space_access.world_space_2))
+        soak_monitor.watch("world_space_time", lambda: len(world_space_access.world_space_time))
+        soak_monitor.watch("good_memories", count_good_memories)
+        if history is not None:
+            soak_monitor.watch("time_travel_history", lambda: len(history.records))
+        if lineage is not None:
+            soak_monitor.watch("lineage", lambda: len(lineage.life_form_ids))
+
+    bulk_spawn(args.resources_number, "resource")
+    bulk_spawn(args.wall_number, "wall")
+    bulk_spawn(args.life_form_total)
+
+    startup_timer.phase_done("session and spawning")
+
+    island = None
+
+    # workers and islands are forked before any other threads are started
+    if args.islands > 1:
+        from island_model import IslandLinks
+        island = Island(0, IslandLinks(args.islands, migration_queue_size), args.migration_interval,
+                        args.migration_size)
+        island.links.start_islands(run_island)
+        startup_timer.phase_done("islands")
+
+    if args.tiles:
+        from tiled_world import TileGrid, TileWorkers
+        tile_workers = TileWorkers(TileGrid(world_space_access.width, world_space_access.height, *args.tiles),
+                                   run_tile_worker)
+        tile_workers.start()
+        tile_coordinator = TileCoordinator(tile_workers)
+        startup_timer.phase_done("tile workers")
 
     current_session.rendering_on = True
 
+    command_queue = CommandQueue({
+        'thanos_snap': tile_coordinator.queue_thanos_snap if args.tiles else thanos_snap,
+        'gravity_switch': gravity_switch,
+        'render_switch': render_switch,
+        'increase_max_radiation': increase_max_radiation,
+        'decrease_max_radiation': decrease_max_radiation,
+        'show_current_session_stats': show_current_session_stats,
+        'stats': get_current_session_stats,
+        'set_parameter': set_parameter,
+        'set_tick_rate': set_tick_rate,
+        'checkpoint': save_space_time,
+        'restore_checkpoint': load_space_time,
+    })
+
+    if lineage is not None:
+        command_queue.handlers.update({
+            'ancestors': lineage.ancestors,
+            'largest_clades': lineage.largest_clades,
+        })
+
+    if tracer is not None:
+        command_queue.handlers['trace_dump'] = tracer.dump
+
+    if history is not None:
+        command_queue.handlers.update({
+            'rewind': history.rewind,
+            'step_back': history.step_back,
+            'resume': history.resume,
+        })
+
+    if stats_store is not None:
+        command_queue.handlers['stats_series'] = stats_store.query
+
+    if population_exporter is not None:
+        command_queue.handlers['trait_histograms'] = population_exporter.get_histograms
+
+    if viewport is not None:
+        command_queue.handlers.update({
+            'pan': viewport.pan,
+            'zoom': viewport.zoom,
+            'follow': viewport.follow,
+            'overview': viewport.overview,
+            'camera': viewport.get_state,
+        })
+
+    if args.control_port or args.control_socket:
+        from control_server import ControlServer
+        ControlServer(command_queue, port=args.control_port, unix_socket=args.control_socket).start()
+
+    if args.stream_port:
+        from frame_streamer import FrameEncoder, FrameStreamServer
+        FrameStreamServer(FrameEncoder(get_world_frame, fps=stream_fps, keyframe_interval=stream_keyframe_interval),
+                          port=args.stream_port, host=args.stream_host).start()
+
     if not args.headless:
         from pynput.keyboard import Listener
         listener = Listener(on_press=on_press, daemon=True)
         listener.start()
 
-    Thread(target=main, daemon=True).start()
-
-    if not args.fixed_function:
+    startup_timer.phase_done("control and input")
+
+    # the pixel composer renderer is only imported when it is going to be used
+    if args.array_renderer and not args.fixed_function:
+        from array_renderer import ArrayRenderer, DEFAULT_RENDER_STACK, LIT_RENDER_STACK
+        startup_timer.phase_done("array renderer")
+    elif not args.fixed_function:
+        from draw_objects import DrawObjects
+        startup_timer.phase_done("pixel composer renderer")
+
+    startup_timer.report()
+
+    Thread(target=tile_coordinator.run if args.tiles else main, daemon=True).start()
+
+    if args.array_renderer and not args.fixed_function:
+        renderer = ArrayRenderer(screen_controller.u_width, screen_controller.u_height, session_info=current_session,
+                                 world_space=world_space_access,
+                                 render_stack=LIT_RENDER_STACK if args.render_lighting else DEFAULT_RENDER_STACK,
+                                 light_colour=render_light_colour, light_strength=render_light_strength,
+                                 light_position=render_light_position,
+                                 tile_size=args.render_tile_size, workers=args.render_workers,
+                                 parallel_min_pixels=render_parallel_min_pixels,
+                                 timing_interval=render_timing_interval, viewport=viewport)
+        if soak_monitor is not None:
+            soak_monitor.watch("removed_entity_buffer", lambda: int(renderer.removed_entity_mask.sum()))
+        renderer.run(screen_controller, hat_buffer_refresh_rate, governor, stats_store)
+    elif not args.fixed_function:
         draw_control = DrawObjects(output_controller=screen_controller,
                                    buffer_refresh=hat_buffer_refresh_rate,
                                    session_info=current_session,
                                    world_space=world_space_access,
+                                   load_governor=governor,
+                                   soak_monitor=soak_monitor,
+                                   stats_store=stats_store,
                                    exit_text='Program ended by user.\n Total life forms produced: ${'
                                              'life_form_total_count}\n Max'
                                              'concurrent Lifeforms was: ${highest_concurrent_lifeforms}\n Last count '
@@ -1640,8 +3065,23 @@ if __name__ == '__main__':
                                              'Lifeforms: ${current_life_form_amount}')
     else:
         while True:
-            [screen_controller.draw_pixels(coord, (0, 0, 0)) for coord in
-             current_session.coord_map]
-            [screen_controller.draw_pixels(coord, pixel[0]) for coord, pixel in
-             world_space_access.world_space.copy().items()]
+            frame_start = time()
+            if viewport is None:
+                [screen_controller.draw_pixels(coord, (0, 0, 0)) for coord in
+                 current_session.coord_map]
+                [screen_controller.draw_pixels(coord, pixel[0]) for coord, pixel in
+                 world_space_access.world_space.copy().items()]
+            elif "end" in world_space_access.world_space:
+                logger.info("Render thread purposely ended")
+                quit()
+            else:
+                screen_controller.draw_frame(viewport.render_frame(world_space_access.occupancy,
+                                                                   world_space_access.colours, colour_scale=1))
             screen_controller.show()
+
+            frame_time = time() - frame_start
+            if stats_store is not None:
+                stats_store.record_render(frame_time)
+            if governor is not None:
+                governor.record_render(frame_time)
+                sleep(governor.render_pause(frame_time))
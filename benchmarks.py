@@ -0,0 +1,531 @@
+import argparse
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+from argparse import Namespace
+from math import ceil
+from time import perf_counter
+
+import artificial_life
+import screen_output
+from array_renderer import ArrayRenderer, LIT_RENDER_STACK
+from artificial_life import BaseEntity, Session, WorldSpaceControl
+from config.parameters import (change_of_base_radiation_chance, hat_buffer_refresh_rate, initial_dna_chaos_chance,
+                               initial_radiation, jit_kernel, max_enemy_factor, max_radiation, max_trait_number,
+                               radiation_dmg_multiplier, wall_chance_multiplier)
+from movement_kernel import MovementKernel
+
+logger = logging.getLogger("benchmarks-logger")
+
+BOARD_SIZES = ((16, 16), (64, 64), (128, 128))
+
+# boards the whole frame render benchmarks are run on, including ones big enough for threads to pay off
+RENDER_FRAME_SIZES = ((64, 64), (256, 256), (512, 512))
+
+# share of the board's cells filled with life forms for sparse and crowded boards
+SPARSE_FILL = 0.05
+DENSE_FILL = 0.4
+
+# ticks of the logic loop timed in each round of the process benchmarks
+PROCESS_TICKS = 5
+
+BENCHMARK_SEED = 1234
+DEFAULT_ROUNDS = 15
+DEFAULT_THRESHOLD = 0.1
+
+# each round repeats the operation, with a fresh setup each time, until this many seconds of it have been timed, so
+# quick operations aren't timed once at the resolution of the clock
+MIN_ROUND_TIME = 0.02
+
+# the fastest round is compared against the baseline, as noise from the rest of the machine only ever slows rounds down
+COMPARED_STATISTIC = "min"
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"
+
+
+class Benchmark:
+    def __init__(self, name, operation, setup=None, iterations=1):
+        """
+        A piece of code to time. The setup builds fresh state, which isn't timed, then the operation is timed running
+        on it, so operations that change the simulation start from the same place every time they are timed.
+        :param name: group/case/size, used to match results against a baseline
+        :param operation: function timed each round, given what the setup returned
+        :param setup: function building the state for a round
+        :param iterations: times the operation is run each round, for operations too quick to time one at a time
+        """
+        self.name = name
+        self.operation = operation
+        self.setup = setup
+        self.iterations = iterations
+
+    def time_repeats(self, repeats):
+        """
+        Time the operation a number of times, each on fresh state from the setup, with garbage collection off like
+        timeit.
+        :param repeats:
+        :return: seconds one run of the operation took on average
+        """
+        operation = self.operation
+        elapsed = 0.0
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(repeats):
+                state = self.setup() if self.setup is not None else None
+                start = perf_counter()
+                for _ in range(self.iterations):
+                    operation(state)
+                elapsed += perf_counter() - start
+        finally:
+            gc.enable()
+        return elapsed / (repeats * self.iterations)
+
+    def run(self, rounds):
+        """
+        Time the operation over a number of rounds. A first warm up round isn't kept, it fills caches and works out how
+        many times the operation has to be repeated for each round to take at least MIN_ROUND_TIME.
+        :param rounds:
+        :return: statistics of the time one run of the operation takes, in seconds
+        """
+        warmup_time = self.time_repeats(1) * self.iterations
+        repeats = max(1, ceil(MIN_ROUND_TIME / max(warmup_time, 1e-9)))
+
+        times = [self.time_repeats(repeats) for _ in range(rounds)]
+
+        return {
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+            "stddev": statistics.stdev(times) if rounds > 1 else 0.0,
+            "rounds": rounds,
+            "repeats": repeats,
+            "iterations": self.iterations,
+        }
+
+
+def build_world(width, height, fill, walls=0.0, combine=False, breed_chance=0.0, linked=False):
+    """
+    Set up artificial_life's globals with a new board and population, the same for the same arguments every time.
+    :param width:
+    :param height:
+    :param fill: share of the board's cells filled with life forms
+    :param walls: share of the board's cells filled with walls
+    :param combine: whether life forms combine into groups when they collide
+    :param breed_chance: chance a collision that could breed does
+    :param linked: spawn the life forms side by side in pairs, each pair combined into a group
+    :return:
+    """
+    artificial_life.args = Namespace(radiation_dmg_multi=radiation_dmg_multiplier, combine_mode=combine,
+                                     pop_limit=width * height, fixed_function=False)
+    artificial_life.world_space_access = WorldSpaceControl(width, height)
+    artificial_life.movement = MovementKernel(use_jit=jit_kernel)
+    if artificial_life.movement.jit:
+        artificial_life.world_space_access.keep_grids()
+    artificial_life.lineage = None
+    artificial_life.tracer = None
+    artificial_life.stats_store = None
+    artificial_life.population_exporter = None
+    BaseEntity.lifeforms.clear()
+    BaseEntity.groups.clear()
+
+    session = Session(life_form_total_count=0,
+                      building_entities=False,
+                      max_enemy_factor=max_enemy_factor,
+                      wall_chance_multiplier=wall_chance_multiplier,
+                      draw_trails=False,
+                      retries=False,
+                      highest_concurrent_lifeforms=0,
+                      radiation=initial_radiation,
+                      radiation_max=max_radiation,
+                      dna_chaos_chance=initial_dna_chaos_chance,
+                      radiation_change=True,
+                      radiation_base_change_chance=change_of_base_radiation_chance,
+                      max_attribute=max_trait_number,
+                      gravity_on=False,
+                      current_session_start_time=datetime.datetime.now(),
+                      random_seed=BENCHMARK_SEED,
+                      breed_chance=breed_chance)
+    artificial_life.current_session = session
+    session.max_movement = artificial_life.diagonal_distance(0, 0, width, height)
+
+    life_form_count = int(width * height * fill)
+    artificial_life.bulk_spawn(int(width * height * walls), "wall")
+    if linked:
+        pair_positions = [((x, y), (x + 1, y)) for y in range(0, height, 2) for x in range(0, width - 1, 3)]
+        pair_positions = pair_positions[:life_form_count // 2]
+        spawned = artificial_life.bulk_spawn(
+            len(pair_positions) * 2, start_positions=[position for pair in pair_positions for position in pair])
+        for first, second in zip(spawned[::2], spawned[1::2]):
+            BaseEntity.groups.union(first.life_form_id, second.life_form_id)
+    else:
+        artificial_life.bulk_spawn(life_form_count)
+
+    return session
+
+
+def process_ticks(_):
+    """
+    Run ticks of the logic loop over every entity, as main does.
+    :param _:
+    :return:
+    """
+    for _ in range(PROCESS_TICKS):
+        [life_form.process() for life_form in BaseEntity.lifeforms.copy().values()]
+        artificial_life.world_space_access.world_time += 1
+
+
+def process_benchmarks():
+    """
+    Benchmarks of a few ticks of BaseEntity.process on each board size, for entities mostly moving freely, colliding
+    and fighting on a crowded board, breeding, and moving as combined groups.
+    :return:
+    """
+    scenarios = {
+        "moving": dict(fill=SPARSE_FILL),
+        "colliding": dict(fill=DENSE_FILL, walls=0.1),
+        "breeding": dict(fill=DENSE_FILL, breed_chance=1.0),
+        "linked": dict(fill=DENSE_FILL, combine=True, linked=True),
+    }
+    for scenario, world in scenarios.items():
+        for width, height in BOARD_SIZES:
+            yield Benchmark(f"process/{scenario}/{width}x{height}", process_ticks,
+                            setup=lambda width=width, height=height, world=world: build_world(width, height, **world))
+
+
+def world_space_benchmarks():
+    """
+    Benchmarks of writing, reading, deleting and snapshotting every cell of the world space.
+    :return:
+    """
+
+    def empty_world(width, height):
+        world_space = WorldSpaceControl(width, height)
+        coords = [(x, y) for x in range(width) for y in range(height)]
+        return world_space, coords
+
+    def full_world(width, height):
+        world_space, coords = empty_world(width, height)
+        world_space.write_many_to_world_space((coord, (0.5, 0.5, 0.5), index) for index, coord in enumerate(coords))
+        return world_space, coords
+
+    def write(state):
+        world_space, coords = state
+        for index, coord in enumerate(coords):
+            world_space.write_to_world_space(coord, (0.5, 0.5, 0.5), index)
+
+    def read(state):
+        world_space, coords = state
+        for coord in coords:
+            world_space.get_from_world_space(coord)
+
+    def delete(state):
+        world_space, coords = state
+        for coord in coords:
+            world_space.del_world_space_item(coord)
+
+    def snapshot(state):
+        state[0].return_world_space()
+
+    for width, height in BOARD_SIZES:
+        yield Benchmark(f"world_space/write/{width}x{height}", write,
+                        setup=lambda width=width, height=height: empty_world(width, height))
+        for name, operation in (("read", read), ("delete", delete), ("snapshot", snapshot)):
+            yield Benchmark(f"world_space/{name}/{width}x{height}", operation,
+                            setup=lambda width=width, height=height: full_world(width, height))
+
+
+def generator_benchmarks():
+    """
+    Benchmarks of spawning entities one at a time and claiming free board positions.
+    :return:
+    """
+    def class_generator(_):
+        artificial_life.class_generator(artificial_life.current_session.life_form_total_count)
+
+    def global_board_generator(_):
+        artificial_life.global_board_generator()
+
+    for width, height in BOARD_SIZES:
+        # each round spawns a hundred life forms onto an empty board, or claims every position of the board
+        yield Benchmark(f"generator/class_generator/{width}x{height}", class_generator,
+                        setup=lambda width=width, height=height: build_world(width, height, fill=0.0),
+                        iterations=min(100, width * height))
+        yield Benchmark(f"generator/global_board_generator/{width}x{height}", global_board_generator,
+                        setup=lambda width=width, height=height: build_world(width, height, fill=0.0),
+                        iterations=width * height)
+
+
+def helper_benchmarks():
+    """
+    Benchmarks of percentage, get_dna and adjust_radiation_along_curve.
+    :return:
+    """
+    def crowded_world():
+        build_world(16, 16, fill=DENSE_FILL)
+        first, second = list(BaseEntity.lifeforms.values())[:2]
+        return first, second.life_form_id
+
+    def get_dna(state):
+        life_form, collided_life_form_id = state
+        life_form.get_dna(1, collided_life_form_id)
+
+    yield Benchmark("helper/percentage", lambda _: artificial_life.percentage(37, 1000), iterations=10000)
+    yield Benchmark("helper/get_dna", get_dna, setup=crowded_world, iterations=10000)
+    yield Benchmark("helper/adjust_radiation_along_curve",
+                    lambda session: session.adjust_radiation_along_curve(),
+                    setup=lambda: build_world(16, 16, fill=0.0), iterations=10000)
+
+
+def add_removed_entities(world_space, width, height):
+    """
+    Put removed entities into the second world space for the render passes to fade out, they are taken out of it by
+    the removed object pass so are put back every time a pass is timed.
+    :param world_space:
+    :param width:
+    :param height:
+    :return:
+    """
+    world_space.write_many_to_world_space((((x, y), (0.9, 0.2, 0.1), -2)
+                                           for x in range(0, width, 4) for y in range(0, height, 4)), 2)
+
+
+def render_benchmarks():
+    """
+    Benchmarks of each pass of the array renderer, which runs the same passes as DrawObjects, on a crowded board with
+    some removed entities fading out. The passes before the one timed are run in the setup, so it has a frame to work
+    on.
+    :return:
+    """
+    renderers = {}
+
+    def rendered_up_to(width, height, pass_index):
+        if (width, height) not in renderers:
+            session = build_world(width, height, fill=DENSE_FILL)
+            renderers[(width, height)] = ArrayRenderer(width, height, session_info=session,
+                                                       world_space=artificial_life.world_space_access,
+                                                       render_stack=LIT_RENDER_STACK, workers=1,
+                                                       timing_interval=sys.maxsize)
+        renderer = renderers[(width, height)]
+
+        add_removed_entities(renderer.world_space_access, width, height)
+        for pass_name, render_pass in renderer.passes[:pass_index]:
+            render_pass()
+        return renderer
+
+    for width, height in BOARD_SIZES:
+        for pass_index, pass_name in enumerate(LIT_RENDER_STACK):
+            yield Benchmark(f"render/{pass_name}/{width}x{height}",
+                            lambda renderer, pass_index=pass_index: renderer.passes[pass_index][1](),
+                            setup=lambda width=width, height=height, pass_index=pass_index: rendered_up_to(
+                                width, height, pass_index))
+
+
+def render_frame_benchmarks():
+    """
+    Benchmarks of rendering a whole lit frame with the array renderer, shaded as one tile and shaded in tiles on a
+    thread per core, on boards from below the size threads are used at to well above it. The tiled frames only run
+    faster on a machine with more than one core.
+    :return:
+    """
+    renderers = {}
+
+    def built_renderer(width, height, workers):
+        if (width, height, workers) not in renderers:
+            session = build_world(width, height, fill=DENSE_FILL)
+            renderers[(width, height, workers)] = ArrayRenderer(width, height, session_info=session,
+                                                                world_space=artificial_life.world_space_access,
+                                                                render_stack=LIT_RENDER_STACK, workers=workers,
+                                                                parallel_min_pixels=0, timing_interval=sys.maxsize)
+        renderer = renderers[(width, height, workers)]
+
+        add_removed_entities(renderer.world_space_access, width, height)
+        return renderer
+
+    for width, height in RENDER_FRAME_SIZES:
+        for workers in sorted({1, os.cpu_count() or 1}):
+            yield Benchmark(f"render_frame/{workers}_workers/{width}x{height}", lambda renderer: renderer.render(),
+                            setup=lambda width=width, height=height, workers=workers: built_renderer(
+                                width, height, workers))
+
+
+class NullScreen:
+    def __init__(self, width, height):
+        """
+        Screen that shows nothing, so the DrawObjects passes can be timed without a display.
+        :param width:
+        :param height:
+        """
+        self.width = width
+        self.height = height
+
+    def get_shape(self):
+        return self.width, self.height
+
+    def set_pixel(self, x, y, r, g, b):
+        pass
+
+    def show(self):
+        pass
+
+
+def null_backend(screen_type, simulator, custom_size_simulator, led_brightness):
+    """
+    Set up a screen that shows nothing
+    """
+    return NullScreen(custom_size_simulator[0], custom_size_simulator[1])
+
+
+def draw_objects_benchmarks():
+    """
+    Benchmarks of each pass of DrawObjects, the pixel composer renderer used when '-ar' isn't passed, on a crowded
+    board with some removed entities fading out, drawing to a screen that shows nothing. As with the array renderer the
+    passes before the one timed are run in the setup. Skipped if the pixel_composer submodule isn't checked out.
+    :return:
+    """
+    try:
+        from draw_objects import DrawObjects
+    except ImportError as error:
+        logger.warning(f"Skipping the DrawObjects benchmarks, pixel_composer could not be imported: {error}")
+        return
+
+    class BenchmarkDrawObjects(DrawObjects):
+        def draw(self):
+            """
+            Left out so building the drawer doesn't start its render loop, the benchmarks run its passes one at a time.
+            :return:
+            """
+
+    screen_output.SCREEN_BACKENDS.setdefault("NULL", null_backend)
+
+    def drawn_up_to(drawer, width, height, pass_index):
+        add_removed_entities(drawer.world_space_access, width, height)
+        for pass_name in drawer.render_stack[:pass_index]:
+            getattr(drawer, pass_name)()
+        return drawer
+
+    for width, height in BOARD_SIZES:
+        session = build_world(width, height, fill=DENSE_FILL)
+        screen_controller = screen_output.ScreenController("NULL", False, (width, height), 0)
+        drawer = BenchmarkDrawObjects(output_controller=screen_controller,
+                                      buffer_refresh=hat_buffer_refresh_rate,
+                                      session_info=session,
+                                      world_space=artificial_life.world_space_access,
+                                      exit_text="")
+        for pass_index, pass_name in enumerate(drawer.render_stack):
+            yield Benchmark(f"draw_objects/{pass_name}/{width}x{height}",
+                            lambda drawer, pass_name=pass_name: getattr(drawer, pass_name)(),
+                            setup=lambda drawer=drawer, width=width, height=height, pass_index=pass_index: drawn_up_to(
+                                drawer, width, height, pass_index))
+
+
+BENCHMARK_GROUPS = (process_benchmarks, world_space_benchmarks, generator_benchmarks, helper_benchmarks,
+                    render_benchmarks, render_frame_benchmarks, draw_objects_benchmarks)
+
+
+def run_benchmarks(rounds, name_filter=None):
+    """
+    Run every benchmark whose name contains the filter.
+    :param rounds:
+    :param name_filter:
+    :return: the results, with the platform they were run on
+    """
+    results = {}
+    for benchmark_group in BENCHMARK_GROUPS:
+        for benchmark in benchmark_group():
+            if name_filter and name_filter not in benchmark.name:
+                continue
+            results[benchmark.name] = benchmark.run(rounds)
+            logger.info(f"{benchmark.name}: {results[benchmark.name][COMPARED_STATISTIC] * 1000:.4f}ms")
+
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "benchmarks": results,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Compare the fastest round of each benchmark against a baseline.
+    :param baseline:
+    :param current:
+    :param threshold: share a benchmark can be slower than the baseline before it is flagged
+    :return: names of the benchmarks that slowed down
+    """
+    slowdowns = []
+    print(f"{'benchmark':<48} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, result in current["benchmarks"].items():
+        baseline_result = baseline["benchmarks"].get(name)
+        if baseline_result is None:
+            print(f"{name:<48} {'-':>12} {result[COMPARED_STATISTIC] * 1000:>12.4f} {'new':>8}")
+            continue
+
+        baseline_time, current_time = baseline_result[COMPARED_STATISTIC], result[COMPARED_STATISTIC]
+        change = current_time / baseline_time - 1
+        flag = ""
+        if change > threshold:
+            slowdowns.append(name)
+            flag = "  SLOWER"
+        print(f"{name:<48} {baseline_time * 1000:>12.4f} {current_time * 1000:>12.4f} {change:>+8.1%}{flag}")
+
+    if baseline["python"] != current["python"] or baseline["machine"] != current["machine"]:
+        logger.warning(f"Baseline was run on Python {baseline['python']} {baseline['machine']}, these results on "
+                       f"Python {current['python']} {current['machine']}")
+
+    return slowdowns
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Microbenchmarks of the simulation\'s hot paths')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help='Run the benchmarks and save the results as a baseline')
+    run_parser.add_argument('-o', '--output', default=DEFAULT_BASELINE_PATH,
+                            help='File to save the results to')
+
+    compare_parser = subparsers.add_parser("compare", help='Compare results against a baseline, exiting with an '
+                                                           'error if any benchmark slowed down')
+    compare_parser.add_argument('baseline', help='Baseline results to compare against')
+    compare_parser.add_argument('current', nargs='?',
+                                help='Results to compare, the benchmarks are run if not given')
+    compare_parser.add_argument('-t', '--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='Share a benchmark can be slower than the baseline before it is flagged')
+
+    for subparser in (run_parser, compare_parser):
+        subparser.add_argument('-r', '--rounds', type=int, default=DEFAULT_ROUNDS,
+                               help='Rounds each benchmark is timed over')
+        subparser.add_argument('-f', '--filter', dest="name_filter",
+                               help='Only run the benchmarks whose names contain this')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level="INFO")
+    # the simulation logs every session it sets up
+    logging.getLogger("alife-logger").setLevel(logging.WARNING)
+    logging.getLogger("array-renderer-logger").setLevel(logging.WARNING)
+
+    if args.command == "run":
+        results = run_benchmarks(args.rounds, args.name_filter)
+        with open(args.output, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+        logger.info(f"Saved {len(results['benchmarks'])} benchmark results to {args.output}")
+    else:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if args.current:
+            with open(args.current) as current_file:
+                current = json.load(current_file)
+        else:
+            current = run_benchmarks(args.rounds, args.name_filter)
+
+        slowdowns = compare_results(baseline, current, args.threshold)
+        if slowdowns:
+            logger.error(f"{len(slowdowns)} benchmark(s) more than {args.threshold:.0%} slower than the baseline: "
+                         f"{', '.join(slowdowns)}")
+            raise SystemExit(1)
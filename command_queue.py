@@ -0,0 +1,54 @@
+import logging
+import queue
+from concurrent.futures import Future
+
+logger = logging.getLogger("command-queue-logger")
+
+
+class CommandQueue:
+    def __init__(self, handlers):
+        """
+        Queue of commands waiting to be applied by the logic loop, commands can be submitted from any thread and are
+        only run when the logic loop calls apply_pending between ticks.
+        :param handlers: dictionary of command name to the function that carries it out
+        """
+        self.handlers = handlers
+
+        self.pending = queue.SimpleQueue()
+
+    def submit(self, command, params=None):
+        """
+        Submit a command to be applied at the next tick boundary.
+        :param command:
+        :param params: keyword arguments for the command's handler
+        :return: a future that is given the handler's result once the command has been applied
+        """
+        future = Future()
+        self.pending.put((command, params or {}, future))
+        return future
+
+    def apply_pending(self):
+        """
+        Apply every command submitted since the last call, this is called from the logic loop between ticks.
+        :return:
+        """
+        while True:
+            try:
+                command, params, future = self.pending.get_nowait()
+            except queue.Empty:
+                return
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                handler = self.handlers[command]
+            except KeyError:
+                future.set_exception(ValueError(f"Unknown command: {command}"))
+                continue
+
+            try:
+                future.set_result(handler(**params))
+            except Exception as error:
+                logger.info(f"Command {command} failed: {error}")
+                future.set_exception(error)
@@ -25,3 +25,67 @@ resources = 0
 entities_build_walls = True
 wall_chance_multiplier = 512
 headless = False
+random_seed = None
+jit_kernel = False
+control_port = None
+control_socket = None
+stream_port = None
+stream_host = "127.0.0.1"
+stream_fps = 30
+stream_keyframe_interval = 120
+record_path = None
+record_format = "raw"
+record_every = 1
+record_queue_size = 64
+record_workers = 2
+tiles = None
+islands = 1
+island_radiation = None
+island_chaos = None
+migration_interval = 500
+migration_size = 5
+migration_queue_size = 64
+lineage_tracking = False
+trace_capacity = None
+trace_path = "tick_trace.bin"
+load_governor = False
+tick_budget = 0.02
+frame_budget = 0.02
+governor_pop_limit_floor = 10
+governor_breed_chance_floor = 0.2
+governor_render_every_ceiling = 4
+governor_check_interval = 30
+governor_headroom = 0.7
+governor_settle_checks = 3
+array_renderer = False
+render_lighting = False
+render_tile_size = 32
+render_workers = None
+render_parallel_min_pixels = 128 * 128
+render_timing_interval = 600
+render_light_colour = 10.0, 10.0, 10.0
+render_light_strength = 10.0
+render_light_position = 32, 32
+multi_screens = "PANEL:64x32@0,0", "PANEL:64x32@64,0"
+world_size = None
+overview_mode = "average"
+time_travel_ticks = None
+time_travel_memory = 64
+time_travel_keyframe_interval = 50
+soak_ticks = None
+soak_sample_interval = 1000
+soak_window = 20
+soak_warmup_samples = 5
+soak_growth_threshold = 1024
+soak_container_growth_threshold = 0.1
+soak_fail_after = 3
+soak_report_path = "soak_report.json"
+soak_top_allocations = 10
+stats_store_on = False
+stats_tick_capacity = 600
+stats_tiers = ("second", 1, 3600), ("minute", 60, 1440), ("hour", 3600, 1344)
+population_export_path = None
+population_export_interval = 100
+population_export_chunk_rows = 100000
+population_export_histogram_bins = 32
+population_export_queue_size = 8
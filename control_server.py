@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+from threading import Thread
+
+logger = logging.getLogger("control-server-logger")
+
+
+class ControlServer:
+    def __init__(self, command_queue, port=None, unix_socket=None, host="127.0.0.1", command_timeout=10):
+        """
+        Local control server speaking line delimited JSON over a Unix socket or a localhost TCP port.
+        Each request is a JSON object on its own line, i.e. {"command": "set_parameter", "params": {"name":
+        "radiation", "value": 50}, "id": 1}; each response is a JSON object on its own line holding "ok" and either
+        "result" or "error", plus the request's "id" if it had one.
+        :param command_queue:
+        :param port:
+        :param unix_socket:
+        :param host:
+        :param command_timeout: seconds to wait for the logic loop to apply a command before giving up
+        """
+        self.command_queue = command_queue
+        self.port = port
+        self.unix_socket = unix_socket
+        self.host = host
+        self.command_timeout = command_timeout
+
+    def start(self):
+        """
+        Start the server on its own thread, so it never blocks the logic or render loops.
+        :return:
+        """
+        Thread(target=asyncio.run, args=(self.serve(),), daemon=True).start()
+
+    async def serve(self):
+        """
+        Listen for clients until the program ends.
+        :return:
+        """
+        if self.unix_socket:
+            server = await asyncio.start_unix_server(self.handle_client, path=self.unix_socket)
+            logger.info(f"Control server listening on {self.unix_socket}")
+        else:
+            server = await asyncio.start_server(self.handle_client, host=self.host, port=self.port)
+            logger.info(f"Control server listening on {self.host}:{self.port}")
+
+        async with server:
+            await server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        """
+        Answer requests from a client until it disconnects.
+        :param reader:
+        :param writer:
+        :return:
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                response = await self.handle_request(line)
+                writer.write((json.dumps(response, default=str) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, line):
+        """
+        Parse a request, submit its command and wait for the logic loop to apply it.
+        :param line:
+        :return: the response
+        """
+        try:
+            request = json.loads(line)
+            command = request["command"]
+            params = request.get("params", {})
+            if not isinstance(params, dict):
+                raise TypeError("params must be an object")
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return {"ok": False, "error": f"Bad request: {error}"}
+
+        response = {}
+        if "id" in request:
+            response["id"] = request["id"]
+
+        future = self.command_queue.submit(command, params)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.command_timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            response.update(ok=False, error="Timed out waiting for the logic loop")
+        except Exception as error:
+            response.update(ok=False, error=str(error))
+        else:
+            response.update(ok=True, result=result)
+
+        return response
@@ -0,0 +1,160 @@
+from time import sleep, time
+
+from pixel_composer.rasterizer import ScreenDrawer, FrameBuffer, FullScreenPatternShader, PerPixelLightingShader, \
+    MotionBlurShader, FullScreenGradientShader, FloatToRGBShader, ShaderStack, ToneMapShader, SpriteShader
+
+
+class DrawObjects(ScreenDrawer):
+
+    def __init__(self, output_controller, buffer_refresh, session_info, world_space, exit_text, load_governor=None,
+                 soak_monitor=None, stats_store=None):
+        super().__init__(output_controller=output_controller,
+                         buffer_refresh=buffer_refresh,
+                         session_info=session_info,
+                         world_space=world_space,
+                         exit_text=exit_text)
+
+        self.frame_buffer_access = FrameBufferInit(self.session_info)
+
+        self.render_stack = [
+            'background_shader_pass',
+            'object_colour_pass',
+            'removed_object_colour_pass',
+            'fade_entity_pass',
+            'tone_map_pass',
+            'render_frame_buffer',
+            'float_to_rgb_pass',
+            'buffer_scan',
+            'flush_buffer'
+        ]
+
+        # the load governor and the stats store time each frame from the first pass to the last
+        self.load_governor = load_governor
+        self.stats_store = stats_store
+        self.frame_start = time()
+        if load_governor is not None or stats_store is not None:
+            self.render_stack = ['start_frame_timer'] + self.render_stack
+        if stats_store is not None:
+            self.render_stack.append('stats_pass')
+        if load_governor is not None:
+            self.render_stack.append('governor_pass')
+
+        # cool effect, ensure a background shader is active and configured
+        # self.render_stack = [
+        #     'background_shader_pass',
+        #     'lighting_pass',
+        #     'lensing_pass',
+        #     'object_colour_pass',
+        #     'removed_object_colour_pass',
+        #     'fade_entity_pass',
+        #     'log_current_frame',
+        #     'tone_map_pass',
+        #     'render_frame_buffer',
+        #     'float_to_rgb_pass',
+        #     'buffer_scan',
+        #     'flush_buffer'
+        # ]
+
+        # with lens flares and lighting
+        # self.render_stack = [
+        #     'background_shader_pass',
+        #     'object_colour_pass',
+        #     'removed_object_colour_pass',
+        #     'fade_entity_pass',
+        #     'log_current_frame',
+        #     'lighting_pass',
+        #     'tone_map_pass',
+        #     'render_frame_buffer',
+        #     'float_to_rgb_pass',
+        #     'sprite_pass',
+        #     'write_texture',
+        #     'buffer_scan',
+        #     'flush_buffer'
+        # ]
+
+        if soak_monitor is not None:
+            soak_monitor.watch("removed_entity_buffer", lambda: len(self.frame_buffer_access.removed_entity_buffer))
+
+        self.draw()
+
+    def start_frame_timer(self):
+        """
+        Starts timing the frame for the load governor and the stats store.
+        :return:
+        """
+        self.frame_start = time()
+
+    def stats_pass(self):
+        """
+        Gives the stats store the time the frame took.
+        :return:
+        """
+        self.stats_store.record_render(time() - self.frame_start)
+
+    def governor_pass(self):
+        """
+        Gives the load governor the time the frame took, then waits out the frames it is skipping.
+        :return:
+        """
+        frame_time = time() - self.frame_start
+        self.load_governor.record_render(frame_time)
+        sleep(self.load_governor.render_pause(frame_time))
+
+    def fade_entity_pass(self):
+        """
+        Uses the motion blur shader to fade entities from the board.
+        :return:
+        """
+        # todo: convert this to list comprehension? and tidy it up
+        for coord, pixel in self.frame_buffer_access.removed_entity_buffer.items():
+            new_pixel = self.frame_buffer_access.motion_blur.run_shader(pixel)
+            if new_pixel:
+                self.frame_buffer_access.write_to_render_plane(coord, new_pixel)
+                self.frame_buffer_access.write_to_removed_entity_buffer(coord, new_pixel)
+
+    def removed_object_colour_pass(self):
+        """
+        Adds the removed entity buffer to the render plane.
+        :return:
+        """
+        [self.frame_buffer_access.write_to_removed_entity_buffer(coord, pixel) for coord, pixel in
+         self.world_space_access.return_world_space(2).items()]
+
+
+class FrameBufferInit(FrameBuffer):
+
+    def __init__(self, session_info):
+        super().__init__(session_info=session_info)
+
+        self.blank_pixel = (0.0, 0.0, 0.0)
+
+        self.removed_entity_buffer = {}
+
+        # WARNING: be careful with these, it can cause flashing images
+        # self.shader_stack.multi_shader_creator(input_shader=FullScreenPatternShader, number_of_shaders=4, base_number=3,
+        #                                        base_addition=16, base_rgb=(1.25, 0.0, 0.0))
+        # self.shader_stack.add_to_shader_stack(
+        #     FullScreenPatternShader(count_number_max=445, shader_colour=(0.0, 1.25, 0.0)))
+        # self.shader_stack.add_to_shader_stack(
+        #     FullScreenPatternShader(count_number_max=31, shader_colour=(0.0, 0.0, 1.25)))
+
+        # self.shader_stack.add_to_shader_stack(
+        #     FullScreenPatternShader(count_number_max=7, shader_colour=(0.7, 0.05, 0.001)))
+
+        self.motion_blur.shader_colour = (0.0, 0.0, 0.0)
+        self.motion_blur.static_shader_alpha = 0.9
+        self.motion_blur.float_clip_min = 0.001
+
+        self.lighting.shader_colour = (10.0, 10.0, 10.0)
+        self.lighting.light_strength = 10.0
+        self.lighting.moving_light = False
+        self.lighting.light_position = (32, 32)
+
+    def write_to_removed_entity_buffer(self, pixel_coord, pixel_rgb):
+        """
+        Writes to the removed entity buffer.
+        :param pixel_coord:
+        :param pixel_rgb:
+        :return:
+        """
+        self.removed_entity_buffer[pixel_coord] = pixel_rgb
@@ -0,0 +1,155 @@
+import atexit
+import logging
+import os
+import queue
+import struct
+import zlib
+from threading import Lock, Thread
+
+logger = logging.getLogger("frame-recorder-logger")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png_chunk(chunk_type, data):
+    """
+    Build a PNG chunk, its length, type, data and CRC.
+    :param chunk_type:
+    :param data:
+    :return:
+    """
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def encode_png(width, height, pixels):
+    """
+    Encode RGB24 pixels as an 8 bit truecolour PNG.
+    :param width:
+    :param height:
+    :param pixels: RGB24 bytes, row by row from the top left
+    :return:
+    """
+    row_size = width * 3
+    # every row starts with its filter type, 0 for no filter
+    scanlines = b"".join(b"\x00" + pixels[row * row_size:(row + 1) * row_size] for row in range(height))
+
+    return (PNG_SIGNATURE
+            + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + png_chunk(b"IDAT", zlib.compress(scanlines, 6))
+            + png_chunk(b"IEND", b""))
+
+
+class FrameRecorder:
+    def __init__(self, path, width, height, frame_format="raw", every=1, queue_size=64, workers=2):
+        """
+        Records frames off the render loop; frames wait in a bounded queue for worker threads to write them and are
+        dropped and counted if the queue is full, so recording never holds up the simulation.
+        :param path: file or pipe to write raw RGB24 frames to, or a directory to write a PNG sequence to
+        :param width:
+        :param height:
+        :param frame_format: raw or png
+        :param every: record every nth frame shown
+        :param queue_size: frames that can be waiting to be written before new ones are dropped
+        :param workers: threads encoding PNGs, raw frames are always written by a single thread to keep them in order
+        """
+        self.path = path
+        self.width = width
+        self.height = height
+        self.frame_format = frame_format
+        self.every = every
+
+        self.frames_shown = 0
+        self.frames_recorded = 0
+        self.frames_dropped = 0
+        self.count_lock = Lock()
+
+        self.pending = queue.Queue(maxsize=queue_size)
+
+        if frame_format == "raw":
+            self.output = open(path, "wb")
+            worker_targets = [self.write_raw_frames]
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.output = None
+            worker_targets = [self.write_png_frames] * max(1, workers)
+
+        self.workers = [Thread(target=worker_target, daemon=True) for worker_target in worker_targets]
+        for worker in self.workers:
+            worker.start()
+
+        atexit.register(self.close)
+
+        logger.info(f"Recording every {every} frame(s) of {width}x{height} as {frame_format} to {path}")
+
+    def capture(self, pixels):
+        """
+        Queue a frame to be written, called by the render loop each time a frame is shown.
+        :param pixels: RGB24 bytes of the frame
+        :return:
+        """
+        self.frames_shown += 1
+        if self.frames_shown % self.every:
+            return
+
+        try:
+            self.pending.put_nowait((self.frames_shown // self.every, pixels))
+        except queue.Full:
+            self.frames_dropped += 1
+            if self.frames_dropped % 1000 == 1:
+                logger.info(f"Frame recorder falling behind, {self.frames_dropped} frame(s) dropped so far")
+
+    def write_raw_frames(self):
+        """
+        Write queued frames to the raw output in the order they were shown.
+        :return:
+        """
+        while True:
+            frame = self.pending.get()
+            if frame is None:
+                self.output.close()
+                return
+
+            try:
+                self.output.write(frame[1])
+            except (BrokenPipeError, ValueError):
+                logger.info("Frame recorder output closed, stopping recording")
+                return
+            self.count_recorded()
+
+    def write_png_frames(self):
+        """
+        Encode and write queued frames as numbered PNG files.
+        :return:
+        """
+        while True:
+            frame = self.pending.get()
+            if frame is None:
+                return
+
+            frame_number, pixels = frame
+            with open(os.path.join(self.path, f"frame_{frame_number:08d}.png"), "wb") as png_file:
+                png_file.write(encode_png(self.width, self.height, pixels))
+            self.count_recorded()
+
+    def count_recorded(self):
+        """
+        Count a frame as written, workers can finish frames at the same time.
+        :return:
+        """
+        with self.count_lock:
+            self.frames_recorded += 1
+
+    def close(self):
+        """
+        Write out the frames still queued and stop the workers.
+        :return:
+        """
+        if not any(worker.is_alive() for worker in self.workers):
+            return
+
+        for _ in self.workers:
+            self.pending.put(None)
+        for worker in self.workers:
+            worker.join()
+
+        logger.info(f"Frame recorder wrote {self.frames_recorded} frame(s) and dropped {self.frames_dropped}")
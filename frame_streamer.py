@@ -0,0 +1,419 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import struct
+import zlib
+from threading import Condition, Lock, Thread
+from time import monotonic, sleep
+
+import numpy as np
+
+logger = logging.getLogger("frame-streamer-logger")
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# every message starts with its type, the frame sequence number and the frame width and height, followed by a zlib
+# compressed payload; keyframes hold every pixel as RGB24, deltas hold (big endian uint32 pixel index, r, g, b) for
+# each pixel that changed since the last frame the client was sent
+MESSAGE_HEADER = struct.Struct(">cIHH")
+KEYFRAME = b"K"
+DELTA = b"D"
+DELTA_PIXEL = np.dtype([("index", ">u4"), ("rgb", "u1", 3)])
+
+VIEWER_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Artificial Life</title>
+<style>body {margin: 0; background: #000;} canvas {width: 100vmin; height: 100vmin; image-rendering: pixelated;}</style>
+</head>
+<body>
+<canvas id="board"></canvas>
+<script>
+const canvas = document.getElementById("board");
+const context = canvas.getContext("2d");
+let image = null;
+let decoding = Promise.resolve();
+
+async function inflate(payload) {
+    const stream = new Blob([payload]).stream().pipeThrough(new DecompressionStream("deflate"));
+    return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+async function showMessage(message) {
+    const header = new DataView(message, 0, 9);
+    const type = String.fromCharCode(header.getUint8(0));
+    const width = header.getUint16(5);
+    const height = header.getUint16(7);
+    const pixels = await inflate(message.slice(9));
+    if (type === "K") {
+        canvas.width = width;
+        canvas.height = height;
+        image = context.createImageData(width, height);
+        for (let pixel = 0; pixel < width * height; pixel++) {
+            image.data.set(pixels.subarray(pixel * 3, pixel * 3 + 3), pixel * 4);
+            image.data[pixel * 4 + 3] = 255;
+        }
+    } else if (image !== null) {
+        const changes = new DataView(pixels.buffer);
+        for (let offset = 0; offset < pixels.length; offset += 7) {
+            const pixel = changes.getUint32(offset);
+            image.data.set(pixels.subarray(offset + 4, offset + 7), pixel * 4);
+        }
+    }
+    if (image !== null) {
+        context.putImageData(image, 0, 0);
+    }
+}
+
+function connect() {
+    const socket = new WebSocket(`ws://${location.host}/stream`);
+    socket.binaryType = "arraybuffer";
+    socket.onmessage = (event) => { decoding = decoding.then(() => showMessage(event.data)); };
+    socket.onclose = () => setTimeout(connect, 1000);
+}
+
+connect();
+</script>
+</body>
+</html>
+"""
+
+
+class EncodedFrame:
+    def __init__(self, sequence, width, height, pixels):
+        """
+        A frame encoded once and shared between every client, the keyframe message and the delta messages from
+        earlier frames are only compressed the first time a client needs them.
+        :param sequence:
+        :param width:
+        :param height:
+        :param pixels: RGB24 bytes of the whole frame
+        """
+        self.sequence = sequence
+        self.width = width
+        self.height = height
+        self.pixels = pixels
+
+        self.keyframe_message = None
+        self.keyframe_lock = Lock()
+
+        # messages holding the changes from each earlier frame a client was last sent, by the earlier frame's sequence
+        # number, None where the client is better off with a keyframe
+        self.delta_messages = {}
+        self.delta_lock = Lock()
+
+    def keyframe(self):
+        """
+        Get the keyframe message for this frame, compressing it if no client has needed it yet.
+        :return:
+        """
+        with self.keyframe_lock:
+            if self.keyframe_message is None:
+                self.keyframe_message = MESSAGE_HEADER.pack(KEYFRAME, self.sequence, self.width, self.height) + \
+                                        zlib.compress(self.pixels, 6)
+            return self.keyframe_message
+
+    def delta(self, base_frame):
+        """
+        Get the message holding the changes from an earlier frame to this one, encoding it if no client has needed
+        it yet; clients sent the same earlier frame share the message.
+        :param base_frame: the frame the client was last sent
+        :return: the message, None if the frames are different sizes or the delta would be bigger than a keyframe
+        """
+        with self.delta_lock:
+            if base_frame.sequence not in self.delta_messages:
+                if (base_frame.width, base_frame.height) != (self.width, self.height):
+                    self.delta_messages[base_frame.sequence] = None
+                else:
+                    self.delta_messages[base_frame.sequence] = self.encode_delta(self.sequence, self.width,
+                                                                                 self.height, base_frame.pixels,
+                                                                                 self.pixels)
+            return self.delta_messages[base_frame.sequence]
+
+    @staticmethod
+    def encode_delta(sequence, width, height, previous_pixels, pixels):
+        """
+        Encode the pixels that changed between two frames, a delta that would be bigger than the whole frame is not
+        worth sending so None is returned and clients get a keyframe instead.
+        :param sequence:
+        :param width:
+        :param height:
+        :param previous_pixels:
+        :param pixels:
+        :return:
+        """
+        previous_rgb = np.frombuffer(previous_pixels, dtype=np.uint8).reshape(-1, 3)
+        current_rgb = np.frombuffer(pixels, dtype=np.uint8).reshape(-1, 3)
+
+        changed_indices = np.flatnonzero((previous_rgb != current_rgb).any(axis=1))
+        if len(changed_indices) * DELTA_PIXEL.itemsize >= len(pixels):
+            return None
+
+        changes = np.empty(len(changed_indices), dtype=DELTA_PIXEL)
+        changes["index"] = changed_indices
+        changes["rgb"] = current_rgb[changed_indices]
+
+        return MESSAGE_HEADER.pack(DELTA, sequence, width, height) + zlib.compress(changes.tobytes(), 6)
+
+
+class FrameEncoder:
+    def __init__(self, frame_source, fps, keyframe_interval):
+        """
+        Background worker that grabs frames from the frame source and encodes each one once for all clients.
+        :param frame_source: callable returning (width, height, RGB24 bytes)
+        :param fps: maximum frames encoded per second
+        :param keyframe_interval: number of frames between keyframes that are encoded whether a client needs one or not
+        """
+        self.frame_source = frame_source
+        self.frame_delay = 1 / fps
+        self.keyframe_interval = keyframe_interval
+
+        self.latest_frame = None
+        self.frame_ready = Condition()
+        self.frame_listeners = []
+
+    def start(self):
+        """
+        Start encoding frames on a background thread.
+        :return:
+        """
+        Thread(target=self.encode_loop, daemon=True).start()
+
+    def encode_loop(self):
+        """
+        Grab, encode and publish frames, unchanged frames are skipped. The delta from the frame before is encoded
+        here, as clients that keep up are sent it; clients that have fallen behind have theirs encoded when needed.
+        :return:
+        """
+        previous_frame = None
+        sequence = 0
+
+        while True:
+            next_frame = monotonic() + self.frame_delay
+
+            width, height, pixels = self.frame_source()
+
+            if previous_frame is None or pixels != previous_frame.pixels or \
+                    (width, height) != (previous_frame.width, previous_frame.height):
+                sequence += 1
+
+                frame = EncodedFrame(sequence, width, height, pixels)
+                if previous_frame is not None:
+                    frame.delta(previous_frame)
+                if sequence % self.keyframe_interval == 0:
+                    frame.keyframe()
+
+                with self.frame_ready:
+                    self.latest_frame = frame
+                    self.frame_ready.notify_all()
+
+                for listener in self.frame_listeners:
+                    listener(frame)
+
+                previous_frame = frame
+
+            sleep(max(0.0, next_frame - monotonic()))
+
+
+class FrameStreamServer:
+    def __init__(self, frame_encoder, port, host="127.0.0.1", min_fps=1):
+        """
+        HTTP server with a viewer page at / and a WebSocket frame stream at /stream. Each client is sent frames as fast
+        as its connection keeps up with, up to the encoder's frame rate, skipping frames to catch up.
+        :param frame_encoder:
+        :param port:
+        :param host:
+        :param min_fps: slowest frame rate a client falls back to when its connection can't keep up
+        """
+        self.frame_encoder = frame_encoder
+        self.port = port
+        self.host = host
+        self.max_frame_delay = 1 / min_fps
+
+        self.loop = None
+        self.new_frame = None
+        self.client_count = 0
+
+    def start(self):
+        """
+        Start the encoder and the server on their own threads.
+        :return:
+        """
+        self.frame_encoder.frame_listeners.append(self.on_frame)
+        self.frame_encoder.start()
+        Thread(target=asyncio.run, args=(self.serve(),), daemon=True).start()
+
+    def on_frame(self, frame):
+        """
+        Called on the encoder thread for every new frame, wakes up the clients waiting on the event loop.
+        :param frame:
+        :return:
+        """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.wake_clients)
+
+    def wake_clients(self):
+        """
+        Wake every client waiting for a new frame.
+        :return:
+        """
+        self.new_frame.set()
+        self.new_frame = asyncio.Event()
+
+    async def serve(self):
+        """
+        Listen for clients until the program ends.
+        :return:
+        """
+        self.loop = asyncio.get_running_loop()
+        self.new_frame = asyncio.Event()
+
+        server = await asyncio.start_server(self.handle_client, host=self.host, port=self.port)
+        logger.info(f"Frame stream viewer at http://{self.host}:{self.port}/")
+
+        async with server:
+            await server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        """
+        Serve the viewer page, or upgrade to a WebSocket and stream frames.
+        :param reader:
+        :param writer:
+        :return:
+        """
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                header_line = (await reader.readline()).decode("latin-1").strip()
+                if not header_line:
+                    break
+                name, _, value = header_line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if len(request_line) < 2 or request_line[0] != "GET":
+                await self.send_http(writer, "405 Method Not Allowed", "text/plain", b"Only GET is supported\n")
+            elif request_line[1] == "/":
+                await self.send_http(writer, "200 OK", "text/html", VIEWER_PAGE.encode())
+            elif request_line[1] == "/stream" and headers.get("upgrade", "").lower() == "websocket":
+                await self.stream_frames(reader, writer, headers["sec-websocket-key"])
+            else:
+                await self.send_http(writer, "404 Not Found", "text/plain", b"Not found\n")
+        except (ConnectionError, KeyError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def send_http(writer, status, content_type, body):
+        """
+        Send a plain HTTP response.
+        :param writer:
+        :param status:
+        :param content_type:
+        :param body:
+        :return:
+        """
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def stream_frames(self, reader, writer, websocket_key):
+        """
+        Complete the WebSocket handshake then send frames until the client goes away.
+        :param reader:
+        :param writer:
+        :param websocket_key:
+        :return:
+        """
+        accept_key = base64.b64encode(hashlib.sha1((websocket_key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Accept: {accept_key}\r\n\r\n".encode())
+        await writer.drain()
+
+        self.client_count += 1
+        logger.info(f"Frame stream client connected, {self.client_count} watching")
+
+        sender = asyncio.ensure_future(self.send_frames(writer))
+        try:
+            await self.wait_for_close(reader)
+        finally:
+            sender.cancel()
+            self.client_count -= 1
+            logger.info(f"Frame stream client disconnected, {self.client_count} watching")
+
+    async def send_frames(self, writer):
+        """
+        Send each new frame to a client, as a delta from the last frame the client was sent, so a client that skips
+        frames still gets deltas; a keyframe is only sent first, or when the delta would be bigger than it. The delay
+        between frames doubles when sending falls behind and eases back down while sending keeps up.
+        :param writer:
+        :return:
+        """
+        min_frame_delay = self.frame_encoder.frame_delay
+        frame_delay = min_frame_delay
+        last_frame = None
+
+        while True:
+            frame = self.frame_encoder.latest_frame
+            if frame is None or frame is last_frame:
+                await self.new_frame.wait()
+                continue
+
+            message = None
+            if last_frame is not None:
+                # the delta from the frame before is already encoded for clients that are keeping up
+                message = frame.delta_messages.get(last_frame.sequence)
+                if message is None and last_frame.sequence not in frame.delta_messages:
+                    message = await self.loop.run_in_executor(None, frame.delta, last_frame)
+            if message is None:
+                message = await self.loop.run_in_executor(None, frame.keyframe)
+
+            send_start = monotonic()
+            writer.write(self.websocket_frame(message))
+            await writer.drain()
+            send_time = monotonic() - send_start
+            last_frame = frame
+
+            if send_time > frame_delay:
+                frame_delay = min(frame_delay * 2, self.max_frame_delay)
+            elif send_time < frame_delay / 4:
+                frame_delay = max(frame_delay * 0.8, min_frame_delay)
+
+            await asyncio.sleep(max(0.0, frame_delay - send_time))
+
+    @staticmethod
+    async def wait_for_close(reader):
+        """
+        Read and discard frames from the client until it closes the connection.
+        :param reader:
+        :return:
+        """
+        while True:
+            header = await reader.readexactly(2)
+            opcode = header[0] & 0x0F
+            length = header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", await reader.readexactly(8))[0]
+            if header[1] & 0x80:
+                length += 4
+            await reader.readexactly(length)
+            if opcode == 0x8:
+                return
+
+    @staticmethod
+    def websocket_frame(message):
+        """
+        Wrap a message in an unmasked binary WebSocket frame.
+        :param message:
+        :return:
+        """
+        if len(message) < 126:
+            header = struct.pack(">BB", 0x82, len(message))
+        elif len(message) < 1 << 16:
+            header = struct.pack(">BBH", 0x82, 126, len(message))
+        else:
+            header = struct.pack(">BBQ", 0x82, 127, len(message))
+        return header + message
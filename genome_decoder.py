@@ -0,0 +1,222 @@
+from math import floor
+
+# splitmix64 constants, each life seed is hashed into a stream of independent draws so a batch of genomes can be
+# decoded with array operations, while the same life seeds still always give the same traits
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+MIX_MULTIPLIER_1 = 0xBF58476D1CE4E5B9
+MIX_MULTIPLIER_2 = 0x94D049BB133111EB
+
+SEED_MASK = 0xFFFFFFFFFFFFFFFF
+
+# smaller batches, like a single bred life form, are decoded one genome at a time in plain Python, as setting up the
+# array operations costs more than they save; numpy is only imported once a batch is big enough to need it
+MIN_ARRAY_BATCH = 16
+
+
+def fold_seed(seed):
+    """
+    Fold a life seed of any size down into 64 bits by xor-ing its 64 bit chunks together.
+    :param seed:
+    :return:
+    """
+    folded_seed = 0
+    while seed:
+        folded_seed ^= seed & SEED_MASK
+        seed >>= 64
+    return folded_seed
+
+
+def uniform_draws(seeds, draw_count):
+    """
+    Get a number of uniform draws between 0 and 1 for each life seed, draw n of a seed is the splitmix64 hash of the
+    seed advanced n + 1 times.
+    :param seeds:
+    :param draw_count:
+    :return: array with a row of draws per seed
+    """
+    import numpy as np
+
+    folded_seeds = np.array([fold_seed(seed) for seed in seeds], dtype=np.uint64)
+    draw_offsets = np.arange(1, draw_count + 1, dtype=np.uint64) * np.uint64(GOLDEN_GAMMA)
+
+    mixed = folded_seeds[:, None] + draw_offsets[None, :]
+    mixed = (mixed ^ (mixed >> np.uint64(30))) * np.uint64(MIX_MULTIPLIER_1)
+    mixed = (mixed ^ (mixed >> np.uint64(27))) * np.uint64(MIX_MULTIPLIER_2)
+    mixed ^= mixed >> np.uint64(31)
+
+    return (mixed >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+def seed_draws(seed, draw_count):
+    """
+    Get a number of uniform draws between 0 and 1 for one life seed, the same draws uniform_draws gives it.
+    :param seed:
+    :param draw_count:
+    :return: list of draws
+    """
+    folded_seed = fold_seed(seed)
+    draws = []
+    for draw_number in range(1, draw_count + 1):
+        mixed = (folded_seed + draw_number * GOLDEN_GAMMA) & SEED_MASK
+        mixed = ((mixed ^ (mixed >> 30)) * MIX_MULTIPLIER_1) & SEED_MASK
+        mixed = ((mixed ^ (mixed >> 27)) * MIX_MULTIPLIER_2) & SEED_MASK
+        mixed ^= mixed >> 31
+        draws.append((mixed >> 11) * (1.0 / (1 << 53)))
+    return draws
+
+
+def scaled_draws(draws, maximum):
+    """
+    Scale draws between 0 and 1 up to whole numbers between 0 and the maximum.
+    :param draws:
+    :param maximum:
+    :return:
+    """
+    import numpy as np
+
+    return np.floor(maximum * draws).astype(np.int64)
+
+
+def choice_draws(draws, choices):
+    """
+    Use draws between 0 and 1 to pick from a sequence of choices.
+    :param draws:
+    :param choices:
+    :return:
+    """
+    import numpy as np
+
+    return np.array(choices, dtype=object)[(draws * len(choices)).astype(np.int64)]
+
+
+def divide_if_nonzero(values, divisors):
+    """
+    Divide the values by the divisors, leaving values with a divisor of 0 as they are, whole numbers like the rest of
+    the traits.
+    :param values:
+    :param divisors:
+    :return: list of the divided values
+    """
+    return [value / divisor if divisor != 0 else value for value, divisor in zip(values.tolist(), divisors.tolist())]
+
+
+def decode_genome(genome, max_attribute, max_enemy_factor, max_movement, wall_chance_multiplier, float_colours,
+                  directions, surrounding_point_choices):
+    """
+    Decode the traits of a single genome, giving the same traits decode_genomes does for it in a batch.
+    :param genome: (life seed 1, life seed 2, life seed 3)
+    :param max_attribute:
+    :param max_enemy_factor:
+    :param max_movement:
+    :param wall_chance_multiplier:
+    :param float_colours:
+    :param directions:
+    :param surrounding_point_choices:
+    :return: a dictionary of traits
+    """
+    seed, seed2, seed3 = genome
+    draws = seed_draws(seed, 8)
+    draws2 = seed_draws(seed2, 8)
+    draws3 = seed_draws(seed3, 6)
+
+    if float_colours:
+        colours = draws[0], draws2[0], draws3[0]
+    else:
+        colours = floor(256 * draws[0]), floor(256 * draws2[0]), floor(256 * draws3[0])
+
+    friend_factor = floor(max_enemy_factor * draws[2])
+    forgetfulness = floor(128 * draws[7])
+    wall_factor = floor(wall_chance_multiplier * draws2[6])
+    breed_threshold = floor(max_attribute * draws2[1])
+    memory_max = floor(max_attribute * draws2[7])
+    time_to_build = floor(max_attribute * draws3[5])
+
+    return {
+        'red_color': colours[0],
+        'aggression_factor': floor(max_attribute * draws[1]),
+        'friend_factor': friend_factor,
+        'weight': floor(max_attribute * draws[3]),
+        'preferred_breed_direction': surrounding_point_choices[int(draws[4] * len(surrounding_point_choices))],
+        'momentum': floor(max_movement * draws[5]),
+        'rebel': draws[6] < .5,
+        'forgetfulness': forgetfulness,
+        'green_color': colours[1],
+        'breed_threshold': breed_threshold / friend_factor if friend_factor != 0 else breed_threshold,
+        'time_to_move': floor(max_movement * draws2[2]),
+        'combine_threshold': floor(max_attribute * draws2[3]),
+        'bouncy': draws2[4] < .5,
+        'builder': draws2[5] < .5,
+        'wall_factor': wall_factor,
+        'memory_max': memory_max / forgetfulness if forgetfulness != 0 else memory_max,
+        'blue_color': colours[2],
+        'time_to_live': floor(max_attribute * draws3[1]),
+        'strength': floor(max_attribute * draws3[2]),
+        'compatibility_factor': floor(max_attribute * draws3[3]),
+        'direction': directions[int(draws3[4] * len(directions))],
+        'time_to_build': time_to_build / wall_factor if wall_factor != 0 else time_to_build,
+    }
+
+
+def decode_genomes(genomes, max_attribute, max_enemy_factor, max_movement, wall_chance_multiplier, float_colours,
+                   directions, surrounding_point_choices):
+    """
+    Decode the traits of a batch of genomes at once, or a genome at a time for small batches. Life seed 1 controls red
+    colour, aggression, friendliness, weight, preferred breed direction, momentum, rebellion and forgetfulness; life
+    seed 2 controls green colour, breed threshold, time to move, combine threshold, bounciness, building and memory;
+    life seed 3 controls blue colour, lifespan, strength, compatibility, starting direction and time to build.
+    :param genomes: sequence of (life seed 1, life seed 2, life seed 3)
+    :param max_attribute:
+    :param max_enemy_factor:
+    :param max_movement:
+    :param wall_chance_multiplier:
+    :param float_colours: whether colours are floats between 0 and 1 (pixel composer) or whole numbers up to 255
+    :param directions:
+    :param surrounding_point_choices:
+    :return: a dictionary of traits for each genome
+    """
+    if len(genomes) < MIN_ARRAY_BATCH:
+        return [decode_genome(genome, max_attribute, max_enemy_factor, max_movement, wall_chance_multiplier,
+                              float_colours, directions, surrounding_point_choices) for genome in genomes]
+
+    seeds, seeds2, seeds3 = zip(*genomes)
+    draws = uniform_draws(seeds, 8)
+    draws2 = uniform_draws(seeds2, 8)
+    draws3 = uniform_draws(seeds3, 6)
+
+    if float_colours:
+        colours = draws[:, 0], draws2[:, 0], draws3[:, 0]
+    else:
+        colours = scaled_draws(draws[:, 0], 256), scaled_draws(draws2[:, 0], 256), scaled_draws(draws3[:, 0], 256)
+
+    friend_factor = scaled_draws(draws[:, 2], max_enemy_factor)
+    forgetfulness = scaled_draws(draws[:, 7], 128)
+    wall_factor = scaled_draws(draws2[:, 6], wall_chance_multiplier)
+
+    traits = {
+        'red_color': colours[0],
+        'aggression_factor': scaled_draws(draws[:, 1], max_attribute),
+        'friend_factor': friend_factor,
+        'weight': scaled_draws(draws[:, 3], max_attribute),
+        'preferred_breed_direction': choice_draws(draws[:, 4], surrounding_point_choices),
+        'momentum': scaled_draws(draws[:, 5], max_movement),
+        'rebel': draws[:, 6] < .5,
+        'forgetfulness': forgetfulness,
+        'green_color': colours[1],
+        'breed_threshold': divide_if_nonzero(scaled_draws(draws2[:, 1], max_attribute), friend_factor),
+        'time_to_move': scaled_draws(draws2[:, 2], max_movement),
+        'combine_threshold': scaled_draws(draws2[:, 3], max_attribute),
+        'bouncy': draws2[:, 4] < .5,
+        'builder': draws2[:, 5] < .5,
+        'wall_factor': wall_factor,
+        'memory_max': divide_if_nonzero(scaled_draws(draws2[:, 7], max_attribute), forgetfulness),
+        'blue_color': colours[2],
+        'time_to_live': scaled_draws(draws3[:, 1], max_attribute),
+        'strength': scaled_draws(draws3[:, 2], max_attribute),
+        'compatibility_factor': scaled_draws(draws3[:, 3], max_attribute),
+        'direction': choice_draws(draws3[:, 4], directions),
+        'time_to_build': divide_if_nonzero(scaled_draws(draws3[:, 5], max_attribute), wall_factor),
+    }
+
+    trait_names = tuple(traits)
+    return [dict(zip(trait_names, row)) for row in zip(*(trait if isinstance(trait, list) else trait.tolist()
+                                                          for trait in traits.values()))]
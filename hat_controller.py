@@ -1,72 +1,73 @@
+import importlib
+import importlib.util
 import logging
 
 logger = logging.getLogger("hat-controller-logger")
 
 
-class UnicornHATController:
-    def __init__(self, screen_type, simulator, custom_size_simulator, led_brightness):
-        self.simulator_refresh = False
+# the library for each HAT model, only the one in use is imported
+HAT_LIBRARIES = {
+    "SD": "unicornhat",
+    "HD": "unicornhathd",
+    "MINI": "unicornhatmini",
+}
+
+# the size of each HAT model, for simulating it
+HAT_SHAPES = {
+    "SD": (8, 8),
+    "HD": (16, 16),
+    "MINI": (17, 7),
+}
+
 
-        try:
-            import unicornhat as unicorn
-            import unicornhathd as unicornhd
-            from unicornhatmini import UnicornHATMini
+def simulated_hat_shape(screen_type, simulator, custom_size_simulator):
+    """
+    Work out whether a HAT is simulated, which it is if the simulator is asked for, if it is a custom size and there is
+    no HAT HD to fall back on, or if the HAT's library is not installed
+    :param screen_type:
+    :param simulator:
+    :param custom_size_simulator:
+    :return: the size of the simulated HAT, or None if there is a HAT to drive
+    """
+    if screen_type == "CUSTOM":
+        if not simulator and importlib.util.find_spec(HAT_LIBRARIES["HD"]) is not None:
+            logger.info("Custom mode set without simulator mode on, defaulting to HD physical HAT")
+            return None
+        return tuple(custom_size_simulator)
+
+    if not simulator:
+        if importlib.util.find_spec(HAT_LIBRARIES[screen_type]) is not None:
             print("Unicorn HAT install found, using Unicorn HAT")
-        except ImportError or ModuleNotFoundError:
-            try:
-                from unicorn_hat_sim import UnicornHatSim
-                from unicorn_hat_sim import unicornhat as unicorn
-                from unicorn_hat_sim import unicornhathd as unicornhd
-                from unicorn_hat_sim import unicornphat as UnicornHATMini
-                print("Unicorn HAT install not found, using Simulated Unicorn HAT")
-            except ModuleNotFoundError:
-                pass
-        except:
-            pass
+            return None
+        print("Unicorn HAT install not found, using Simulated Unicorn HAT")
 
-            self.simulator_refresh = True
+    return HAT_SHAPES[screen_type]
 
-        if simulator:
-            from unicorn_hat_sim import UnicornHatSim
 
-            from unicorn_hat_sim import unicornhat as unicorn
-            from unicorn_hat_sim import unicornhathd as unicornhd
-            from unicorn_hat_sim import unicornphat as UnicornHATMini
+class UnicornHATController:
+    def __init__(self, screen_type, led_brightness):
+        if screen_type == "CUSTOM":
+            screen_type = "HD"
 
-            self.simulator_refresh = True
+        library = importlib.import_module(HAT_LIBRARIES[screen_type])
 
         if screen_type == "MINI":
             # unicorn hat mini setup
-            # todo: figure out why this doesn't work with the phat simulator
-            try:
-                self.screen = UnicornHATMini()
-                self.screen.set_brightness(led_brightness)
-                self.screen.set_rotation(0)
-            except TypeError:
-                self.screen = UnicornHATMini
+            self.screen = library.UnicornHATMini()
+            self.screen.set_brightness(led_brightness)
+            self.screen.set_rotation(0)
         elif screen_type == "SD":
             # unicorn hat + unicorn hat hd setup
+            self.screen = library
             self.screen.set_layout(self.screen.AUTO)
             self.screen.brightness(led_brightness)
             self.screen.rotation(0)
         elif screen_type == "HD":
             # unicorn hat + unicorn hat hd setup
-            self.screen = unicornhd
+            self.screen = library
             self.screen.set_layout(self.screen.AUTO)
             self.screen.brightness(led_brightness)
             self.screen.rotation(270)
-        elif screen_type == "CUSTOM":
-            # unicorn hat + unicorn hat hd setup
-            try:
-                self.screen = UnicornHatSim(custom_size_simulator[0], custom_size_simulator[1], 180)
-            except NameError:
-                logger.info(f"Custom mode set without simulator mode on, defaulting to HD physical HAT")
-                self.screen = unicornhd
-                screen_type = "HD"
-            self.screen.set_layout(self.screen.AUTO)
-            self.screen.brightness(led_brightness)
-            self.screen.rotation(0)
-            self.simulator_refresh = True
 
     def get_shape(self):
         """
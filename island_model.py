@@ -0,0 +1,89 @@
+import logging
+import multiprocessing
+import queue
+
+logger = logging.getLogger("island-model-logger")
+
+
+class IslandLinks:
+    def __init__(self, island_count, queue_size):
+        """
+        The queues between islands; each island has an inbox of migrant genomes, filled by the island before it in a
+        ring, and every island reports its progress to the first island.
+        :param island_count:
+        :param queue_size: batches of migrants an inbox holds before new batches are dropped
+        """
+        self.island_count = island_count
+
+        self.fork_context = multiprocessing.get_context("fork")
+        self.inboxes = [self.fork_context.Queue(maxsize=queue_size) for _ in range(island_count)]
+        self.reports = self.fork_context.Queue()
+
+    def start_islands(self, island_target):
+        """
+        Fork a process for every island but the first, which is run by the current process.
+        :param island_target: function run in each forked island, called with the island's index
+        :return:
+        """
+        for island_index in range(1, self.island_count):
+            self.fork_context.Process(target=island_target, args=(island_index,), daemon=True).start()
+        logger.info(f"Started {self.island_count - 1} island processes")
+
+    def send_migrants(self, island_index, genomes):
+        """
+        Send a batch of genomes to the next island in the ring.
+        :param island_index: index of the sending island
+        :param genomes:
+        :return: whether the batch was sent, it is dropped if the next island's inbox is full
+        """
+        try:
+            self.inboxes[(island_index + 1) % self.island_count].put_nowait(genomes)
+            return True
+        except queue.Full:
+            return False
+
+    def receive_migrants(self, island_index):
+        """
+        Take every genome waiting in an island's inbox.
+        :param island_index:
+        :return:
+        """
+        genomes = []
+        while True:
+            try:
+                genomes.extend(self.inboxes[island_index].get_nowait())
+            except queue.Empty:
+                return genomes
+
+    def send_report(self, report):
+        """
+        Send an island's progress report to the first island.
+        :param report:
+        :return:
+        """
+        self.reports.put(report)
+
+    def receive_reports(self):
+        """
+        Take every report waiting for the first island.
+        :return:
+        """
+        reports = []
+        while True:
+            try:
+                reports.append(self.reports.get_nowait())
+            except queue.Empty:
+                return reports
+
+
+def island_setting(settings, island_index, default):
+    """
+    Get an island's value of a per island setting, the settings are used in turn if there are fewer than islands.
+    :param settings: list of values, or None to use the default on every island
+    :param island_index:
+    :param default:
+    :return:
+    """
+    if not settings:
+        return default
+    return settings[island_index % len(settings)]
@@ -0,0 +1,231 @@
+import heapq
+import logging
+from array import array
+from operator import itemgetter
+
+logger = logging.getLogger("lineage-store-logger")
+
+# marks a missing parent, child or sibling in the slot columns
+NO_SLOT = -1
+
+
+class LineageStore:
+    def __init__(self):
+        """
+        Records the ancestry of life forms in array backed columns, one slot per recorded life form. Every life form is
+        descended from the parent that bred it, a founder (a life form spawned rather than bred) starts a clade and
+        its descendants belong to the same clade.
+
+        Extinct branches are pruned as life forms die: a dead life form with no recorded descendants is removed, and a
+        dead life form with a single recorded descendant is spliced out of the tree, its descendant taking its place
+        under its own parent. Only the branch points between the living life forms are kept, so the store never holds
+        more than about twice the peak population and freed slots are reused for new births.
+        """
+        self.life_form_ids = array('q')
+        self.partner_ids = array('q')
+        self.generations = array('I')
+        self.clade_ids = array('q')
+        self.alive = array('B')
+
+        # the tree, as a parent per slot and a doubly linked list of the children of each slot
+        self.parent_slots = array('i')
+        self.child_counts = array('I')
+        self.first_child_slots = array('i')
+        self.next_sibling_slots = array('i')
+        self.previous_sibling_slots = array('i')
+
+        self.free_slots = array('i')
+        self.slots = {}
+        self.clade_sizes = {}
+
+        self.births_recorded = 0
+        self.entries_pruned = 0
+
+    def clear(self):
+        """
+        Forget every recorded life form, for when the board is started again.
+        :return:
+        """
+        self.__init__()
+
+    def allocate_slot(self):
+        """
+        Get a slot for a new life form, reusing a pruned one if there is one.
+        :return:
+        """
+        if self.free_slots:
+            return self.free_slots.pop()
+
+        for column in (self.life_form_ids, self.partner_ids, self.generations, self.clade_ids, self.alive,
+                       self.child_counts):
+            column.append(0)
+        for column in (self.parent_slots, self.first_child_slots, self.next_sibling_slots,
+                       self.previous_sibling_slots):
+            column.append(NO_SLOT)
+        return len(self.life_form_ids) - 1
+
+    def record_birth(self, life_form_id, parent_id=None, partner_id=None):
+        """
+        Record a new life form, a life form without a recorded parent is the founder of a new clade.
+        :param life_form_id:
+        :param parent_id: the life form that bred it
+        :param partner_id: the life form it was bred with
+        :return:
+        """
+        parent_slot = self.slots.get(parent_id, NO_SLOT)
+        slot = self.allocate_slot()
+
+        self.life_form_ids[slot] = life_form_id
+        self.partner_ids[slot] = NO_SLOT if partner_id is None else partner_id
+        self.alive[slot] = 1
+        self.child_counts[slot] = 0
+        self.first_child_slots[slot] = NO_SLOT
+        self.previous_sibling_slots[slot] = NO_SLOT
+
+        if parent_slot == NO_SLOT:
+            self.generations[slot] = 0
+            self.clade_ids[slot] = life_form_id
+            self.next_sibling_slots[slot] = NO_SLOT
+        else:
+            self.generations[slot] = self.generations[parent_slot] + 1
+            self.clade_ids[slot] = self.clade_ids[parent_slot]
+
+            # the new life form goes at the head of its parent's children
+            first_sibling_slot = self.first_child_slots[parent_slot]
+            self.next_sibling_slots[slot] = first_sibling_slot
+            if first_sibling_slot != NO_SLOT:
+                self.previous_sibling_slots[first_sibling_slot] = slot
+            self.first_child_slots[parent_slot] = slot
+            self.child_counts[parent_slot] += 1
+
+        self.parent_slots[slot] = parent_slot
+
+        self.slots[life_form_id] = slot
+        clade_id = self.clade_ids[slot]
+        self.clade_sizes[clade_id] = self.clade_sizes.get(clade_id, 0) + 1
+        self.births_recorded += 1
+
+    def record_death(self, life_form_id):
+        """
+        Record that a life form has died and prune the branches it was keeping.
+        :param life_form_id:
+        :return:
+        """
+        slot = self.slots.get(life_form_id)
+        if slot is None or not self.alive[slot]:
+            return
+
+        self.alive[slot] = 0
+
+        clade_id = self.clade_ids[slot]
+        self.clade_sizes[clade_id] -= 1
+        if self.clade_sizes[clade_id] == 0:
+            del self.clade_sizes[clade_id]
+            logger.debug(f"Clade {clade_id} is extinct")
+
+        self.prune(slot)
+
+    def prune(self, slot):
+        """
+        Remove a dead life form that no longer has any descendants recorded, then its parent if that leaves it the same;
+        a dead life form with a single descendant recorded is spliced out instead.
+        :param slot:
+        :return:
+        """
+        while slot != NO_SLOT and not self.alive[slot]:
+            parent_slot = self.parent_slots[slot]
+
+            if self.child_counts[slot] == 0:
+                self.unlink_slot(slot, NO_SLOT)
+                self.free_slot(slot)
+                if parent_slot != NO_SLOT:
+                    self.child_counts[parent_slot] -= 1
+                slot = parent_slot
+
+            elif self.child_counts[slot] == 1:
+                self.unlink_slot(slot, self.first_child_slots[slot])
+                self.free_slot(slot)
+                return
+
+            else:
+                return
+
+    def unlink_slot(self, slot, replacement_slot):
+        """
+        Take a slot out of its parent's children, putting a replacement slot in its place if there is one.
+        :param slot:
+        :param replacement_slot:
+        :return:
+        """
+        parent_slot = self.parent_slots[slot]
+        previous_slot = self.previous_sibling_slots[slot]
+        next_slot = self.next_sibling_slots[slot]
+
+        if replacement_slot != NO_SLOT:
+            self.parent_slots[replacement_slot] = parent_slot
+            self.previous_sibling_slots[replacement_slot] = previous_slot
+            self.next_sibling_slots[replacement_slot] = next_slot
+            previous_slot_target = next_slot_target = replacement_slot
+        else:
+            previous_slot_target = next_slot
+            next_slot_target = previous_slot
+
+        if previous_slot != NO_SLOT:
+            self.next_sibling_slots[previous_slot] = previous_slot_target
+        elif parent_slot != NO_SLOT:
+            self.first_child_slots[parent_slot] = previous_slot_target
+        if next_slot != NO_SLOT:
+            self.previous_sibling_slots[next_slot] = next_slot_target
+
+    def free_slot(self, slot):
+        """
+        Forget the life form in a slot and keep the slot for reuse.
+        :param slot:
+        :return:
+        """
+        del self.slots[self.life_form_ids[slot]]
+        self.parent_slots[slot] = NO_SLOT
+        self.free_slots.append(slot)
+        self.entries_pruned += 1
+
+    def ancestors(self, life_form_id):
+        """
+        Get the recorded ancestors of a life form, from its parent back to the oldest; ancestors that were spliced out
+        show up as gaps between the generations.
+        :param life_form_id:
+        :return: list of [life form id, generation, partner id, alive] for each ancestor
+        """
+        slot = self.slots.get(life_form_id)
+        if slot is None:
+            raise ValueError(f"No lineage recorded for life form {life_form_id}, it isn't a life form or its branch "
+                             f"has died out")
+
+        ancestors = []
+        slot = self.parent_slots[slot]
+        while slot != NO_SLOT:
+            partner_id = self.partner_ids[slot]
+            ancestors.append([self.life_form_ids[slot], self.generations[slot],
+                              None if partner_id == NO_SLOT else partner_id, bool(self.alive[slot])])
+            slot = self.parent_slots[slot]
+        return ancestors
+
+    def largest_clades(self, count=5):
+        """
+        Get the surviving clades with the most living life forms.
+        :param count:
+        :return: list of [founder id, living life forms] for each clade, largest first
+        """
+        return [list(clade) for clade in heapq.nlargest(count, self.clade_sizes.items(), key=itemgetter(1))]
+
+    def get_stats(self):
+        """
+        Get the size of the store.
+        :return:
+        """
+        return {
+            "lineage_births_recorded": self.births_recorded,
+            "lineage_entries": len(self.slots),
+            "lineage_slots": len(self.life_form_ids),
+            "lineage_entries_pruned": self.entries_pruned,
+            "surviving_clades": len(self.clade_sizes),
+        }
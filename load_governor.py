@@ -0,0 +1,183 @@
+import logging
+
+logger = logging.getLogger("load-governor-logger")
+
+
+class LoadGovernor:
+    def __init__(self, session, tick_budget, render_budget, pop_limit_floor, breed_chance_floor, render_every_ceiling,
+                 check_interval=30, headroom=0.7, settle_checks=3):
+        """
+        Holds the tick and render times within their budgets by adjusting the load. When ticks run over budget the
+        population limit is lowered, then the breeding chance; when frames run over budget only every nth frame is
+        rendered. Once the times drop back under the headroom share of their budgets for a few checks in a row the
+        limits are relaxed again a step at a time, in the reverse order.
+        :param session: session whose population cap, breed chance and render every are adjusted
+        :param tick_budget: seconds a tick of the logic loop should take at most
+        :param render_budget: seconds a frame should take to render at most
+        :param pop_limit_floor: lowest the population limit is taken
+        :param breed_chance_floor: lowest the chance of breeding on a collision is taken
+        :param render_every_ceiling: most frames that are skipped for each frame rendered, plus one
+        :param check_interval: ticks between checks
+        :param headroom: share of a budget the time has to be under before the limits are relaxed
+        :param settle_checks: checks in a row that have to be under the headroom before relaxing a step
+        """
+        self.session = session
+        self.tick_budget = tick_budget
+        self.render_budget = render_budget
+        self.pop_limit_floor = pop_limit_floor
+        self.breed_chance_floor = breed_chance_floor
+        self.render_every_ceiling = render_every_ceiling
+        self.check_interval = check_interval
+        self.headroom = headroom
+        self.settle_checks = settle_checks
+
+        self.tick_time_total = 0.0
+        self.ticks_timed = 0
+        self.render_time_total = 0.0
+        self.frames_timed = 0
+
+        self.tick_time = 0.0
+        self.render_time = 0.0
+        self.tick_settled_checks = 0
+        self.render_settled_checks = 0
+        self.adjustments = 0
+
+    def record_tick(self, tick_time, population, pop_limit):
+        """
+        Record how long a tick took, checking the load every check interval ticks.
+        :param tick_time: seconds
+        :param population: life forms on the board
+        :param pop_limit: the configured population limit
+        :return:
+        """
+        self.tick_time_total += tick_time
+        self.ticks_timed += 1
+        if self.ticks_timed >= self.check_interval:
+            self.check(population, pop_limit)
+
+    def record_render(self, render_time):
+        """
+        Record how long a frame took to render, called from the render loop.
+        :param render_time: seconds
+        :return:
+        """
+        self.render_time_total += render_time
+        self.frames_timed += 1
+
+    def render_pause(self, render_time):
+        """
+        Get how long the render loop should wait after a frame so only every nth frame is rendered, leaving the time
+        of the skipped frames to the logic loop.
+        :param render_time: seconds the frame took to render
+        :return:
+        """
+        return (self.session.render_every - 1) * render_time
+
+    def check(self, population, pop_limit):
+        """
+        Compare the mean tick and render times since the last check with their budgets and adjust the load.
+        :param population:
+        :param pop_limit:
+        :return:
+        """
+        self.tick_time = self.tick_time_total / self.ticks_timed
+        self.tick_time_total = 0.0
+        self.ticks_timed = 0
+
+        if self.tick_time > self.tick_budget:
+            self.tick_settled_checks = 0
+            self.shed_tick_load(population, pop_limit)
+        elif self.tick_time < self.tick_budget * self.headroom:
+            self.tick_settled_checks += 1
+            if self.tick_settled_checks >= self.settle_checks:
+                self.tick_settled_checks = 0
+                self.restore_tick_load(pop_limit)
+        else:
+            self.tick_settled_checks = 0
+
+        if self.frames_timed == 0:
+            return
+        self.render_time = self.render_time_total / self.frames_timed
+        self.render_time_total = 0.0
+        self.frames_timed = 0
+
+        if self.render_time > self.render_budget:
+            self.render_settled_checks = 0
+            if self.session.render_every < self.render_every_ceiling:
+                self.session.render_every += 1
+                self.log_adjustment(f"Frames taking {self.render_time * 1000:.1f}ms, over the "
+                                    f"{self.render_budget * 1000:.1f}ms budget, rendering every "
+                                    f"{self.session.render_every} frames")
+        elif self.render_time < self.render_budget * self.headroom:
+            self.render_settled_checks += 1
+            if self.render_settled_checks >= self.settle_checks and self.session.render_every > 1:
+                self.render_settled_checks = 0
+                self.session.render_every -= 1
+                self.log_adjustment(f"Frames back to {self.render_time * 1000:.1f}ms, rendering every "
+                                    f"{self.session.render_every} frames")
+        else:
+            self.render_settled_checks = 0
+
+    def shed_tick_load(self, population, pop_limit):
+        """
+        Lower the population limit, or the breeding chance once the population limit is at its floor.
+        :param population:
+        :param pop_limit:
+        :return:
+        """
+        current_limit = self.session.get_population_limit(pop_limit)
+        # start from the population rather than the limit, so a limit far above the population bites straight away
+        lowered_limit = max(self.pop_limit_floor, int(min(current_limit, population) * 0.8))
+
+        if lowered_limit < current_limit:
+            self.session.population_cap = lowered_limit
+            self.log_adjustment(f"Ticks taking {self.tick_time * 1000:.1f}ms, over the {self.tick_budget * 1000:.1f}ms "
+                                f"budget, population limit lowered to {lowered_limit}")
+        elif self.session.breed_chance > self.breed_chance_floor:
+            self.session.breed_chance = max(self.breed_chance_floor, self.session.breed_chance * 0.7)
+            self.log_adjustment(f"Ticks taking {self.tick_time * 1000:.1f}ms, over the {self.tick_budget * 1000:.1f}ms "
+                                f"budget, breeding chance lowered to {self.session.breed_chance:.2f}")
+
+    def restore_tick_load(self, pop_limit):
+        """
+        Raise the breeding chance, or the population limit once breeding is back to normal.
+        :param pop_limit:
+        :return:
+        """
+        if self.session.breed_chance < 1.0:
+            self.session.breed_chance = min(1.0, self.session.breed_chance / 0.7)
+            self.log_adjustment(f"Ticks back to {self.tick_time * 1000:.1f}ms, breeding chance raised to "
+                                f"{self.session.breed_chance:.2f}")
+        elif self.session.population_cap is not None:
+            raised_limit = int(self.session.population_cap * 1.25) + 1
+            if raised_limit >= pop_limit:
+                self.session.population_cap = None
+                self.log_adjustment(f"Ticks back to {self.tick_time * 1000:.1f}ms, population limit back to "
+                                    f"{pop_limit}")
+            else:
+                self.session.population_cap = raised_limit
+                self.log_adjustment(f"Ticks back to {self.tick_time * 1000:.1f}ms, population limit raised to "
+                                    f"{raised_limit}")
+
+    def log_adjustment(self, message):
+        """
+        Log a change to the load.
+        :param message:
+        :return:
+        """
+        self.adjustments += 1
+        logger.info(message)
+
+    def get_stats(self):
+        """
+        Get the governor's measurements and the limits it has set.
+        :return:
+        """
+        return {
+            "governor_tick_ms": round(self.tick_time * 1000, 3),
+            "governor_render_ms": round(self.render_time * 1000, 3),
+            "governor_population_cap": self.session.population_cap,
+            "governor_breed_chance": round(self.session.breed_chance, 3),
+            "governor_render_every": self.session.render_every,
+            "governor_adjustments": self.adjustments,
+        }
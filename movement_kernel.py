@@ -0,0 +1,120 @@
+import logging
+
+logger = logging.getLogger("movement-kernel-logger")
+
+# offsets for each direction code, the codes follow the order of Session.directions; they are tuples so the same
+# functions run as plain Python or compiled by Numba
+DIRECTION_OFFSETS_X = (0, 0, -1, 1, 1, -1, -1, 1, 0)
+DIRECTION_OFFSETS_Y = (-1, 1, 0, 0, -1, 1, -1, 1, 0)
+DIRECTION_DOWNWARDS = (False, True, False, False, False, True, False, True, False)
+STILL = 8
+
+# value of an empty cell in the occupancy grid
+EMPTY = -1
+
+# probe results
+CLEAR = 0
+OFF_BOARD = 1
+OCCUPIED = 2
+
+
+def probe_direction(x, y, direction_code, occupancy, width, height):
+    """
+    Find the cell an entity would move into and what is there, from the occupancy grid; this is the version compiled
+    with Numba.
+    :param x:
+    :param y:
+    :param direction_code:
+    :param occupancy: grid of the entity id in each cell, EMPTY where there is none
+    :param width:
+    :param height:
+    :return: target x, target y, probe result and the id of the entity in the target cell (EMPTY if none)
+    """
+    target_x = x + DIRECTION_OFFSETS_X[direction_code]
+    target_y = y + DIRECTION_OFFSETS_Y[direction_code]
+
+    if target_x < 0 or target_y < 0 or target_x >= width or target_y >= height:
+        return target_x, target_y, OFF_BOARD, EMPTY
+
+    occupant_id = occupancy[target_x, target_y]
+    if occupant_id == EMPTY:
+        return target_x, target_y, CLEAR, EMPTY
+
+    return target_x, target_y, OCCUPIED, occupant_id
+
+
+def probe_world_space(x, y, direction_code, world_space, width, height):
+    """
+    Find the cell an entity would move into and what is there, from the world space's dictionary; this is the pure
+    Python version, a single dictionary lookup is quicker from Python than indexing the occupancy grid.
+    :param x:
+    :param y:
+    :param direction_code:
+    :param world_space: dictionary of coordinates to colour and entity id
+    :param width:
+    :param height:
+    :return: target x, target y, probe result and the id of the entity in the target cell (EMPTY if none)
+    """
+    target_x = x + DIRECTION_OFFSETS_X[direction_code]
+    target_y = y + DIRECTION_OFFSETS_Y[direction_code]
+
+    if target_x < 0 or target_y < 0 or target_x >= width or target_y >= height:
+        return target_x, target_y, OFF_BOARD, EMPTY
+
+    pixel = world_space.get((target_x, target_y))
+    if pixel is None:
+        return target_x, target_y, CLEAR, EMPTY
+
+    return target_x, target_y, OCCUPIED, pixel[1]
+
+
+def apply_direction(x, y, direction_code, momentum, gravity_on):
+    """
+    Move an entity one step in a direction and update its momentum; moving down with gravity on gains momentum, any
+    other move loses it, momentum is kept between 0 and 100.
+    :param x:
+    :param y:
+    :param direction_code:
+    :param momentum:
+    :param gravity_on:
+    :return: new x, new y and new momentum
+    """
+    if direction_code != STILL:
+        if gravity_on and DIRECTION_DOWNWARDS[direction_code]:
+            momentum += 1
+        else:
+            momentum -= 2
+
+    if momentum <= 0:
+        momentum = 0
+    elif momentum >= 100:
+        momentum = 100
+
+    return x + DIRECTION_OFFSETS_X[direction_code], y + DIRECTION_OFFSETS_Y[direction_code], momentum
+
+
+class MovementKernel:
+    def __init__(self, use_jit):
+        """
+        Picks the movement kernel, the Numba compiled one if asked for and Numba is installed. Both probe functions
+        take the same arguments, but the compiled one probes the world space's occupancy grid, which the world space
+        then has to keep, and the pure Python one probes the world space's dictionary. Numba is only imported when
+        asked for, as importing it is slow.
+        :param use_jit:
+        """
+        njit = None
+        if use_jit:
+            try:
+                from numba import njit
+            except ImportError:
+                logger.info("Numba not found, using the pure Python movement kernel")
+
+        self.jit = njit is not None
+
+        if self.jit:
+            self.probe_direction = njit(cache=True)(probe_direction)
+            self.apply_direction = njit(cache=True)(apply_direction)
+            logger.info("Using the JIT compiled movement kernel")
+        else:
+            self.probe_direction = probe_world_space
+            self.apply_direction = apply_direction
@@ -0,0 +1,170 @@
+import logging
+import re
+from threading import Condition, Thread
+from time import sleep, time
+
+import numpy as np
+
+logger = logging.getLogger("multi-screen-logger")
+
+SCREEN_SPEC = re.compile(r"^(?P<screen_type>[A-Z]+)(:(?P<width>\d+)x(?P<height>\d+))?@(?P<x>\d+),(?P<y>\d+)$")
+
+
+def parse_screen_spec(screen_spec):
+    """
+    Parse a screen of a multi screen setup, written as TYPE:WIDTHxHEIGHT@X,Y for a screen that is given its size,
+    like a panel, or TYPE@X,Y for one that knows its own, like a Unicorn HAT; X,Y is where its top left corner is on
+    the board.
+    :param screen_spec:
+    :return: screen type, size or None and board position
+    """
+    match = SCREEN_SPEC.match(screen_spec.strip().upper())
+    if match is None:
+        raise ValueError(f"Screen {screen_spec} should be written as TYPE:WIDTHxHEIGHT@X,Y or TYPE@X,Y")
+
+    size = None
+    if match["width"] is not None:
+        size = int(match["width"]), int(match["height"])
+    return match["screen_type"], size, (int(match["x"]), int(match["y"]))
+
+
+class ScreenWriter:
+    def __init__(self, screen, region, name):
+        """
+        Writes frames to one screen of a multi screen setup on its own thread, so a screen that is slow to show
+        doesn't hold up the others. Only the latest frame waiting is written; frames replaced before the writer gets
+        to them are dropped and counted.
+        :param screen: the screen's backend
+        :param region: the screen's region of the board, (x0, y0, x1, y1) with the end coordinates exclusive
+        :param name:
+        """
+        self.screen = screen
+        self.region = region
+        self.name = name
+
+        self.condition = Condition()
+        self.pending_frame = None
+        self.shown_frame = None
+
+        self.frames_shown = 0
+        self.frames_dropped = 0
+
+        Thread(target=self.write_frames, name=f"screen-writer-{name}", daemon=True).start()
+
+    def submit(self, frame, present_at):
+        """
+        Hand the writer a frame, replacing any frame it hasn't started on yet.
+        :param frame: the whole board as a height x width x 3 array, not changed after it is submitted
+        :param present_at: time the frame should be shown at, so every screen shows it together
+        :return:
+        """
+        with self.condition:
+            if self.pending_frame is not None:
+                self.frames_dropped += 1
+            self.pending_frame = frame, present_at
+            self.condition.notify()
+
+    def write_frames(self):
+        """
+        Write the pixels of the screen's region that changed since the last frame shown, then show the frame at its
+        presentation time.
+        :return:
+        """
+        x0, y0, x1, y1 = self.region
+        while True:
+            with self.condition:
+                while self.pending_frame is None:
+                    self.condition.wait()
+                frame, present_at = self.pending_frame
+                self.pending_frame = None
+
+            region_frame = frame[y0:y1, x0:x1]
+            if self.shown_frame is None:
+                changed_pixels = np.ones(region_frame.shape[:2], dtype=bool)
+            else:
+                changed_pixels = np.any(region_frame != self.shown_frame, axis=2)
+
+            for y, x in zip(*np.nonzero(changed_pixels)):
+                r, g, b = region_frame[y, x].tolist()
+                self.screen.set_pixel(int(x), int(y), r, g, b)
+            self.shown_frame = region_frame
+
+            delay = present_at - time()
+            if delay > 0:
+                sleep(delay)
+            self.screen.show()
+            self.frames_shown += 1
+
+
+class MultiScreen:
+    def __init__(self, screens, frame_period=1 / 60):
+        """
+        Drives several screens as one board, each screen shows its own region of it. Screens can sit side by side or
+        overlap, so a screen given the same region as another mirrors it. The board is the smallest rectangle that
+        covers every screen.
+        :param screens: list of (name, screen backend, board position of its top left corner)
+        :param frame_period: seconds between frames; each frame is shown on every screen one frame period after it
+        is handed to the writers, which gives them all time to draw it so they can show it at the same moment
+        """
+        self.frame_period = frame_period
+        self.present_at = time()
+
+        self.writers = []
+        for name, screen, (x, y) in screens:
+            width, height = screen.get_shape()
+            self.writers.append(ScreenWriter(screen, (x, y, x + width, y + height), name))
+            logger.info(f"Screen {name} showing {width}x{height} at {x}, {y}")
+
+        self.width = max(writer.region[2] for writer in self.writers)
+        self.height = max(writer.region[3] for writer in self.writers)
+        self.frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+
+    def get_shape(self):
+        """
+        Get the shape of the board for use in the simulator logic
+        :return:
+        """
+        return self.width, self.height
+
+    def set_pixel(self, x, y, r, g, b):
+        """
+        Set a pixel on the board
+        :param x:
+        :param y:
+        :param r:
+        :param g:
+        :param b:
+        :return:
+        """
+        # anything that isn't a pixel on the board is an IndexError, like the HAT libraries, so the end of world
+        # space marker ends the render loop
+        try:
+            on_board = 0 <= x < self.width and 0 <= y < self.height
+        except TypeError:
+            on_board = False
+        if not on_board:
+            raise IndexError(f"Pixel {x}, {y} is off the board")
+        self.frame[y, x] = (int(r), int(g), int(b))
+
+    def show(self):
+        """
+        Hand a copy of the board to every screen's writer once the last frame is due to be shown, without waiting for
+        any of them to show it
+        :return:
+        """
+        delay = self.present_at - time()
+        if delay > 0:
+            sleep(delay)
+
+        frame = self.frame.copy()
+        self.present_at = time() + self.frame_period
+        for writer in self.writers:
+            writer.submit(frame, self.present_at)
+
+    def get_stats(self):
+        """
+        Get the frames each screen has shown and dropped.
+        :return:
+        """
+        return {writer.name: {"frames_shown": writer.frames_shown, "frames_dropped": writer.frames_dropped}
+                for writer in self.writers}
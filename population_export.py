@@ -0,0 +1,241 @@
+import atexit
+import glob
+import logging
+import os
+import queue
+from operator import attrgetter
+from threading import Thread
+
+import numpy as np
+
+logger = logging.getLogger("population-export-logger")
+
+# life seeds are drawn as 500 bit numbers, each is kept as little endian bytes in a row of a uint8 column
+SEED_BYTES = 64
+SEED_COLUMNS = ("life_seed1", "life_seed2", "life_seed3")
+
+# traits kept as float64 columns, with a histogram of each worked out for every snapshot
+TRAIT_COLUMNS = ("aggression_factor", "friend_factor", "weight", "momentum", "forgetfulness", "breed_threshold",
+                 "time_to_move", "combine_threshold", "wall_factor", "memory_max", "time_to_live", "strength",
+                 "compatibility_factor", "time_to_build")
+
+# state the entity has built up over its life, also float64 columns
+STATE_COLUMNS = ("max_attribute", "time_to_live_count", "material")
+
+FLAG_COLUMNS = ("rebel", "bouncy", "builder")
+DIRECTION_COLUMNS = ("direction", "preferred_breed_direction")
+
+ENTITY_ATTRIBUTES = (("life_form_id", "matrix_position_x", "matrix_position_y", "birth_tick") + SEED_COLUMNS +
+                     TRAIT_COLUMNS + STATE_COLUMNS + FLAG_COLUMNS + DIRECTION_COLUMNS)
+
+CHUNK_PATTERN = "population-{:06d}.npz"
+CHUNK_GLOB = "population-*.npz"
+
+
+def seed_column(seeds):
+    """
+    Pack life seeds into a uint8 column, read one back with int.from_bytes(row.tobytes(), "little").
+    :param seeds:
+    :return: rows x SEED_BYTES array
+    """
+    packed = b"".join(seed.to_bytes(SEED_BYTES, "little") for seed in seeds)
+    return np.frombuffer(packed, dtype=np.uint8).reshape(len(seeds), SEED_BYTES)
+
+
+class PopulationExporter:
+    def __init__(self, path, trait_ranges, chunk_rows=100000, histogram_bins=32, queue_size=8):
+        """
+        Exports snapshots of every living life form for analysing evolution offline. The logic loop only reads the
+        attributes of each life form into a list; turning them into columns, working out the trait histograms and
+        compressing them is done by a background thread. Rows are written to the directory as numbered compressed
+        npz chunks of a fixed number of rows, only ever adding new chunks, each with the histograms of the snapshots
+        that finished in it. Snapshots are dropped and counted if the writer falls behind, so exporting never holds up
+        the simulation.
+        :param path: directory the chunks are written to, numbering carries on after any chunks already in it
+        :param trait_ranges: the highest value of each trait, the histograms split 0 to it into bins and anything
+        higher goes in the last bin
+        :param chunk_rows: rows in each chunk
+        :param histogram_bins: bins in each trait histogram
+        :param queue_size: snapshots that can be waiting to be written before new ones are dropped
+        """
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.histogram_bins = histogram_bins
+        self.trait_ranges = np.array([max(1, trait_ranges[trait]) for trait in TRAIT_COLUMNS], dtype=np.float64)
+
+        os.makedirs(path, exist_ok=True)
+        self.chunks_written = len(glob.glob(os.path.join(path, CHUNK_GLOB)))
+
+        self.get_attributes = attrgetter(*ENTITY_ATTRIBUTES)
+
+        self.snapshots_taken = 0
+        self.snapshots_dropped = 0
+        self.rows_written = 0
+
+        # columns of the rows waiting for a full chunk, and the histograms of the snapshots in them with the pending
+        # row each snapshot ends at
+        self.pending_columns = []
+        self.pending_rows = 0
+        self.pending_histograms = []
+        self.latest_histograms = None
+
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.worker = Thread(target=self.write_snapshots, daemon=True)
+        self.worker.start()
+
+        atexit.register(self.close)
+
+        logger.info(f"Exporting the population to {path} in chunks of {chunk_rows} rows")
+
+    def snapshot(self, tick, entities):
+        """
+        Queue a snapshot of the entities to be exported, called by the logic loop.
+        :param tick:
+        :param entities:
+        :return:
+        """
+        self.snapshots_taken += 1
+        try:
+            self.pending.put_nowait((tick, list(map(self.get_attributes, entities))))
+        except queue.Full:
+            self.snapshots_dropped += 1
+            if self.snapshots_dropped % 100 == 1:
+                logger.info(f"Population exporter falling behind, {self.snapshots_dropped} snapshot(s) dropped so far")
+
+    def to_columns(self, tick, rows):
+        """
+        Turn the rows of a snapshot into columns.
+        :param tick:
+        :param rows: attributes of each entity, in the order of ENTITY_ATTRIBUTES
+        :return:
+        """
+        values = dict(zip(ENTITY_ATTRIBUTES, zip(*rows)))
+        row_count = len(rows)
+
+        columns = {
+            "tick": np.full(row_count, tick, dtype=np.int64),
+            "life_form_id": np.array(values["life_form_id"], dtype=np.int64),
+            "x": np.array(values["matrix_position_x"], dtype=np.int32),
+            "y": np.array(values["matrix_position_y"], dtype=np.int32),
+            "age": tick - np.array(values["birth_tick"], dtype=np.int64),
+        }
+        columns.update((name, seed_column(values[name])) for name in SEED_COLUMNS)
+        columns.update((name, np.array(values[name], dtype=np.float64)) for name in TRAIT_COLUMNS + STATE_COLUMNS)
+        columns.update((name, np.array(values[name], dtype=bool)) for name in FLAG_COLUMNS)
+        columns.update((name, np.array(values[name], dtype=str)) for name in DIRECTION_COLUMNS)
+        return columns
+
+    def trait_histograms(self, columns):
+        """
+        Work out the histogram of every trait at once, each trait's bins are offset so one count covers them all.
+        :param columns:
+        :return: traits x bins array of counts
+        """
+        bins = self.histogram_bins
+        traits = np.stack([columns[name] for name in TRAIT_COLUMNS], axis=1)
+        bin_indices = np.clip((traits / self.trait_ranges * bins).astype(np.int64), 0, bins - 1)
+        bin_indices += np.arange(len(TRAIT_COLUMNS)) * bins
+        return np.bincount(bin_indices.ravel(), minlength=len(TRAIT_COLUMNS) * bins).reshape(len(TRAIT_COLUMNS), bins)
+
+    def write_snapshots(self):
+        """
+        Turn queued snapshots into columns and write them out a chunk at a time.
+        :return:
+        """
+        while True:
+            snapshot = self.pending.get()
+            if snapshot is None:
+                if self.pending_rows:
+                    self.write_chunk(self.pending_rows)
+                return
+
+            tick, rows = snapshot
+            if not rows:
+                continue
+
+            columns = self.to_columns(tick, rows)
+            histograms = self.trait_histograms(columns)
+            self.latest_histograms = tick, histograms
+
+            self.pending_columns.append(columns)
+            self.pending_rows += len(rows)
+            self.pending_histograms.append((self.pending_rows, tick, histograms))
+            while self.pending_rows >= self.chunk_rows:
+                self.write_chunk(self.chunk_rows)
+
+    def write_chunk(self, row_count):
+        """
+        Write the oldest pending rows as a new chunk, written under a temporary name and then renamed so a chunk is
+        never seen half written.
+        :param row_count:
+        :return:
+        """
+        pending = {name: np.concatenate([columns[name] for columns in self.pending_columns])
+                   for name in self.pending_columns[0]}
+        chunk = {name: column[:row_count] for name, column in pending.items()}
+
+        remaining_rows = self.pending_rows - row_count
+        self.pending_columns = [{name: column[row_count:] for name, column in pending.items()}] if remaining_rows \
+            else []
+        self.pending_rows = remaining_rows
+
+        # the histograms of the snapshots that end in this chunk go with it
+        finished = [(tick, histograms) for end_row, tick, histograms in self.pending_histograms if end_row <= row_count]
+        self.pending_histograms = [(end_row - row_count, tick, histograms)
+                                   for end_row, tick, histograms in self.pending_histograms[len(finished):]]
+        if finished:
+            chunk["histogram_ticks"] = np.array([tick for tick, _ in finished], dtype=np.int64)
+            chunk["histograms"] = np.stack([histograms for _, histograms in finished])
+            chunk["histogram_traits"] = np.array(TRAIT_COLUMNS)
+            chunk["histogram_ranges"] = self.trait_ranges
+
+        chunk_path = os.path.join(self.path, CHUNK_PATTERN.format(self.chunks_written))
+        with open(chunk_path + ".tmp", "wb") as chunk_file:
+            np.savez_compressed(chunk_file, **chunk)
+        os.replace(chunk_path + ".tmp", chunk_path)
+
+        self.chunks_written += 1
+        self.rows_written += row_count
+        logger.debug(f"Population chunk {chunk_path} written with {row_count} rows")
+
+    def get_histograms(self):
+        """
+        Get the trait histograms of the latest snapshot written.
+        :return:
+        """
+        if self.latest_histograms is None:
+            return None
+
+        tick, histograms = self.latest_histograms
+        return {
+            "tick": tick,
+            "bins": self.histogram_bins,
+            "traits": {name: {"range": trait_range, "counts": counts.tolist()}
+                       for name, trait_range, counts in zip(TRAIT_COLUMNS, self.trait_ranges.tolist(), histograms)},
+        }
+
+    def get_stats(self):
+        """
+        Get how much has been exported.
+        :return:
+        """
+        return {
+            "population_snapshots": self.snapshots_taken,
+            "population_snapshots_dropped": self.snapshots_dropped,
+            "population_rows_written": self.rows_written,
+            "population_chunks_written": self.chunks_written,
+        }
+
+    def close(self):
+        """
+        Write out the snapshots still queued, and the rows waiting for a full chunk as a last smaller chunk.
+        :return:
+        """
+        if not self.worker.is_alive():
+            return
+
+        self.pending.put(None)
+        self.worker.join()
+
+        logger.info(f"Population exporter wrote {self.rows_written} row(s) in {self.chunks_written} chunk(s) and "
+                    f"dropped {self.snapshots_dropped} snapshot(s)")
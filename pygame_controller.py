@@ -0,0 +1,109 @@
+import logging
+import os
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+logger = logging.getLogger("pygame-controller-logger")
+
+# share of the desktop the window is allowed to fill when picking its scale
+DESKTOP_SHARE = 0.75
+
+
+class PygameController:
+    def __init__(self, width, height, scale=None, title="Artificial Life"):
+        """
+        Simulates a screen in a pygame window. Pixels are kept in an array that is copied onto a surface the size of
+        the board in one go when the screen is shown, then scaled up by a whole number to fill the window, so every
+        pixel is a sharp square. Window events are handled without waiting as each frame is shown, and the window is
+        flipped without waiting for vsync.
+        :param width:
+        :param height:
+        :param scale: window pixels per board pixel, the largest that fits on the desktop if not given
+        :param title:
+        """
+        self.width = width
+        self.height = height
+
+        pygame.display.init()
+
+        if scale is None:
+            desktop = pygame.display.Info()
+            if desktop.current_w > 0 and desktop.current_h > 0:
+                scale = min(int(desktop.current_w * DESKTOP_SHARE) // width,
+                            int(desktop.current_h * DESKTOP_SHARE) // height)
+            else:
+                scale = 512 // max(width, height)
+        self.scale = max(1, scale)
+
+        self.window = pygame.display.set_mode((width * self.scale, height * self.scale))
+        pygame.display.set_caption(title)
+        pygame.event.set_allowed([pygame.QUIT])
+
+        # the board sized surface has the window's pixel format, so scaling it onto the window is a straight copy
+        self.surface = pygame.Surface((width, height), 0, self.window)
+
+        # indexed x, y like surfarray
+        self.pixels = np.zeros((width, height, 3), dtype=np.uint8)
+
+        logger.info(f"Simulating a {width}x{height} screen at {self.scale}x scale")
+
+    def get_shape(self):
+        """
+        Get the shape of the board for use in the simulator logic
+        :return:
+        """
+        return self.width, self.height
+
+    def set_pixel(self, x, y, r, g, b):
+        """
+        Set a pixel on the board
+        :param x:
+        :param y:
+        :param r:
+        :param g:
+        :param b:
+        :return:
+        """
+        # anything that isn't a pixel on the board is an IndexError, like the HAT libraries, so the end of world
+        # space marker ends the render loop
+        try:
+            on_board = 0 <= x < self.width and 0 <= y < self.height
+        except TypeError:
+            on_board = False
+        if not on_board:
+            raise IndexError(f"Pixel {x}, {y} is off the board")
+        # channels outside 0 to 255 are clipped, numpy raises OverflowError storing them in the uint8 buffer
+        self.pixels[x, y] = (min(255, max(0, r)), min(255, max(0, g)), min(255, max(0, b)))
+
+    def draw_frame(self, frame):
+        """
+        Set every pixel on the board at once
+        :param frame: height x width x 3 array of RGB24 pixels
+        :return:
+        """
+        np.copyto(self.pixels, frame.swapaxes(0, 1))
+
+    def handle_events(self):
+        """
+        Handle the window's events without waiting for any, closing the window ends the program.
+        :return:
+        """
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                logger.info("Simulator window closed")
+                pygame.quit()
+                quit()
+
+    def show(self):
+        """
+        Show the board in the window
+        :return:
+        """
+        self.handle_events()
+        pygame.surfarray.blit_array(self.surface, self.pixels)
+        pygame.transform.scale(self.surface, self.window.get_size(), self.window)
+        pygame.display.flip()
@@ -1,34 +1,131 @@
+import importlib
 import logging
 
-try:
-    from panel_controller import PanelController
-except ModuleNotFoundError:
-    print("RGB Matrix install not found, skipping import - go here if you want to install: "
-          "https://learn.adafruit.com/adafruit-rgb-matrix-bonnet-for-raspberry-pi/driving-matrices")
+logger = logging.getLogger("screen-output-logger")
 
-try:
-    from hat_controller import UnicornHATController
-except ModuleNotFoundError:
-    print("Unicorn HAT install not found, skipping import - go here if you want to install: "
-          "https://github.com/pimoroni/unicorn-hat-hd")
 
-import time
+def load_backend(module_name, class_name, install_help):
+    """
+    Import a screen backend, only the backend in use is imported so unused hardware libraries never slow down startup
+    :param module_name:
+    :param class_name:
+    :param install_help: printed if the backend's libraries are not installed
+    :return: the backend class
+    """
+    try:
+        return getattr(importlib.import_module(module_name), class_name)
+    except ModuleNotFoundError:
+        print(install_help)
+        raise
 
-logger = logging.getLogger("screen-output-logger")
+
+def hat_backend(screen_type, simulator, custom_size_simulator, led_brightness):
+    """
+    Set up a Unicorn HAT, HAT HD, HAT Mini or the simulator
+    """
+    hat_controller = importlib.import_module("hat_controller")
+    simulated_shape = hat_controller.simulated_hat_shape(screen_type, simulator, custom_size_simulator)
+    if simulated_shape is not None:
+        return simulator_backend(screen_type, simulator, simulated_shape, led_brightness)
+    return hat_controller.UnicornHATController(screen_type, led_brightness)
+
+
+def simulator_backend(screen_type, simulator, custom_size_simulator, led_brightness):
+    """
+    Set up a simulated screen in a pygame window
+    """
+    return load_backend("pygame_controller", "PygameController",
+                        "pygame install not found - install it with: pip install pygame")(custom_size_simulator[0],
+                                                                                           custom_size_simulator[1])
+
+
+def panel_backend(screen_type, simulator, custom_size_simulator, led_brightness):
+    """
+    Set up an RGB matrix panel
+    """
+    return load_backend("panel_controller", "PanelController",
+                        "RGB Matrix install not found - go here if you want to install: "
+                        "https://learn.adafruit.com/adafruit-rgb-matrix-bonnet-for-raspberry-pi/driving-matrices")(
+        custom_size_simulator[0], custom_size_simulator[1], led_brightness)
+
+
+def terminal_backend(screen_type, simulator, custom_size_simulator, led_brightness):
+    """
+    Set up drawing in the terminal
+    """
+    return load_backend("terminal_controller", "TerminalController", "")(custom_size_simulator[0],
+                                                                         custom_size_simulator[1])
+
+
+def multi_backend(screen_specs, simulator, led_brightness):
+    """
+    Set up several screens driven as one board, each with its own writer thread
+    """
+    multi_screen = importlib.import_module("multi_screen")
+
+    screens = []
+    for screen_index, screen_spec in enumerate(screen_specs):
+        screen_type, size, position = multi_screen.parse_screen_spec(screen_spec)
+        if screen_type not in SCREEN_BACKENDS:
+            raise ValueError(f"Unknown screen type {screen_type} in {screen_spec}")
+        if size is None and screen_type in SIZED_SCREEN_TYPES:
+            raise ValueError(f"{screen_type} screens need a size, like {screen_type}:64x32@0,0")
+        screen = SCREEN_BACKENDS[screen_type](screen_type, simulator, size, led_brightness)
+        screens.append((f"{screen_index}-{screen_type}", screen, position))
+
+    return multi_screen.MultiScreen(screens)
+
+
+# screen types that are told their size rather than knowing it
+SIZED_SCREEN_TYPES = ("CUSTOM", "PANEL", "TERMINAL")
+
+# screen type to the function that imports and sets up its backend
+SCREEN_BACKENDS = {
+    "SD": hat_backend,
+    "HD": hat_backend,
+    "MINI": hat_backend,
+    "CUSTOM": hat_backend,
+    "PANEL": panel_backend,
+    "TERMINAL": terminal_backend,
+}
 
 
 class ScreenController:
-    def __init__(self, screen_type, simulator, custom_size_simulator, led_brightness):
-        if screen_type == "PANEL":
-            self.screen = PanelController(custom_size_simulator[0], custom_size_simulator[1], led_brightness)
+    def __init__(self, screen_type, simulator, custom_size_simulator, led_brightness, screen_specs=None):
+        if screen_type == "MULTI":
+            self.screen = multi_backend(screen_specs, simulator, led_brightness)
         else:
-            self.screen = UnicornHATController(screen_type, simulator, custom_size_simulator, led_brightness)
+            self.screen = SCREEN_BACKENDS[screen_type](screen_type, simulator, custom_size_simulator, led_brightness)
 
         self.u_width, self.u_height = self.screen.get_shape()
         # the unicorn hat led addresses are 0 indexed so need to account for this
         self.u_width_max = self.u_width - 1
         self.u_height_max = self.u_height - 1
 
+        self.frame_recorder = None
+        self.frame = None
+
+        # the last whole frame drawn, so only the pixels that change are sent to the screen
+        self.drawn_frame = None
+        self.changed_channels = None
+        self.changed_pixels = None
+
+        # screens that take a whole frame at once, rather than pixel by pixel
+        self.screen_draws_frames = hasattr(self.screen, "draw_frame")
+
+    def attach_frame_recorder(self, frame_recorder):
+        """
+        Keep a copy of every pixel drawn so each frame shown can be handed to a frame recorder
+        :param frame_recorder:
+        :return:
+        """
+        import numpy as np
+
+        # pixels are drawn into a float frame as they come and only clipped to RGB24 once per frame shown
+        self.frame = np.zeros((self.u_height, self.u_width, 3), dtype=np.float32)
+        self.recorded_frame = np.zeros((self.u_height, self.u_width, 3), dtype=np.uint8)
+        self.frame_recorder = frame_recorder
+
     def draw_pixels(self, pixel_coord, pixel_rgb, current_layer=0):
         """
         Draw a pixel on the screen, ends loop if pixel_rgb is "e", will raise an exception if the pixel_coord is out
@@ -40,6 +137,8 @@ class ScreenController:
         """
         try:
             self.screen.set_pixel(pixel_coord[0], pixel_coord[1], pixel_rgb[0], pixel_rgb[1], pixel_rgb[2])
+            if self.frame_recorder is not None:
+                self.frame[pixel_coord[1], pixel_coord[0]] = pixel_rgb
         except IndexError:
             if pixel_rgb == "e":
                 logger.info("Render thread purposely ended")
@@ -47,8 +146,41 @@ class ScreenController:
             else:
                 raise Exception(f"Set pixel did not like pixel coordinate: {pixel_coord} with RGB value: {pixel_rgb}")
 
+    def draw_frame(self, frame):
+        """
+        Draw a whole frame, screens that can take a whole frame are given it in one go, otherwise only the pixels that
+        changed since the last frame drawn are sent to the screen
+        :param frame: height x width x 3 array of RGB24 pixels
+        :return:
+        """
+        import numpy as np
+
+        if self.screen_draws_frames:
+            self.screen.draw_frame(frame)
+        else:
+            if self.drawn_frame is None:
+                self.drawn_frame = np.zeros_like(frame)
+                self.changed_channels = np.zeros(frame.shape, dtype=bool)
+                self.changed_pixels = np.ones(frame.shape[:2], dtype=bool)
+            else:
+                np.not_equal(frame, self.drawn_frame, out=self.changed_channels)
+                np.any(self.changed_channels, axis=2, out=self.changed_pixels)
+
+            set_pixel = self.screen.set_pixel
+            for y, x in zip(*np.nonzero(self.changed_pixels)):
+                r, g, b = frame[y, x].tolist()
+                set_pixel(int(x), int(y), r, g, b)
+
+            np.copyto(self.drawn_frame, frame)
+
+        if self.frame_recorder is not None:
+            self.frame[:] = frame
+
     def show(self):
         """
         Show the current state of the board
         """
         self.screen.show()
+        if self.frame_recorder is not None:
+            self.frame.clip(0, 255, out=self.recorded_frame, casting="unsafe")
+            self.frame_recorder.capture(self.recorded_frame.tobytes())
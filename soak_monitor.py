@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import resource
+import tracemalloc
+
+logger = logging.getLogger("soak-monitor-logger")
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# the monitor's own samples and snapshots are left out of the allocation sites it reports
+OWN_ALLOCATIONS = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+
+
+def get_rss():
+    """
+    Get the resident set size of the process in bytes, or the peak resident set size where the current one can't be
+    read.
+    :return:
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def growth_per_tick(ticks, values):
+    """
+    Get the least squares slope of a series of samples.
+    :param ticks:
+    :param values:
+    :return: growth per tick
+    """
+    count = len(ticks)
+    mean_tick = sum(ticks) / count
+    mean_value = sum(values) / count
+    spread = sum((tick - mean_tick) ** 2 for tick in ticks)
+    if not spread:
+        return 0.0
+    return sum((tick - mean_tick) * (value - mean_value) for tick, value in zip(ticks, values)) / spread
+
+
+class SoakMonitor:
+    def __init__(self, ticks, sample_interval=1000, window=20, warmup_samples=5, growth_threshold=1024 * 1024,
+                 container_growth_threshold=0.1, fail_after=3, report_path="soak_report.json", top_allocations=10):
+        """
+        Watches memory over a long unattended run. Every sample interval ticks the resident set size, the memory traced
+        by tracemalloc and the size of each watched container are sampled. After the warm up, once every window of
+        samples the growth of each is worked out as the slope over the window; memory that keeps growing faster than
+        the threshold for several windows in a row fails the run. The report names the containers that kept growing
+        faster than their own threshold for as many windows in a row, and the lines that allocated the most memory
+        since the warm up.
+        :param ticks: ticks to run for
+        :param sample_interval: ticks between samples
+        :param window: samples the growth is worked out over
+        :param warmup_samples: samples taken before the growth is watched, while the population settles
+        :param growth_threshold: bytes of growth per million ticks above which memory is growing
+        :param container_growth_threshold: growth per million ticks, as a share of the container's mean size over the
+        window, above which a container is growing; containers hold anything from a handful to thousands of items, so
+        one number of items can't suit them all
+        :param fail_after: windows in a row memory has to be growing for the run to fail
+        :param report_path: file the report is written to as JSON at the end of the run
+        :param top_allocations: allocation sites named in the report
+        """
+        self.ticks = ticks
+        self.sample_interval = sample_interval
+        self.window = window
+        self.warmup_samples = warmup_samples
+        self.growth_threshold = growth_threshold
+        self.container_growth_threshold = container_growth_threshold
+        self.fail_after = fail_after
+        self.report_path = report_path
+        self.top_allocations = top_allocations
+
+        # container name to a function returning the number of items it holds
+        self.containers = {}
+
+        self.sample_ticks = []
+        self.samples = {"rss": [], "traced": []}
+        self.growing_windows = 0
+        # container name to the number of windows in a row it has been growing
+        self.container_growing_windows = {}
+        self.growth = {}
+        self.failed = False
+        self.baseline_snapshot = None
+
+        tracemalloc.start()
+        logger.info(f"Soaking for {ticks} ticks, sampling every {sample_interval}")
+
+    def watch(self, name, get_size):
+        """
+        Sample the size of a container.
+        :param name:
+        :param get_size: function returning the number of items in the container
+        :return:
+        """
+        self.containers[name] = get_size
+        self.samples.setdefault(name, [])
+
+    def record_tick(self, tick):
+        """
+        Called by the logic loop every tick, samples at the sample interval.
+        :param tick:
+        :return: whether the run is over, because it has run for long enough or has failed
+        """
+        if tick % self.sample_interval:
+            return False
+
+        self.sample(tick)
+        return tick >= self.ticks or self.failed
+
+    def sample(self, tick):
+        """
+        Sample the memory and every watched container, checking the growth at the end of each window.
+        :param tick:
+        :return:
+        """
+        self.sample_ticks.append(tick)
+        self.samples["rss"].append(get_rss())
+        self.samples["traced"].append(tracemalloc.get_traced_memory()[0])
+        for name, get_size in list(self.containers.items()):
+            self.samples[name].append(get_size())
+
+        sample_count = len(self.sample_ticks)
+        if sample_count == self.warmup_samples:
+            self.baseline_snapshot = tracemalloc.take_snapshot().filter_traces(OWN_ALLOCATIONS)
+        elif sample_count > self.warmup_samples and (sample_count - self.warmup_samples) % self.window == 0:
+            self.check_growth()
+
+    def check_growth(self):
+        """
+        Work out the growth of the memory and every watched container over the last window of samples.
+        :return:
+        """
+        ticks = self.sample_ticks[-self.window:]
+        self.growth = {name: growth_per_tick(ticks, values[-self.window:]) * 1000000
+                       for name, values in self.samples.items() if len(values) >= self.window}
+
+        growing = [name for name in ("rss", "traced") if self.growth[name] > self.growth_threshold]
+        if growing:
+            self.growing_windows += 1
+            logger.warning(f"Memory growing at tick {ticks[-1]}: " +
+                           ", ".join(f"{name} {self.growth[name] / 1024:.0f}KB" for name in growing) +
+                           f" per million ticks, {self.growing_windows} window(s) in a row")
+        else:
+            self.growing_windows = 0
+
+        self.failed = self.growing_windows >= self.fail_after
+
+        # containers that fill up and empty again as the population changes can grow over any one window, only ones
+        # that keep growing past the largest they have been, window after window, are reported
+        for name in self.containers:
+            values = self.samples[name][-self.window:]
+            earlier_values = self.samples[name][:-self.window]
+            if name in self.growth and \
+                    self.growth[name] > self.container_growth_threshold * max(1.0, sum(values) / len(values)) and \
+                    max(values) > max(earlier_values, default=0):
+                self.container_growing_windows[name] = self.container_growing_windows.get(name, 0) + 1
+            else:
+                self.container_growing_windows[name] = 0
+
+    def get_report(self):
+        """
+        Get the report of the run so far.
+        :return:
+        """
+        containers = {}
+        for name, values in self.samples.items():
+            if not values:
+                continue
+            containers[name] = {
+                "first": values[0],
+                "last": values[-1],
+                "max": max(values),
+                "growth_per_million_ticks": round(self.growth.get(name, 0.0), 1),
+            }
+
+        allocations = []
+        if self.baseline_snapshot is not None and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces(OWN_ALLOCATIONS)
+            statistics = snapshot.compare_to(self.baseline_snapshot, 'lineno')
+            allocations = [{"site": str(statistic.traceback), "size_diff": statistic.size_diff,
+                            "count_diff": statistic.count_diff}
+                           for statistic in statistics[:self.top_allocations]]
+
+        return {
+            "ticks": self.sample_ticks[-1] if self.sample_ticks else 0,
+            "samples": len(self.sample_ticks),
+            "failed": self.failed,
+            "growth_threshold_per_million_ticks": self.growth_threshold,
+            "container_growth_threshold_share_per_million_ticks": self.container_growth_threshold,
+            "containers": containers,
+            "growing_containers": sorted((name for name, windows in self.container_growing_windows.items()
+                                          if windows >= self.fail_after),
+                                         key=lambda name: -self.growth[name]),
+            "top_allocations": allocations,
+        }
+
+    def finish(self):
+        """
+        Write the report, log the outcome and stop tracing.
+        :return: exit status for the run, 1 if memory kept growing
+        """
+        report = self.get_report()
+        with open(self.report_path, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        tracemalloc.stop()
+
+        if self.failed:
+            logger.error(f"Soak failed at tick {report['ticks']}, memory kept growing, growing containers: "
+                         f"{', '.join(report['growing_containers']) or 'none'}, report in {self.report_path}")
+            return 1
+
+        logger.info(f"Soak passed after {report['ticks']} ticks, report in {self.report_path}")
+        return 0
+
+    def get_stats(self):
+        """
+        Get the latest samples and growth.
+        :return:
+        """
+        return {
+            "soak_ticks": self.sample_ticks[-1] if self.sample_ticks else 0,
+            "soak_rss": self.samples["rss"][-1] if self.sample_ticks else None,
+            "soak_growth_per_million_ticks": {name: round(growth, 1) for name, growth in self.growth.items()},
+            "soak_growing_windows": self.growing_windows,
+        }
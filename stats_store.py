@@ -0,0 +1,239 @@
+import logging
+from time import time
+
+import numpy as np
+
+logger = logging.getLogger("stats-store-logger")
+
+# counters are totalled over each bucket, gauges are averaged with their minimum and maximum kept
+COUNTERS = ("births", "deaths", "kills", "combines", "walls_built")
+GAUGES = ("lifeforms", "walls", "resources", "radiation", "tick_ms", "render_ms")
+SERIES = COUNTERS + GAUGES
+
+STAT_BIRTHS, STAT_DEATHS, STAT_KILLS, STAT_COMBINES, STAT_WALLS_BUILT = range(len(COUNTERS))
+
+TICK_RESOLUTION = "tick"
+
+
+class StatsTier:
+    def __init__(self, name, seconds, capacity):
+        """
+        A ring of buckets each covering the same span of time, once it is full the oldest bucket is overwritten. Each
+        bucket holds the sum, minimum and maximum of every series over the samples that fell into it, the bucket being
+        filled is held apart until its span is over.
+        :param name:
+        :param seconds: span of time each bucket covers
+        :param capacity: buckets kept
+        """
+        self.name = name
+        self.seconds = seconds
+        self.capacity = capacity
+
+        series_count = len(SERIES)
+        self.times = np.zeros(capacity)
+        self.sums = np.zeros((capacity, series_count))
+        self.mins = np.zeros((capacity, series_count))
+        self.maxs = np.zeros((capacity, series_count))
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.rows_written = 0
+
+        self.bucket = None
+        self.open_sums = np.zeros(series_count)
+        self.open_mins = np.full(series_count, np.inf)
+        self.open_maxs = np.full(series_count, -np.inf)
+        self.open_count = 0
+
+    def add(self, now, sums, mins, maxs, count):
+        """
+        Add samples to the bucket covering a time, closing the bucket being filled if its span is over.
+        :param now:
+        :param sums:
+        :param mins:
+        :param maxs:
+        :param count: number of samples added
+        :return: the slot of the bucket that was closed, or None
+        """
+        bucket = int(now // self.seconds)
+        closed_slot = None
+        if bucket != self.bucket:
+            if self.open_count:
+                closed_slot = self.close()
+            self.bucket = bucket
+
+        np.add(self.open_sums, sums, out=self.open_sums)
+        np.minimum(self.open_mins, mins, out=self.open_mins)
+        np.maximum(self.open_maxs, maxs, out=self.open_maxs)
+        self.open_count += count
+        return closed_slot
+
+    def close(self):
+        """
+        Write the bucket being filled into the ring and start a new one.
+        :return: the slot it was written to
+        """
+        slot = self.rows_written % self.capacity
+        self.times[slot] = self.bucket * self.seconds
+        self.sums[slot] = self.open_sums
+        self.mins[slot] = self.open_mins
+        self.maxs[slot] = self.open_maxs
+        self.counts[slot] = self.open_count
+        self.rows_written += 1
+
+        self.open_sums.fill(0)
+        self.open_mins.fill(np.inf)
+        self.open_maxs.fill(-np.inf)
+        self.open_count = 0
+        return slot
+
+    def rows(self, last):
+        """
+        Get the latest buckets, oldest first, with the bucket still being filled as the last.
+        :param last: buckets to get
+        :return: times, sums, minimums, maximums and sample counts
+        """
+        closed = min(self.rows_written, self.capacity, max(0, last - (1 if self.open_count else 0)))
+        slots = np.arange(self.rows_written - closed, self.rows_written) % self.capacity
+        times, sums, mins, maxs, counts = (self.times[slots], self.sums[slots], self.mins[slots], self.maxs[slots],
+                                           self.counts[slots])
+        if self.open_count and last > 0:
+            times = np.append(times, self.bucket * self.seconds)
+            sums = np.vstack((sums, self.open_sums))
+            mins = np.vstack((mins, self.open_mins))
+            maxs = np.vstack((maxs, self.open_maxs))
+            counts = np.append(counts, self.open_count)
+        return times, sums, mins, maxs, counts
+
+
+class StatsStore:
+    def __init__(self, tick_capacity, tiers):
+        """
+        Fixed size store of the session's statistics over time, in the style of a round robin database. Every tick a
+        sample of each series is kept in a ring of the latest ticks and added to the bucket of the finest tier; when a
+        tier's bucket is over it is added on to the next coarser tier, so the store downsamples as it goes and takes up
+        the same memory however long the simulation runs.
+        :param tick_capacity: ticks kept at full resolution
+        :param tiers: name, seconds per bucket and buckets kept for each tier, finest first
+        """
+        series_count = len(SERIES)
+        self.tick_capacity = tick_capacity
+        self.tick_numbers = np.zeros(tick_capacity, dtype=np.int64)
+        self.tick_values = np.zeros((tick_capacity, series_count))
+        self.ticks_recorded = 0
+
+        self.tiers = [StatsTier(name, seconds, capacity) for name, seconds, capacity in tiers]
+        self.tiers_by_name = {tier.name: tier for tier in self.tiers}
+
+        # events counted during the tick being run, and the time the latest frame took to render
+        self.event_counts = [0] * len(COUNTERS)
+        self.render_time = 0.0
+
+        logger.info(f"Recording {len(SERIES)} series for the last {tick_capacity} ticks and " +
+                    ", ".join(f"{capacity} {name}s" for name, seconds, capacity in tiers))
+
+    def count(self, counter):
+        """
+        Count an event in the tick being run.
+        :param counter: one of the STAT_ constants
+        :return:
+        """
+        self.event_counts[counter] += 1
+
+    def record_render(self, frame_time):
+        """
+        Called by the renderer with the time each frame took.
+        :param frame_time:
+        :return:
+        """
+        self.render_time = frame_time
+
+    def record_tick(self, tick, tick_time, lifeforms, walls, resources, radiation):
+        """
+        Called by the logic loop at the end of every tick, records a sample of every series.
+        :param tick:
+        :param tick_time: seconds the tick took
+        :param lifeforms: life forms on the board
+        :param walls: walls on the board
+        :param resources: resources on the board
+        :param radiation:
+        :return:
+        """
+        slot = self.ticks_recorded % self.tick_capacity
+        self.tick_numbers[slot] = tick
+        row = self.tick_values[slot]
+        row[:len(COUNTERS)] = self.event_counts
+        row[len(COUNTERS):] = lifeforms, walls, resources, radiation, tick_time * 1000, self.render_time * 1000
+        self.ticks_recorded += 1
+        self.event_counts = [0] * len(COUNTERS)
+
+        now = time()
+        sums = mins = maxs = row
+        count = 1
+        for tier in self.tiers:
+            closed_slot = tier.add(now, sums, mins, maxs, count)
+            if closed_slot is None:
+                break
+            # the bucket that was closed is added on to the next tier, at the time it started
+            now = tier.times[closed_slot]
+            sums, mins, maxs, count = (tier.sums[closed_slot], tier.mins[closed_slot], tier.maxs[closed_slot],
+                                       tier.counts[closed_slot])
+
+    def query(self, series=None, resolution="second", last=60):
+        """
+        Get the latest values of some series.
+        :param series: name or list of names of the series to get, all of them if not given
+        :param resolution: tick, or the name of a tier
+        :param last: ticks or buckets to get
+        :return: the time of each bucket or the number of each tick, and for each series its total in each bucket for
+        counters, or its mean, minimum and maximum for gauges
+        """
+        if series is None:
+            series = SERIES
+        elif isinstance(series, str):
+            series = [series]
+        unknown = [name for name in series if name not in SERIES]
+        if unknown:
+            raise ValueError(f"Unknown series {', '.join(unknown)}, series are {', '.join(SERIES)}")
+
+        if resolution == TICK_RESOLUTION:
+            taken = min(self.ticks_recorded, self.tick_capacity, max(0, last))
+            slots = np.arange(self.ticks_recorded - taken, self.ticks_recorded) % self.tick_capacity
+            values = self.tick_values[slots]
+            return {
+                "resolution": resolution,
+                "ticks": self.tick_numbers[slots].tolist(),
+                "series": {name: values[:, SERIES.index(name)].tolist() for name in series},
+            }
+
+        if resolution not in self.tiers_by_name:
+            raise ValueError(f"Resolution must be {TICK_RESOLUTION} or one of {', '.join(self.tiers_by_name)}")
+
+        times, sums, mins, maxs, counts = self.tiers_by_name[resolution].rows(last)
+        results = {}
+        for name in series:
+            index = SERIES.index(name)
+            if name in COUNTERS:
+                results[name] = {"total": sums[:, index].tolist()}
+            else:
+                results[name] = {"mean": (sums[:, index] / np.maximum(counts, 1)).tolist(),
+                                 "min": mins[:, index].tolist(),
+                                 "max": maxs[:, index].tolist()}
+
+        return {
+            "resolution": resolution,
+            "times": times.tolist(),
+            "samples": counts.tolist(),
+            "series": results,
+        }
+
+    def get_stats(self):
+        """
+        Get how much the store holds.
+        :return:
+        """
+        return {
+            "stats_store_ticks": min(self.ticks_recorded, self.tick_capacity),
+            "stats_store_buckets": {tier.name: min(tier.rows_written, tier.capacity) for tier in self.tiers},
+            "stats_store_bytes": self.tick_values.nbytes + self.tick_numbers.nbytes + sum(
+                tier.times.nbytes + tier.sums.nbytes + tier.mins.nbytes + tier.maxs.nbytes + tier.counts.nbytes
+                for tier in self.tiers),
+        }
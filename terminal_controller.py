@@ -0,0 +1,104 @@
+import atexit
+import sys
+
+# each character cell shows two pixels, the top one as the foreground colour of an upper half block and the bottom one
+# as the background colour
+UPPER_HALF_BLOCK = "▀"
+
+CLEAR_SCREEN = "\x1b[2J"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+RESET_COLOURS = "\x1b[0m"
+
+
+class TerminalController:
+    def __init__(self, width, height, output=sys.stdout):
+        """
+        Draws the board in a terminal with truecolor escape sequences, only redrawing the cells that changed since the
+        last show.
+        :param width:
+        :param height:
+        :param output:
+        """
+        self.width = width
+        self.height = height
+        self.output = output
+
+        self.rows = (height + 1) // 2
+        self.pixels = [(0, 0, 0)] * (width * self.rows * 2)
+        self.shown_cells = None
+
+        atexit.register(self.restore_terminal)
+
+    def get_shape(self):
+        """
+        Get the shape of the board for use in the simulator logic
+        :return:
+        """
+        return self.width, self.height
+
+    def set_pixel(self, x, y, r, g, b):
+        """
+        Set a pixel on the board
+        :param x:
+        :param y:
+        :param r:
+        :param g:
+        :param b:
+        :return:
+        """
+        # anything that isn't a pixel on the board is an IndexError, like the HAT libraries, so the end of world
+        # space marker ends the render loop
+        try:
+            on_board = 0 <= x < self.width and 0 <= y < self.height
+        except TypeError:
+            on_board = False
+        if not on_board:
+            raise IndexError(f"Pixel {x}, {y} is off the board")
+        self.pixels[y * self.width + x] = (int(r), int(g), int(b))
+
+    def show(self):
+        """
+        Write the cells that changed since the last show to the terminal, as a single write
+        :return:
+        """
+        width = self.width
+        frame = []
+        cursor = None
+        colours = None
+
+        if self.shown_cells is None:
+            self.shown_cells = [None] * (width * self.rows)
+            frame.append(HIDE_CURSOR + CLEAR_SCREEN)
+
+        for row in range(self.rows):
+            top_row = row * 2 * width
+            bottom_row = top_row + width
+            for x in range(width):
+                cell = (self.pixels[top_row + x], self.pixels[bottom_row + x])
+                cell_index = row * width + x
+                if self.shown_cells[cell_index] == cell:
+                    continue
+                self.shown_cells[cell_index] = cell
+
+                if cursor != (row, x):
+                    frame.append(f"\x1b[{row + 1};{x + 1}H")
+                if colours != cell:
+                    (top_r, top_g, top_b), (bottom_r, bottom_g, bottom_b) = cell
+                    frame.append(f"\x1b[38;2;{top_r};{top_g};{top_b};48;2;{bottom_r};{bottom_g};{bottom_b}m")
+                    colours = cell
+                frame.append(UPPER_HALF_BLOCK)
+                cursor = (row, x + 1)
+
+        if len(frame) > 0:
+            self.output.write("".join(frame))
+            self.output.flush()
+
+    def restore_terminal(self):
+        """
+        Put the terminal's colours and cursor back and move the cursor below the board
+        :return:
+        """
+        if self.shown_cells is not None:
+            self.output.write(f"{RESET_COLOURS}\x1b[{self.rows + 1};1H{SHOW_CURSOR}")
+            self.output.flush()
@@ -0,0 +1,66 @@
+import pytest
+
+import artificial_life
+from artificial_life import BaseEntity
+from benchmarks import build_world
+
+
+@pytest.fixture
+def spawn():
+    build_world(8, 8, fill=0)
+
+    def spawn_at(*positions, entity="lifeform"):
+        return [spawned.life_form_id
+                for spawned in artificial_life.bulk_spawn(len(positions), entity, start_positions=list(positions))]
+
+    return spawn_at
+
+
+def group_of(entity_id):
+    groups = BaseEntity.groups
+    return groups.members.get(groups.find(entity_id), {entity_id})
+
+
+def test_union_of_two_pairs_makes_one_group(spawn):
+    groups = BaseEntity.groups
+    first, second, third, fourth = spawn((2, 2), (3, 2), (4, 2), (5, 2))
+
+    groups.union(first, second)
+    groups.union(third, fourth)
+    assert group_of(first) == {first, second}
+    assert group_of(third) == {third, fourth}
+
+    root = groups.union(second, third)
+
+    assert all(groups.find(member_id) == root for member_id in (first, second, third, fourth))
+    assert groups.members == {root: {first, second, third, fourth}}
+    assert [member_id for member_id in (first, second, third, fourth) if not groups.is_follower(member_id)] == [root]
+
+
+def test_removing_the_bridging_member_splits_the_group(spawn):
+    groups = BaseEntity.groups
+    first, second, bridge, fourth, fifth = spawn((1, 2), (2, 2), (3, 2), (4, 2), (5, 2))
+    for left, right in ((first, second), (second, bridge), (bridge, fourth), (fourth, fifth)):
+        groups.union(left, right)
+
+    del BaseEntity.lifeforms[bridge]
+    groups.remove(bridge)
+
+    assert bridge not in groups.parent
+    assert sorted(map(sorted, groups.members.values())) == [[first, second], [fourth, fifth]]
+    assert groups.find(first) != groups.find(fifth)
+
+
+def test_blocked_footprint_refuses_the_move(spawn):
+    groups = BaseEntity.groups
+    first, second = spawn((0, 2), (1, 2))
+    blocker, = spawn((2, 3), entity="wall")
+    root = groups.union(first, second)
+
+    # the blocker is only in the way of the member that moves onto it, and the board edge blocks the whole group
+    assert groups.footprint_collision(root, 'move_down_and_right') == (True, blocker)
+    assert groups.footprint_collision(root, 'move_left') == (True, None)
+    assert groups.footprint_collision(root, 'move_up') == (False, None)
+
+    # moving right, the group's own members are in the way of each other but not of the group
+    assert groups.footprint_collision(root, 'move_right') == (False, None)
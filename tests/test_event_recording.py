@@ -0,0 +1,38 @@
+from collections import Counter
+
+import artificial_life
+from artificial_life import BaseEntity
+from benchmarks import build_world
+from stats_store import StatsStore, COUNTERS
+from tick_tracer import TickTracer, EVENT_KINDS, EVENT_RECORD
+
+
+def run_ticks(ticks):
+    for _ in range(ticks):
+        [life_form.process() for life_form in BaseEntity.lifeforms.copy().values()]
+        artificial_life.world_space_access.world_time += 1
+
+
+def test_tracer_set_by_an_importer_records_events(tmp_path):
+    build_world(24, 24, fill=0.4, walls=0.1, breed_chance=1.0)
+    artificial_life.tracer = TickTracer(10000, str(tmp_path / "trace.bin"))
+    try:
+        run_ticks(20)
+        events = Counter(EVENT_KINDS[record[1]] for record in EVENT_RECORD.iter_unpack(
+            artificial_life.tracer.snapshot()))
+    finally:
+        artificial_life.tracer = None
+
+    assert events["collision"] and events["wall_hit"] and events["birth"]
+
+
+def test_stats_store_set_by_an_importer_counts_events():
+    build_world(24, 24, fill=0.4, walls=0.1, breed_chance=1.0)
+    artificial_life.stats_store = StatsStore(10, (("second", 1, 10),))
+    try:
+        run_ticks(20)
+        event_counts = dict(zip(COUNTERS, artificial_life.stats_store.event_counts))
+    finally:
+        artificial_life.stats_store = None
+
+    assert event_counts["births"]
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+import genome_decoder
+from artificial_life import Session
+
+DECODE_SETTINGS = {
+    'max_attribute': 10,
+    'max_enemy_factor': 3,
+    'max_movement': 45.254833995939045,
+    'wall_chance_multiplier': 2,
+    'directions': Session.directions,
+    'surrounding_point_choices': Session.surrounding_point_choices,
+}
+
+
+def random_genomes(count):
+    rng = random.Random(7)
+    # life seeds bigger than 64 bits are folded down before they are hashed
+    return [(rng.getrandbits(rng.choice((32, 64, 200))), rng.getrandbits(64), rng.getrandbits(130))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("float_colours", (True, False))
+def test_single_genomes_decode_the_same_as_a_batch(float_colours):
+    genomes = random_genomes(500)
+
+    batch_traits = genome_decoder.decode_genomes(genomes, float_colours=float_colours, **DECODE_SETTINGS)
+    single_traits = [genome_decoder.decode_genome(genome, float_colours=float_colours, **DECODE_SETTINGS)
+                     for genome in genomes]
+
+    assert batch_traits == single_traits
+    for batch_genome_traits, single_genome_traits in zip(batch_traits, single_traits):
+        assert {name: type(trait) for name, trait in batch_genome_traits.items()} == \
+               {name: type(trait) for name, trait in single_genome_traits.items()}
+
+
+def test_traits_not_divided_by_zero_stay_whole_numbers():
+    traits = genome_decoder.decode_genomes(random_genomes(500), float_colours=False, **DECODE_SETTINGS)
+
+    for trait_name, divisor_name in (('breed_threshold', 'friend_factor'), ('memory_max', 'forgetfulness'),
+                                     ('time_to_build', 'wall_factor')):
+        assert any(genome_traits[divisor_name] == 0 for genome_traits in traits)
+        for genome_traits in traits:
+            expected_type = int if genome_traits[divisor_name] == 0 else float
+            assert type(genome_traits[trait_name]) is expected_type
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+import artificial_life
+from artificial_life import BaseEntity
+from benchmarks import build_world
+from movement_kernel import MovementKernel, EMPTY, probe_world_space
+
+SCENARIOS = {
+    "colliding": dict(fill=0.4, walls=0.1),
+    "breeding": dict(fill=0.4, breed_chance=1.0),
+    "linked": dict(fill=0.4, combine=True, linked=True),
+    "gravity": dict(fill=0.2, walls=0.05),
+}
+
+
+def run_ticks(use_jit, ticks, gravity_on=False, **world):
+    """
+    Run ticks of BaseEntity.process over a seeded board with the compiled kernel on or off.
+    :param use_jit:
+    :param ticks:
+    :param gravity_on:
+    :param world: arguments for build_world
+    :return: the world space after the ticks
+    """
+    session = build_world(24, 24, **world)
+    session.gravity_on = gravity_on
+    artificial_life.movement = MovementKernel(use_jit=use_jit)
+    if artificial_life.movement.jit:
+        artificial_life.world_space_access.keep_grids()
+
+    for _ in range(ticks):
+        [life_form.process() for life_form in BaseEntity.lifeforms.copy().values()]
+        if session.gravity_on:
+            artificial_life.gravity_pass()
+        artificial_life.world_space_access.world_time += 1
+
+    return dict(artificial_life.world_space_access.world_space)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_process_matches_with_and_without_jit(scenario):
+    pytest.importorskip("numba")
+
+    world = SCENARIOS[scenario]
+    python_world_space = run_ticks(False, 40, gravity_on=scenario == "gravity", **world)
+    jit_world_space = run_ticks(True, 40, gravity_on=scenario == "gravity", **world)
+
+    assert python_world_space
+    assert jit_world_space == python_world_space
+
+    # the grid the compiled kernel probes has been kept in step with the world space throughout
+    occupancy = artificial_life.world_space_access.occupancy
+    assert {(int(x), int(y)): int(occupancy[x, y]) for x, y in zip(*(occupancy != EMPTY).nonzero())} == \
+           {coord: pixel[1] for coord, pixel in jit_world_space.items()}
+
+
+def test_compiled_probe_matches_world_space_probe():
+    pytest.importorskip("numba")
+    import numpy as np
+
+    width, height = 12, 9
+    generator = random.Random(7)
+    world_space = {(x, y): ((0.5, 0.5, 0.5), x * height + y)
+                   for x in range(width) for y in range(height) if generator.random() < .4}
+    occupancy = np.full((width, height), EMPTY, dtype=np.int64)
+    for (x, y), (_, entity_id) in world_space.items():
+        occupancy[x, y] = entity_id
+
+    kernel = MovementKernel(use_jit=True)
+    for x in range(width):
+        for y in range(height):
+            for direction_code in range(9):
+                assert kernel.probe_direction(x, y, direction_code, occupancy, width, height) == \
+                       probe_world_space(x, y, direction_code, world_space, width, height)
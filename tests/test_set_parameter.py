@@ -0,0 +1,67 @@
+import pytest
+
+import artificial_life
+from benchmarks import build_world
+
+
+@pytest.fixture
+def session():
+    return build_world(8, 8, fill=0)
+
+
+def test_tick_rate_must_be_above_zero(session):
+    tick_rate = session.tick_rate
+
+    with pytest.raises(ValueError):
+        artificial_life.set_parameter('tick_rate', 0)
+    with pytest.raises(ValueError):
+        artificial_life.set_tick_rate(-1)
+
+    assert session.tick_rate == tick_rate
+    assert artificial_life.set_parameter('tick_rate', 30) == 30
+
+
+def test_switches_only_take_booleans(session):
+    session.gravity_on = False
+
+    for value in ("false", "true", 0, 1, None):
+        with pytest.raises(ValueError):
+            artificial_life.set_parameter('gravity_on', value)
+    assert session.gravity_on is False
+
+    assert artificial_life.set_parameter('gravity_on', True) is True
+    assert session.gravity_on is True
+
+
+def test_numbers_only_take_numbers(session):
+    pop_limit = artificial_life.args.pop_limit
+
+    for value in ("abc", "5", True, 2.5):
+        with pytest.raises(ValueError):
+            artificial_life.set_parameter('pop_limit', value)
+    assert artificial_life.args.pop_limit == pop_limit
+
+    assert artificial_life.set_parameter('pop_limit', 5.0) == 5
+    assert isinstance(artificial_life.args.pop_limit, int)
+
+    assert artificial_life.set_parameter('radiation_max', 3) == 3
+
+
+def test_unknown_parameter(session):
+    with pytest.raises(ValueError):
+        artificial_life.set_parameter('not_a_parameter', 1)
+
+
+def test_radiation_change_switched_while_running(session):
+    session.radiation_base_change_chance = 1
+    artificial_life.set_parameter('radiation_change', False)
+
+    radiation_state = session.rng.radiation.getstate()
+    world_time = artificial_life.world_space_access.world_time
+    artificial_life.advance_world_time()
+    assert session.rng.radiation.getstate() == radiation_state
+    assert artificial_life.world_space_access.world_time == world_time + 1
+
+    artificial_life.set_parameter('radiation_change', True)
+    artificial_life.advance_world_time()
+    assert session.rng.radiation.getstate() != radiation_state
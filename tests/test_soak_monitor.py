@@ -0,0 +1,37 @@
+import math
+import random
+import tracemalloc
+
+import pytest
+
+from soak_monitor import SoakMonitor
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    soak_monitor = SoakMonitor(200000, sample_interval=1000, window=20, warmup_samples=5,
+                               report_path=str(tmp_path / "soak_report.json"))
+    yield soak_monitor
+    tracemalloc.stop()
+
+
+def test_only_containers_that_keep_growing_are_reported(monitor):
+    rng = random.Random(3)
+    sizes = {"leaking": 0, "population": 30}
+
+    def sample_sizes(sample_number):
+        sizes["leaking"] += 5
+        # fills up and empties again as the population booms and dies back, rising over whole windows at a time
+        sizes["population"] = round(30 + 20 * math.sin(sample_number / 8)) + rng.randint(-5, 5)
+
+    monitor.watch("leaking", lambda: sizes["leaking"])
+    monitor.watch("population", lambda: sizes["population"])
+    monitor.watch("empty", lambda: 0)
+
+    for sample_number, tick in enumerate(range(0, 100000, 1000)):
+        sample_sizes(sample_number)
+        monitor.sample(tick)
+
+    report = monitor.get_report()
+    assert report["growing_containers"] == ["leaking"]
+    assert report["containers"]["population"]["max"] > report["containers"]["population"]["first"]
@@ -0,0 +1,142 @@
+import logging
+import struct
+import sys
+import threading
+
+logger = logging.getLogger("tick-tracer-logger")
+
+# every event is a fixed size record of the tick, the kind of event, the entity, where it was and the other entity
+# involved, or -1 if there wasn't one
+EVENT_RECORD = struct.Struct("<IBqiiq")
+
+# header at the start of a trace dump, a marker, the record size and the number of records that follow
+TRACE_HEADER = struct.Struct("<4sHI")
+TRACE_MARKER = b"ALTR"
+
+EVENT_KINDS = ("collision", "combine", "breed", "birth", "build", "kill", "killed", "wall_broken", "wall_hit",
+               "expired", "removed", "migrant")
+
+(EVENT_COLLISION, EVENT_COMBINE, EVENT_BREED, EVENT_BIRTH, EVENT_BUILD, EVENT_KILL, EVENT_KILLED, EVENT_WALL_BROKEN,
+ EVENT_WALL_HIT, EVENT_EXPIRED, EVENT_REMOVED, EVENT_MIGRANT) = range(len(EVENT_KINDS))
+
+NO_ENTITY = -1
+
+
+class TickTracer:
+    def __init__(self, capacity, dump_path):
+        """
+        Records simulation events into a fixed size binary ring buffer, once it is full the oldest events are
+        overwritten. Call sites only record when tracing is on, so a run without a tracer pays nothing for it.
+        :param capacity: number of events the buffer holds
+        :param dump_path: file the buffer is written to on request and if the simulation crashes
+        """
+        self.capacity = capacity
+        self.dump_path = dump_path
+
+        self.buffer = bytearray(capacity * EVENT_RECORD.size)
+        self.events_recorded = 0
+        self.tick = 0
+
+        self.pack_into = EVENT_RECORD.pack_into
+
+    def clear(self, dump_path=None):
+        """
+        Forget every recorded event.
+        :param dump_path: new file to dump to, the same file is kept if not given
+        :return:
+        """
+        self.events_recorded = 0
+        self.dump_path = dump_path or self.dump_path
+
+    def record(self, event_kind, entity_id, x, y, other_id=NO_ENTITY):
+        """
+        Record an event at the current tick.
+        :param event_kind: one of the EVENT_ constants
+        :param entity_id:
+        :param x:
+        :param y:
+        :param other_id: the other entity involved in the event
+        :return:
+        """
+        self.pack_into(self.buffer, (self.events_recorded % self.capacity) * EVENT_RECORD.size,
+                       self.tick, event_kind, entity_id, x, y, NO_ENTITY if other_id is None else other_id)
+        self.events_recorded += 1
+
+    def snapshot(self):
+        """
+        Get the records in the buffer, oldest first.
+        :return:
+        """
+        if self.events_recorded <= self.capacity:
+            return bytes(self.buffer[:self.events_recorded * EVENT_RECORD.size])
+
+        split = (self.events_recorded % self.capacity) * EVENT_RECORD.size
+        return bytes(self.buffer[split:] + self.buffer[:split])
+
+    def dump(self, path=None):
+        """
+        Write the buffer to a file, read it back with read_trace.
+        :param path: file to write to, the tracer's dump path if not given
+        :return: the path written to and the number of events in it
+        """
+        path = path or self.dump_path
+        records = self.snapshot()
+        event_count = len(records) // EVENT_RECORD.size
+
+        with open(path, "wb") as trace_file:
+            trace_file.write(TRACE_HEADER.pack(TRACE_MARKER, EVENT_RECORD.size, event_count))
+            trace_file.write(records)
+
+        logger.info("Dumped %d trace event(s) to %s", event_count, path)
+        return {"path": path, "events": event_count}
+
+    def dump_on_crash(self):
+        """
+        Dump the buffer when an exception goes uncaught in any thread, then carry on to the previous hooks.
+        :return:
+        """
+        previous_excepthook = sys.excepthook
+        previous_thread_excepthook = threading.excepthook
+
+        def excepthook(exc_type, exc_value, exc_traceback):
+            self.dump()
+            previous_excepthook(exc_type, exc_value, exc_traceback)
+
+        def thread_excepthook(hook_args):
+            if not issubclass(hook_args.exc_type, SystemExit):
+                self.dump()
+            previous_thread_excepthook(hook_args)
+
+        sys.excepthook = excepthook
+        threading.excepthook = thread_excepthook
+
+    def get_stats(self):
+        """
+        Get how much has been traced.
+        :return:
+        """
+        return {
+            "trace_events_recorded": self.events_recorded,
+            "trace_events_held": min(self.events_recorded, self.capacity),
+        }
+
+
+def read_trace(path):
+    """
+    Read the events from a trace dump.
+    :param path:
+    :return: list of (tick, event kind name, entity id, x, y, other entity id) tuples, oldest first
+    """
+    with open(path, "rb") as trace_file:
+        marker, record_size, event_count = TRACE_HEADER.unpack(trace_file.read(TRACE_HEADER.size))
+        if marker != TRACE_MARKER or record_size != EVENT_RECORD.size:
+            raise ValueError(f"{path} is not a trace dump")
+        records = trace_file.read(record_size * event_count)
+
+    return [(tick, EVENT_KINDS[event_kind], entity_id, x, y, other_id)
+            for tick, event_kind, entity_id, x, y, other_id in EVENT_RECORD.iter_unpack(records)]
+
+
+if __name__ == '__main__':
+    for event in read_trace(sys.argv[1] if len(sys.argv) > 1 else "tick_trace.bin"):
+        print(*event, sep="\t")
@@ -0,0 +1,155 @@
+import logging
+import multiprocessing
+from bisect import bisect_right
+
+logger = logging.getLogger("tiled-world-logger")
+
+# each tile gives the entities born in it ids starting at a multiple of this, so ids stay unique across the whole board
+# when entities move between tiles
+TILE_ID_STRIDE = 1 << 40
+
+
+class TileGrid:
+    def __init__(self, width, height, columns, rows):
+        """
+        Splits the board into a grid of tiles, each a region (x0, y0, x1, y1) with the end coordinates exclusive.
+        Every tile has a halo, the ring of cells just outside it that belong to its neighbours.
+        :param width:
+        :param height:
+        :param columns:
+        :param rows:
+        """
+        self.width = width
+        self.height = height
+
+        columns = max(1, min(columns, width))
+        rows = max(1, min(rows, height))
+
+        self.x_edges = [width * column // columns for column in range(columns + 1)]
+        self.y_edges = [height * row // rows for row in range(rows + 1)]
+        self.columns = columns
+
+        self.regions = [(self.x_edges[column], self.y_edges[row], self.x_edges[column + 1], self.y_edges[row + 1])
+                        for row in range(rows) for column in range(columns)]
+        self.halos = [self.halo_cells(region) for region in self.regions]
+
+    def halo_cells(self, region):
+        """
+        Get the cells of the ring just outside a region that are on the board.
+        :param region:
+        :return:
+        """
+        x0, y0, x1, y1 = region
+        ring = [(x, y) for x in range(x0 - 1, x1 + 1) for y in (y0 - 1, y1)] + \
+               [(x, y) for x in (x0 - 1, x1) for y in range(y0, y1)]
+        return [(x, y) for x, y in ring if 0 <= x < self.width and 0 <= y < self.height]
+
+    def tile_at(self, coord):
+        """
+        Get the index of the tile a board coordinate is in.
+        :param coord:
+        :return:
+        """
+        column = min(bisect_right(self.x_edges, coord[0]) - 1, self.columns - 1)
+        row = min(bisect_right(self.y_edges, coord[1]) - 1, len(self.y_edges) - 2)
+        return row * self.columns + column
+
+    def area_share(self, tile_index):
+        """
+        Get the share of the board's area a tile covers.
+        :param tile_index:
+        :return:
+        """
+        x0, y0, x1, y1 = self.regions[tile_index]
+        return (x1 - x0) * (y1 - y0) / (self.width * self.height)
+
+
+def serve_tile(connection, run_tick):
+    """
+    Worker process loop, runs a tick for each message from the coordinator and sends back the result, until the
+    coordinator sends None.
+    :param connection:
+    :param run_tick:
+    :return:
+    """
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            # the coordinator has gone
+            return
+        if message is None:
+            return
+        connection.send(run_tick(message))
+
+
+class TileWorkers:
+    def __init__(self, tile_grid, worker_target):
+        """
+        A process per tile of the grid. Workers are forked, so each starts with a copy of the coordinator's world and
+        keeps only its own tile of it.
+        :param tile_grid:
+        :param worker_target: function run in each worker, called with the tile index and the worker's end of its pipe
+        """
+        self.tile_grid = tile_grid
+
+        fork_context = multiprocessing.get_context("fork")
+
+        self.connections = []
+        self.worker_ends = []
+        self.processes = []
+        for tile_index in range(len(tile_grid.regions)):
+            coordinator_end, worker_end = fork_context.Pipe()
+            self.connections.append(coordinator_end)
+            self.worker_ends.append(worker_end)
+            self.processes.append(fork_context.Process(target=self.run_worker,
+                                                       args=(worker_target, tile_index, worker_end), daemon=True))
+
+    def run_worker(self, worker_target, tile_index, worker_end):
+        """
+        Runs in the forked worker, closes the pipe ends it inherited but doesn't use so it sees the coordinator go
+        away, then runs the worker target.
+        :param worker_target:
+        :param tile_index:
+        :param worker_end:
+        :return:
+        """
+        for connection in self.connections:
+            connection.close()
+        for other_worker_end in self.worker_ends:
+            if other_worker_end is not worker_end:
+                other_worker_end.close()
+
+        worker_target(tile_index, worker_end)
+
+    def start(self):
+        """
+        Fork the workers.
+        :return:
+        """
+        for process in self.processes:
+            process.start()
+        for worker_end in self.worker_ends:
+            worker_end.close()
+        logger.info(f"Started {len(self.processes)} tile worker processes")
+
+    def tick(self, messages):
+        """
+        Send every worker its message for the tick, so they all work at once, then collect their results.
+        :param messages: one message per tile
+        :return: one result per tile
+        """
+        for connection, message in zip(self.connections, messages):
+            connection.send(message)
+        return [connection.recv() for connection in self.connections]
+
+    def stop(self):
+        """
+        Tell every worker to finish.
+        :return:
+        """
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
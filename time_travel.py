@@ -0,0 +1,377 @@
+import logging
+import pickle
+import zlib
+from collections import deque, namedtuple
+from itertools import islice
+
+logger = logging.getLogger("time-travel-logger")
+
+# session fields that change as the simulation runs and are wound back with it
+SESSION_FIELDS = ('current_life_form_amount', 'life_form_total_count', 'highest_concurrent_lifeforms', 'last_removal',
+                  'radiation', 'base_radiation')
+
+# entity attributes holding containers that are changed in place, so they are copied when an entity is captured
+MUTABLE_ENTITY_ATTRIBUTES = ('positions_around_life_form', 'good_memories', 'bad_memories')
+
+# stands in for a container an entity shares with another entity, like the memories bred life forms share with their
+# parent, so the container is only kept once and is shared again when the entities are restored
+SharedAttribute = namedtuple("SharedAttribute", "owner_id")
+
+
+def pack(record):
+    """
+    Compress a record for keeping in memory.
+    :param record:
+    :return: the compressed record and its size before compression
+    """
+    pickled = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+    return zlib.compress(pickled, 1), len(pickled)
+
+
+def unpack(blob):
+    """
+    Get a record back from its compressed form.
+    :param blob:
+    :return:
+    """
+    return pickle.loads(zlib.decompress(blob))
+
+
+class SpaceTime:
+    def __init__(self, world_space, session, entity_base, entity_classes):
+        """
+        Captures the whole state of the simulation, the entities, the world space, the combined groups and the changing
+        parts of the session, and puts it back.
+        :param world_space:
+        :param session:
+        :param entity_base: class holding the lifeforms dictionary and groups, they are looked up each time as they
+        can be replaced
+        :param entity_classes: entity class name to class, for recreating entities
+        """
+        self.world_space_access = world_space
+        self.session = session
+        self.entity_base = entity_base
+        self.entity_classes = entity_classes
+
+    def capture_entities(self):
+        """
+        Get a copy of the state of every entity.
+        :return: entity id to class name and attributes
+        """
+        entities = {}
+        owners = {}
+        for life_form_id, entity in self.entity_base.lifeforms.items():
+            state = entity.__dict__.copy()
+            for attribute in MUTABLE_ENTITY_ATTRIBUTES:
+                if attribute in state:
+                    owner_id = owners.setdefault(id(state[attribute]), life_form_id)
+                    if owner_id == life_form_id:
+                        state[attribute] = state[attribute].copy()
+                    else:
+                        state[attribute] = SharedAttribute(owner_id)
+            entities[life_form_id] = type(entity).__name__, state
+        return entities
+
+    def capture_groups(self):
+        """
+        Get a copy of the combined groups.
+        :return:
+        """
+        groups = self.entity_base.groups
+        return groups.parent.copy(), {root: members.copy() for root, members in groups.members.items()}
+
+    def capture_session(self):
+        """
+        Get the session fields that change as the simulation runs.
+        :return:
+        """
+        return tuple(getattr(self.session, field) for field in SESSION_FIELDS)
+
+    def capture(self):
+        """
+        Get a keyframe of the whole state of the simulation at the current tick.
+        :return:
+        """
+        rng = self.session.rng
+        return {
+            "tick": self.world_space_access.world_time,
+            "entities": self.capture_entities(),
+            "world_space": self.world_space_access.world_space.copy(),
+            "groups": self.capture_groups(),
+            "session": self.capture_session(),
+            "rng": tuple(getattr(rng, stream_name).getstate() for stream_name in rng.stream_names),
+        }
+
+    def restore(self, keyframe):
+        """
+        Put the simulation back into the state of a keyframe, only call this between ticks.
+        :param keyframe:
+        :return:
+        """
+        lifeforms = self.entity_base.lifeforms
+        lifeforms.clear()
+        for life_form_id, (class_name, state) in keyframe["entities"].items():
+            entity_class = self.entity_classes[class_name]
+            entity = entity_class.__new__(entity_class)
+            entity.__dict__.update(state)
+            lifeforms[life_form_id] = entity
+
+        for entity in lifeforms.values():
+            for attribute in MUTABLE_ENTITY_ATTRIBUTES:
+                shared_attribute = entity.__dict__.get(attribute)
+                if isinstance(shared_attribute, SharedAttribute):
+                    setattr(entity, attribute, getattr(lifeforms[shared_attribute.owner_id], attribute))
+
+        world_space = self.world_space_access
+        world_space.erase_world_space()
+        world_space.erase_world_space(2)
+        world_space.write_many_to_world_space((coord, pixel[0], pixel[1])
+                                              for coord, pixel in keyframe["world_space"].items()
+                                              if isinstance(coord, tuple))
+        world_space.world_time = keyframe["tick"]
+
+        groups = self.entity_base.groups
+        groups.parent, groups.members = keyframe["groups"]
+
+        for field, value in zip(SESSION_FIELDS, keyframe["session"]):
+            setattr(self.session, field, value)
+
+        rng = self.session.rng
+        for stream_name, state in zip(rng.stream_names, keyframe["rng"]):
+            getattr(rng, stream_name).setstate(state)
+
+
+class SpaceTimeHistory:
+    def __init__(self, space_time, max_ticks, memory_cap, keyframe_interval=50):
+        """
+        Keeps the last ticks of the simulation in memory so it can be wound back. Every keyframe interval ticks the
+        whole state is kept, and for the ticks in between only what changed since the tick before: the entities born,
+        changed and removed, with just the attributes that changed, and the world cells written and cleared. Every
+        record is pickled and compressed, and the oldest keyframe and the ticks after it are dropped once the history
+        holds more than the maximum ticks or goes over its memory cap.
+
+        The random number generators are only kept in keyframes, so winding back to a keyframe tick replays the same
+        run from there and winding back between keyframes carries on with the random numbers of the keyframe before.
+        :param space_time: captures and restores the state of the simulation
+        :param max_ticks: ticks of history kept
+        :param memory_cap: bytes the compressed history can take up
+        :param keyframe_interval: ticks between keyframes
+        """
+        self.space_time = space_time
+        self.max_ticks = max_ticks
+        self.memory_cap = memory_cap
+        self.keyframe_interval = keyframe_interval
+
+        # (tick, whether it is a keyframe, compressed record, size before compression)
+        self.records = deque()
+        self.memory_used = 0
+        self.memory_uncompressed = 0
+        self.ticks_since_keyframe = 0
+        self.force_keyframe = True
+
+        # the state at the last recorded tick, which the next tick's changes are worked out against
+        self.last_entities = {}
+        self.last_world_space = {}
+        self.last_groups = None
+        self.last_session = None
+
+    def record(self):
+        """
+        Record the state at the current tick, called by the logic loop before each tick.
+        :return:
+        """
+        space_time = self.space_time
+        tick = space_time.world_space_access.world_time
+        if self.records and tick <= self.records[-1][0]:
+            return
+
+        if self.force_keyframe or self.ticks_since_keyframe >= self.keyframe_interval:
+            keyframe = space_time.capture()
+            self.append(tick, True, keyframe)
+            self.last_entities = keyframe["entities"]
+            self.last_world_space = keyframe["world_space"]
+            self.last_groups = keyframe["groups"]
+            self.last_session = keyframe["session"]
+            self.ticks_since_keyframe = 1
+            self.force_keyframe = False
+        else:
+            self.append(tick, False, self.capture_delta(tick))
+            self.ticks_since_keyframe += 1
+
+        self.drop_oldest()
+
+    def capture_delta(self, tick):
+        """
+        Get what changed since the last recorded tick, and make the current state the last recorded one.
+        :param tick:
+        :return:
+        """
+        space_time = self.space_time
+        last_entities = self.last_entities
+        entities = space_time.capture_entities()
+
+        born = {}
+        changed = {}
+        for life_form_id, entity in entities.items():
+            last_entity = last_entities.get(life_form_id)
+            if last_entity is None or last_entity[0] != entity[0]:
+                born[life_form_id] = entity
+            elif last_entity[1] != entity[1]:
+                last_state = last_entity[1]
+                changed[life_form_id] = {attribute: value for attribute, value in entity[1].items()
+                                         if attribute not in last_state or last_state[attribute] != value}
+        removed = [life_form_id for life_form_id in last_entities if life_form_id not in entities]
+
+        world_space = space_time.world_space_access.world_space.copy()
+        cells_written = dict(world_space.items() - self.last_world_space.items())
+        cells_cleared = list(self.last_world_space.keys() - world_space.keys())
+
+        groups = space_time.capture_groups()
+        session = space_time.capture_session()
+
+        delta = {
+            "tick": tick,
+            "born": born,
+            "changed": changed,
+            "removed": removed,
+            "cells_written": cells_written,
+            "cells_cleared": cells_cleared,
+            "groups": groups if groups != self.last_groups else None,
+            "session": session if session != self.last_session else None,
+        }
+
+        self.last_entities = entities
+        self.last_world_space = world_space
+        self.last_groups = groups
+        self.last_session = session
+        return delta
+
+    def append(self, tick, is_keyframe, record):
+        """
+        Compress a record and add it to the history.
+        :param tick:
+        :param is_keyframe:
+        :param record:
+        :return:
+        """
+        blob, uncompressed_size = pack(record)
+        self.records.append((tick, is_keyframe, blob, uncompressed_size))
+        self.memory_used += len(blob)
+        self.memory_uncompressed += uncompressed_size
+
+    def drop_oldest(self):
+        """
+        Drop the oldest keyframe and the ticks after it while the history is too long or too big, the newest keyframe
+        is always kept. If the newest keyframe alone is over the memory cap the next tick is made a keyframe, so it can
+        be dropped.
+        :return:
+        """
+        records = self.records
+        newest_tick = records[-1][0]
+        while True:
+            next_keyframe = next((index for index, record in enumerate(records) if index and record[1]), None)
+            if next_keyframe is None:
+                if self.memory_used > self.memory_cap:
+                    self.force_keyframe = True
+                return
+            if self.memory_used <= self.memory_cap and newest_tick - records[next_keyframe][0] < self.max_ticks:
+                return
+            for _ in range(next_keyframe):
+                _, _, blob, uncompressed_size = records.popleft()
+                self.memory_used -= len(blob)
+                self.memory_uncompressed -= uncompressed_size
+
+    def state_at(self, tick):
+        """
+        Rebuild the state at a recorded tick, from the keyframe before it and the changes after the keyframe.
+        :param tick:
+        :return: a keyframe of the state at the tick
+        """
+        keyframe_index = max(index for index, record in enumerate(self.records) if record[1] and record[0] <= tick)
+        state = unpack(self.records[keyframe_index][2])
+
+        for record_tick, _, blob, _ in islice(self.records, keyframe_index + 1, None):
+            if record_tick > tick:
+                break
+            delta = unpack(blob)
+            entities = state["entities"]
+            for life_form_id in delta["removed"]:
+                del entities[life_form_id]
+            entities.update(delta["born"])
+            for life_form_id, attributes in delta["changed"].items():
+                entities[life_form_id][1].update(attributes)
+
+            world_space = state["world_space"]
+            world_space.update(delta["cells_written"])
+            for coord in delta["cells_cleared"]:
+                del world_space[coord]
+
+            if delta["groups"] is not None:
+                state["groups"] = delta["groups"]
+            if delta["session"] is not None:
+                state["session"] = delta["session"]
+            state["tick"] = record_tick
+
+        return state
+
+    def rewind(self, ticks=1):
+        """
+        Wind the simulation back a number of ticks, or as far as the history goes, and pause it there. Only call this
+        between ticks.
+        :param ticks:
+        :return: the tick wound back to and how far back the history now goes
+        """
+        if not self.records:
+            raise ValueError("No history recorded yet")
+
+        oldest_tick = self.records[0][0]
+        tick = self.space_time.world_space_access.world_time - max(1, int(ticks))
+        tick = min(max(oldest_tick, tick), self.records[-1][0])
+
+        self.space_time.restore(self.state_at(tick))
+        self.space_time.session.process_loop_on = False
+        self.branch()
+
+        logger.info(f"Wound back to tick {tick}")
+        return {"tick": tick, "oldest_tick": oldest_tick}
+
+    def step_back(self):
+        """
+        Wind the simulation back a single tick and pause it there.
+        :return:
+        """
+        return self.rewind(1)
+
+    def resume(self):
+        """
+        Carry on running the simulation from where it was wound back to.
+        :return:
+        """
+        self.space_time.session.process_loop_on = True
+        return {"tick": self.space_time.world_space_access.world_time}
+
+    def branch(self):
+        """
+        Forget the history from the current tick on, after the simulation has been put back to an earlier state; the
+        current tick is recorded again as a keyframe, starting the new timeline.
+        :return:
+        """
+        tick = self.space_time.world_space_access.world_time
+        while self.records and self.records[-1][0] >= tick:
+            _, _, blob, uncompressed_size = self.records.pop()
+            self.memory_used -= len(blob)
+            self.memory_uncompressed -= uncompressed_size
+        self.force_keyframe = True
+
+    def get_stats(self):
+        """
+        Get how much history is held and how much memory it takes.
+        :return:
+        """
+        return {
+            "history_oldest_tick": self.records[0][0] if self.records else None,
+            "history_ticks": len(self.records),
+            "history_keyframes": sum(1 for record in self.records if record[1]),
+            "history_bytes": self.memory_used,
+            "history_compression": round(self.memory_uncompressed / self.memory_used, 2) if self.memory_used else None,
+        }
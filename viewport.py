@@ -0,0 +1,220 @@
+import logging
+from math import ceil
+
+import numpy as np
+
+logger = logging.getLogger("viewport-logger")
+
+OVERVIEW_MODES = ("average", "density")
+
+
+class Viewport:
+    def __init__(self, display_width, display_height, world_width, world_height, empty_cell, locate_entity,
+                 overview_mode="average"):
+        """
+        Camera onto a world bigger than the display. At a scale of 1 each display pixel shows one cell of the world;
+        zoomed out, each display pixel shows a square block of cells, aggregated in bulk from the world space's grids.
+        The camera can pan, zoom, or follow an entity around, and only the region in view is rendered.
+        :param display_width:
+        :param display_height:
+        :param world_width:
+        :param world_height:
+        :param empty_cell: value of an empty cell in the world's occupancy grid
+        :param locate_entity: function that gets the x, y position of an entity from its id, or None if it is gone
+        :param overview_mode: average to show the mean colour of the entities in each block, density to show the same
+        but dimmed by how densely packed the block is compared to the densest block
+        """
+        if overview_mode not in OVERVIEW_MODES:
+            raise ValueError(f"Overview mode must be one of {', '.join(OVERVIEW_MODES)}")
+
+        self.display_width = display_width
+        self.display_height = display_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.empty_cell = empty_cell
+        self.locate_entity = locate_entity
+        self.overview_mode = overview_mode
+
+        # the scale at which the whole world fits on the display
+        self.max_scale = max(1, ceil(world_width / display_width), ceil(world_height / display_height))
+
+        self.scale = 1
+        self.centre_x = world_width / 2
+        self.centre_y = world_height / 2
+        self.follow_id = None
+        self.origin_x, self.origin_y = self.view_origin()
+
+        self.frame = np.zeros((display_height, display_width, 3), dtype=np.float32)
+        self.rgb_frame = np.zeros((display_height, display_width, 3), dtype=np.uint8)
+
+        # buffers the view is summed into block by block when zoomed out, allocated for each scale as it is used
+        self.block_scale = None
+        self.block_colours = None
+        self.block_occupied = None
+        self.block_columns = None
+
+    def view_origin(self):
+        """
+        Get the world cell at the top left of the view, the view is kept on the world wherever it can be.
+        :return:
+        """
+        span_x = self.display_width * self.scale
+        span_y = self.display_height * self.scale
+        x0 = min(max(0, round(self.centre_x - span_x / 2)), max(0, self.world_width - span_x))
+        y0 = min(max(0, round(self.centre_y - span_y / 2)), max(0, self.world_height - span_y))
+        return x0, y0
+
+    def pan(self, dx, dy):
+        """
+        Move the camera by a number of display pixels, this stops it following an entity.
+        :param dx:
+        :param dy:
+        :return: the camera's state
+        """
+        self.follow_id = None
+        x0, y0 = self.view_origin()
+        # pan from where the view actually is, so panning back from an edge moves straight away
+        self.centre_x = x0 + (self.display_width / 2 + dx) * self.scale
+        self.centre_y = y0 + (self.display_height / 2 + dy) * self.scale
+        return self.get_state()
+
+    def zoom(self, scale):
+        """
+        Set how many world cells across each display pixel shows, keeping the same point in the centre.
+        :param scale:
+        :return: the camera's state
+        """
+        self.scale = min(max(1, int(scale)), self.max_scale)
+        logger.info(f"Camera scale set to {self.scale}")
+        return self.get_state()
+
+    def overview(self):
+        """
+        Zoom out until the whole world fits on the display.
+        :return: the camera's state
+        """
+        self.follow_id = None
+        self.centre_x = self.world_width / 2
+        self.centre_y = self.world_height / 2
+        return self.zoom(self.max_scale)
+
+    def follow(self, life_form_id):
+        """
+        Keep an entity in the centre of the view until it is gone or the camera is panned.
+        :param life_form_id:
+        :return: the camera's state
+        """
+        if self.locate_entity(life_form_id) is None:
+            raise ValueError(f"No entity {life_form_id} to follow")
+        self.follow_id = life_form_id
+        logger.info(f"Camera following entity {life_form_id}")
+        return self.get_state()
+
+    def update_follow(self):
+        """
+        Move the camera onto the entity being followed.
+        :return:
+        """
+        position = self.locate_entity(self.follow_id)
+        if position is None:
+            logger.info(f"Entity {self.follow_id} the camera was following is gone")
+            self.follow_id = None
+        else:
+            self.centre_x, self.centre_y = position
+
+    def get_state(self):
+        """
+        Get where the camera is looking.
+        :return:
+        """
+        x0, y0 = self.view_origin()
+        return {
+            "view_origin": [x0, y0],
+            "scale": self.scale,
+            "max_scale": self.max_scale,
+            "following": self.follow_id,
+            "world_size": [self.world_width, self.world_height],
+        }
+
+    def to_display(self, coord):
+        """
+        Get the display pixel showing a world cell, given the view origin.
+        :param coord: world x, y
+        :return: display x, y or None if the cell is out of view
+        """
+        x = (coord[0] - self.origin_x) // self.scale
+        y = (coord[1] - self.origin_y) // self.scale
+        if 0 <= x < self.display_width and 0 <= y < self.display_height:
+            return x, y
+        return None
+
+    def draw_world(self, occupancy, colours, frame):
+        """
+        Draw the part of the world in view onto a frame, only the cells in view are looked at.
+        :param occupancy: the world space's grid of the entity id in each cell, indexed x, y
+        :param colours: the world space's grid of the colour of each cell, indexed x, y
+        :param frame: display height x width x 3 array to draw on, entities are drawn over what is there
+        :return:
+        """
+        if self.follow_id is not None:
+            self.update_follow()
+
+        scale = self.scale
+        self.origin_x, self.origin_y = self.view_origin()
+        x1 = min(self.world_width, self.origin_x + self.display_width * scale)
+        y1 = min(self.world_height, self.origin_y + self.display_height * scale)
+        cells_width = x1 - self.origin_x
+        cells_height = y1 - self.origin_y
+
+        view_occupied = occupancy[self.origin_x:x1, self.origin_y:y1] != self.empty_cell
+        view_colours = colours[self.origin_x:x1, self.origin_y:y1]
+
+        if scale == 1:
+            np.copyto(frame[:cells_height, :cells_width], view_colours.transpose(1, 0, 2),
+                      where=view_occupied.T[..., np.newaxis])
+            return
+
+        # the view is copied into buffers a whole number of blocks across, empty cells and the part past the edge of
+        # a world smaller than the view left at 0, then each block is summed at once
+        if self.block_scale != scale:
+            self.block_scale = scale
+            self.block_colours = np.zeros((self.display_width * scale, self.display_height * scale, 3),
+                                          dtype=np.float32)
+            self.block_occupied = np.zeros((self.display_width * scale, self.display_height * scale), dtype=bool)
+            # ones where a column of the view falls in a column of blocks, multiplying by it sums the block columns
+            # far quicker than a reduction over the reshaped buffer
+            self.block_columns = np.kron(np.eye(self.display_width, dtype=np.float32),
+                                         np.ones((1, scale), dtype=np.float32))
+        block_colours = self.block_colours
+        block_occupied = self.block_occupied
+
+        block_occupied[:cells_width, :cells_height] = view_occupied
+        np.multiply(view_colours, view_occupied[..., np.newaxis], out=block_colours[:cells_width, :cells_height])
+
+        column_sums = self.block_columns @ block_colours.reshape(self.display_width * scale, -1)
+        block_sums = column_sums.reshape(self.display_width, self.display_height, scale, 3).sum(axis=2).transpose(
+            1, 0, 2)
+        block_entities = block_occupied.reshape(self.display_width, scale, self.display_height, scale).sum(
+            axis=(1, 3)).T[..., np.newaxis]
+
+        # both modes show the mean colour of the entities in each block, so a sparse world isn't drawn almost black
+        block_means = block_sums / np.maximum(block_entities, 1)
+        if self.overview_mode == "density":
+            block_means *= block_entities / max(1, block_entities.max())
+
+        np.copyto(frame, block_means, where=block_entities > 0)
+
+    def render_frame(self, occupancy, colours, colour_scale):
+        """
+        Render the view as RGB24, for drawing straight to the screen.
+        :param occupancy:
+        :param colours:
+        :param colour_scale: scale from the world's colours to 0 to 255
+        :return: display height x width x 3 array of RGB24 pixels, reused for every frame
+        """
+        self.frame.fill(0)
+        self.draw_world(occupancy, colours, self.frame)
+        np.multiply(self.frame, colour_scale, out=self.frame)
+        np.clip(self.frame, 0, 255, out=self.frame)
+        np.copyto(self.rgb_frame, self.frame, casting='unsafe')
+        return self.rgb_frame